@@ -0,0 +1,297 @@
+"""
+Benchmarks of the supervisor at scale, written as JSON so that runs can be
+compared over time.
+
+    python benchmarks/bench.py -o results.json
+    python benchmarks/bench.py --only spawn,reload --processes 2000
+    python benchmarks/bench.py -o new.json --compare results.json
+
+The managed programs are coreutils stubs (sleep, false) so that the numbers
+measure the supervisor, not the startup of an interpreter.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+# Keep logging out of the measurements unless asked for
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src"))
+
+import yaml  # noqa: E402
+
+from Program.ProcessRecord import ALIVE_STATES  # noqa: E402
+from Reaper import REAPER  # noqa: E402
+from TaskMaster import TaskMaster  # noqa: E402
+
+SLEEP = shutil.which("sleep")
+FALSE = shutil.which("false")
+BENCHMARKS = ("spawn", "exit", "crashloop", "shutdown", "reload", "idle")
+
+
+def get_args():
+    parser = argparse.ArgumentParser(prog="bench")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", help="Previous results to compare against")
+    parser.add_argument(
+        "--only", default=",".join(BENCHMARKS), help="Comma-separated benchmarks"
+    )
+    parser.add_argument("--processes", type=int, default=500)
+    parser.add_argument("--exit-samples", type=int, default=50)
+    parser.add_argument("--crash-processes", type=int, default=20)
+    parser.add_argument("--crash-seconds", type=float, default=3.0)
+    parser.add_argument("--reload-sizes", default="10,100,1000")
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--sample-interval", type=float, help="Resource sampler interval while idle"
+    )
+    return parser.parse_args()
+
+
+def program(cmd, processes=1, **options):
+    config = {
+        "cmd": cmd,
+        "processes": processes,
+        "start_at_launch": True,
+        "success_timeout": 1,
+        "discard_output": True,
+        "stop_timeout": 5,
+    }
+    config.update(options)
+    return config
+
+
+def supervisor(tmpdir, programs, **options):
+    path = os.path.join(tmpdir, "bench.yaml")
+    # No event log nor state snapshot: they would write into the repo's
+    # logs/ and add their own I/O to the measurements
+    config = {
+        "programs": programs,
+        "sample_interval": 0,
+        "event_log": False,
+        "state_file": False,
+    }
+    config.update(options)
+    if config["sample_interval"] is None:
+        del config["sample_interval"]  # the supervisor's default
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    config["file_path"] = path
+    return TaskMaster(config)
+
+
+def processes_of(tm, name):
+    return tm.programs[name]._process._processes.values()
+
+
+def stats_ms(values) -> dict:
+    values = sorted(value * 1000.0 for value in values)
+    return {
+        "p50_ms": round(values[len(values) // 2], 3),
+        "p90_ms": round(values[min(len(values) - 1, int(len(values) * 0.9))], 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def bench_spawn(args, tmpdir) -> dict:
+    start = time.perf_counter()
+    tm = supervisor(tmpdir, {"sleepers": program(f"{SLEEP} 1000", args.processes)})
+    elapsed = time.perf_counter() - start
+    tm.__del__()
+    return {
+        "processes": args.processes,
+        "seconds": round(elapsed, 4),
+        "per_process_us": round(elapsed / args.processes * 1e6, 1),
+    }
+
+
+def bench_exit(args, tmpdir) -> dict:
+    """Time from SIGKILL to the supervisor handling the exit."""
+    tm = supervisor(
+        tmpdir,
+        {
+            "victims": program(
+                f"{SLEEP} 1000", args.exit_samples, restart_policy="never"
+            )
+        },
+    )
+    latencies = []
+    for record in list(processes_of(tm, "victims")):
+        start = time.perf_counter()
+        os.kill(record.pid, signal.SIGKILL)
+        while record.state in ALIVE_STATES:
+            REAPER.waitExit(0.01)
+        latencies.append(time.perf_counter() - start)
+    tm.__del__()
+    return {"samples": len(latencies), **stats_ms(latencies)}
+
+
+def bench_crashloop(args, tmpdir) -> dict:
+    """Restarts per second of programs that exit immediately, without backoff."""
+    tm = supervisor(
+        tmpdir,
+        {
+            "crasher": program(
+                FALSE,
+                args.crash_processes,
+                restart_policy="always",
+                max_restarts=10**9,
+                backoff_initial=0,
+                backoff_max=0,
+                backoff_jitter=0,
+            )
+        },
+    )
+    start = time.perf_counter()
+    time.sleep(args.crash_seconds)
+    restarts = tm.summary("crasher")["restarts"]
+    elapsed = time.perf_counter() - start
+    tm.__del__()
+    return {
+        "processes": args.crash_processes,
+        "restarts": restarts,
+        "restarts_per_second": round(restarts / elapsed, 1),
+    }
+
+
+def bench_shutdown(args, tmpdir) -> dict:
+    tm = supervisor(tmpdir, {"sleepers": program(f"{SLEEP} 1000", args.processes)})
+    start = time.perf_counter()
+    tm._stop_all_processes()
+    elapsed = time.perf_counter() - start
+    tm.__del__()
+    return {"processes": args.processes, "seconds": round(elapsed, 4)}
+
+
+def bench_reload(args, tmpdir) -> dict:
+    """
+    Reload of configs with many (not started) programs: an unchanged file,
+    the same file again, then a file where every program changed a key that
+    needs no restart.
+    """
+    results = {}
+    for size in (int(size) for size in args.reload_sizes.split(",")):
+        programs = {
+            f"prog{i}": program(f"{SLEEP} 1000", start_at_launch=False)
+            for i in range(size)
+        }
+        tm = supervisor(tmpdir, programs)
+        start = time.perf_counter()
+        tm.reloadConfig()
+        unchanged = time.perf_counter() - start
+        # Same file again: served from the config cache
+        start = time.perf_counter()
+        tm.reloadConfig()
+        repeated = time.perf_counter() - start
+        for config in programs.values():
+            config["stop_timeout"] = 7
+        with open(tm.file_path, "w") as f:
+            yaml.safe_dump({"programs": programs, "sample_interval": 0}, f)
+        start = time.perf_counter()
+        tm.reloadConfig()
+        updated = time.perf_counter() - start
+        tm.__del__()
+        results[str(size)] = {
+            "unchanged_seconds": round(unchanged, 4),
+            "repeated_seconds": round(repeated, 4),
+            "updated_seconds": round(updated, 4),
+        }
+    return results
+
+
+def bench_idle(args, tmpdir) -> dict:
+    """Supervisor CPU and RSS while its processes just run."""
+    tm = supervisor(
+        tmpdir,
+        {"sleepers": program(f"{SLEEP} 1000", args.processes)},
+        sample_interval=args.sample_interval,
+    )
+    time.sleep(1.5)  # past success_timeout
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    time.sleep(args.idle_seconds)
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    with open("/proc/self/statm") as statm:
+        rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    tm.__del__()
+    cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+    return {
+        "processes": args.processes,
+        "cpu_percent": round(100.0 * cpu / args.idle_seconds, 3),
+        "rss_bytes": rss,
+    }
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": vars(args),
+    }
+
+
+def flatten(data, prefix="") -> dict:
+    values = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(old_results, new_results):
+    old, new = flatten(old_results), flatten(new_results)
+    print(f"{'metric':<40} {'before':>12} {'after':>12} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        change = f"{(new[key] - old[key]) / old[key] * 100:+.1f}%" if old[key] else ""
+        print(f"{key:<40} {old[key]:>12} {new[key]:>12} {change:>8}")
+
+
+def main():
+    args = get_args()
+    selected = [name for name in args.only.split(",") if name]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        print(
+            f"bench: unknown benchmarks: {', '.join(sorted(unknown))}", file=sys.stderr
+        )
+        return 2
+    report = {"meta": metadata(args), "results": {}}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in selected:
+            print(f"bench: {name}...", file=sys.stderr)
+            report["results"][name] = globals()[f"bench_{name}"](args, tmpdir)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f)["results"], report["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import asyncio
+import signal
+
+from Constants import CONTROL_SOCKET
+from ControlServer import ControlServer
+from Logger import LOGGER as logger
+from TaskMaster import TaskMaster
+
+
+class AsyncSupervisor:
+    """
+    Optional asyncio core: one event loop in the main thread runs the
+    reaper, the timers, the control socket and the signal handling, so
+    nothing touches the programs concurrently and stop batches are awaited
+    instead of blocking.
+
+    The spawn path is unchanged (Popen without preexec_fn, which already
+    uses vfork); the reaper plays the role of the asyncio child watcher.
+    There is no stdin REPL in this mode, the supervisor is driven through
+    the control socket (taskmasterctl).
+
+    Methods:
+        run(): Run the supervisor until SIGINT/SIGTERM.
+        main(): The coroutine run by run().
+    """
+
+    def __init__(self, config=None):
+        if config is None:
+            raise ValueError("Configuration must be provided")
+        self.config = config
+        self.tm = None
+        self.control = None
+        self._stopping = None
+        self._tasks = set()
+
+    def run(self):
+        asyncio.run(self.main())
+
+    async def main(self):
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        self.tm = TaskMaster(self.config, loop=loop)
+        self.control = ControlServer(
+            self.tm, self.config.get("control_socket", CONTROL_SOCKET)
+        )
+        await self.control.startAsync()
+        loop.add_signal_handler(signal.SIGHUP, self._onSighup)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stopping.set)
+        logger.info("Asyncio supervisor running.")
+        try:
+            await self._stopping.wait()
+        finally:
+            logger.info("Asyncio supervisor stopping...")
+            for signum in (signal.SIGHUP, signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signum)
+            await self.control.stopAsync()
+            self.tm.stopMetrics()
+            await self.tm.shutdownAsync()
+
+    def _onSighup(self):
+        logger.info("signal: SIGHUP, reload config file...")
+        # Through the control lock, so it never interleaves with a command
+        task = asyncio.ensure_future(self.control.handleAsync({"cmd": "reload"}))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,3 @@
+from .AsyncSupervisor import AsyncSupervisor
+
+__all__ = ["AsyncSupervisor"]
@@ -0,0 +1,69 @@
+import random
+
+from Constants import (
+    BACKOFF_FACTOR,
+    BACKOFF_INITIAL,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    BACKOFF_RESET,
+)
+
+
+class Backoff:
+    """
+    Restart delay policy of a crash-looping process.
+
+    The n-th consecutive crash is restarted after
+    ``min(max, initial * factor ** n)`` seconds, spread by a random
+    ``±jitter`` fraction so that processes that crashed together do not all
+    come back at the same instant. A process that stayed up for at least
+    ``reset`` seconds is no longer considered crash-looping and starts over
+    from the initial delay.
+
+    The delays are meant to be fed to the reaper timer heap, so waiting
+    restarts cost nothing until their deadline.
+
+    Methods:
+        delay(attempt): Seconds to wait before the given restart attempt.
+        nextAttempt(attempt, uptime): Attempt number after a crash that
+                                      happened uptime seconds after start.
+    """
+
+    def __init__(
+        self,
+        initial=BACKOFF_INITIAL,
+        maximum=BACKOFF_MAX,
+        factor=BACKOFF_FACTOR,
+        jitter=BACKOFF_JITTER,
+        reset=BACKOFF_RESET,
+        rand=random.random,
+    ):
+        if initial < 0 or maximum < 0:
+            raise ValueError("backoff delays cannot be negative")
+        if factor < 1:
+            raise ValueError("backoff_factor must be at least 1")
+        if not 0 <= jitter <= 1:
+            raise ValueError("backoff_jitter must be between 0 and 1")
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.reset = reset
+        self._rand = rand
+
+    def delay(self, attempt: int) -> float:
+        delay = self.initial
+        # Stop multiplying once capped, big attempts must not overflow
+        for _ in range(attempt):
+            if delay >= self.maximum:
+                break
+            delay *= self.factor
+        delay = min(delay, self.maximum)
+        if self.jitter:
+            delay *= 1 + self.jitter * (2 * self._rand() - 1)
+        return min(delay, self.maximum)
+
+    def nextAttempt(self, attempt: int, uptime: float) -> int:
+        if self.reset and uptime >= self.reset:
+            return 0
+        return attempt
@@ -0,0 +1,3 @@
+from .Backoff import Backoff
+
+__all__ = ["Backoff"]
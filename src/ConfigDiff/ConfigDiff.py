@@ -0,0 +1,123 @@
+import hashlib
+import json
+
+from Constants import LIST_NO_RESTART, LIST_RESTART
+from Logger import LOGGER as logger
+from Program.ProgramConfig import ProgramConfig
+
+
+def configHash(program_config: dict) -> str:
+    """Stable hash of a program's raw config, independent of key order."""
+    canonical = json.dumps(
+        program_config, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class ReloadPlan:
+    """
+    Minimal set of actions turning the running programs into a new config.
+
+    Attributes:
+        add (dict): New programs, name -> ProgramConfig.
+        remove (list): Running programs absent from the new config.
+        restart (dict): Programs with a LIST_RESTART key changed, name -> ProgramConfig.
+        update (dict): Programs with only LIST_NO_RESTART keys changed,
+                       name -> (ProgramConfig, changed keys).
+        unchanged (list): Programs left untouched.
+        invalid (dict): Programs whose new config failed validation, name -> error.
+                        The running version (if any) is kept.
+        hashes (dict): Config hash of every program kept after the reload.
+    """
+
+    def __init__(self):
+        self.add = {}
+        self.remove = []
+        self.restart = {}
+        self.update = {}
+        self.unchanged = []
+        self.invalid = {}
+        self.hashes = {}
+
+    def isEmpty(self) -> bool:
+        return not (self.add or self.remove or self.restart or self.update)
+
+    def summary(self) -> str:
+        lines = []
+        lines += [f"+ {name} (add)" for name in self.add]
+        lines += [f"- {name} (remove)" for name in self.remove]
+        lines += [f"~ {name} (restart)" for name in self.restart]
+        lines += [
+            f"* {name} (update: {', '.join(keys)})"
+            for name, (_, keys) in self.update.items()
+        ]
+        lines += [
+            f"! {name} (invalid: {error})" for name, error in self.invalid.items()
+        ]
+        if not lines:
+            return "Nothing to do"
+        lines.append(f"{len(self.unchanged)} program(s) unchanged")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return (
+            f"ReloadPlan(add={list(self.add)}, remove={self.remove}, "
+            f"restart={list(self.restart)}, update={list(self.update)}, "
+            f"invalid={list(self.invalid)}, unchanged={len(self.unchanged)})"
+        )
+
+
+class ConfigDiff:
+    """
+    Structural diff between the running programs and a freshly loaded
+    `programs:` section.
+
+    Only programs whose raw config hash changed are validated and compared
+    key by key, so a reload of a big config where one line changed builds a
+    single ProgramConfig instead of a Program for every entry.
+    """
+
+    @staticmethod
+    def plan(programs: dict, hashes: dict, programs_config: dict) -> ReloadPlan:
+        plan = ReloadPlan()
+        programs_config = programs_config or {}
+        seen = set()
+        for key, raw in programs_config.items():
+            raw = dict(raw or {})
+            raw.setdefault("name", key)
+            name = raw["name"]
+            seen.add(name)
+            new_hash = configHash(raw)
+            if name in programs and hashes.get(name) == new_hash:
+                plan.unchanged.append(name)
+                plan.hashes[name] = new_hash
+                continue
+            try:
+                new_config = ProgramConfig(raw)
+            except Exception as e:
+                logger.error(f"Error initializing program {name}: {e}")
+                plan.invalid[name] = str(e)
+                if name in programs:
+                    plan.hashes[name] = hashes.get(name)
+                continue
+            plan.hashes[name] = new_hash
+            if name not in programs:
+                plan.add[name] = new_config
+                continue
+            ConfigDiff._classify(plan, name, programs[name], new_config)
+        plan.remove = [name for name in programs if name not in seen]
+        return plan
+
+    @staticmethod
+    def _classify(plan, name, program, new_config):
+        for key in LIST_RESTART:
+            if program.get(key) != new_config.get(key):
+                plan.restart[name] = new_config
+                return
+        keys = [
+            key for key in LIST_NO_RESTART if program.get(key) != new_config.get(key)
+        ]
+        if keys:
+            plan.update[name] = (new_config, keys)
+        else:
+            plan.unchanged.append(name)
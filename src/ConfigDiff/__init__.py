@@ -0,0 +1,3 @@
+from .ConfigDiff import ConfigDiff, ReloadPlan, configHash
+
+__all__ = ["ConfigDiff", "ReloadPlan", "configHash"]
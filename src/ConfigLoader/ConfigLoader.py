@@ -0,0 +1,141 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+from Logger import LOGGER as logger
+
+# Bumped whenever the layout of the persisted cache changes
+CACHE_VERSION = 1
+# A file modified less than this many seconds before it was read may be
+# rewritten again within the same mtime tick, so its stat is not trusted
+RACY_WINDOW = 2.0
+
+
+class _Entry:
+    __slots__ = ("key", "digest", "data", "trusted")
+
+    def __init__(self, key, digest, data, trusted):
+        self.key = key
+        self.digest = digest
+        self.data = data
+        self.trusted = trusted
+
+
+class ConfigLoader:
+    """
+    YAML config reader that only parses a file when its content changed.
+
+    The file is parsed with libyaml's CSafeLoader when PyYAML was built with
+    it. The parsed config is kept pickled together with the file's
+    (mtime, size, inode) and SHA-1: an unchanged stat skips reading the file,
+    a changed stat with the same content skips the parse. With persist set,
+    the pickle is also written next to the YAML as ``.<file>.cache`` so a
+    restart skips the parse too; a cache file that is not ours or is
+    writable by others is ignored.
+
+    Every load returns a fresh copy, callers may modify it.
+
+    Methods:
+        load(path): The config in path, as a dict.
+        invalidate(path=None): Forget the cached config of a path, or all of them.
+    """
+
+    def __init__(self, persist: bool = False):
+        self.persist = persist
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cachePath(path: str) -> str:
+        head, tail = os.path.split(path)
+        return os.path.join(head, f".{tail}.cache")
+
+    @staticmethod
+    def _parse(raw: bytes):
+        import yaml
+
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        return yaml.load(raw, Loader=loader)
+
+    def load(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            stat = os.stat(path)
+            key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            entry = self._entries.get(path)
+            if entry is None and self.persist:
+                entry = self._readCache(path)
+            if entry is not None and entry.trusted and entry.key == key:
+                logger.debug("Config %s unchanged, using the cached copy", path)
+                return pickle.loads(entry.data)
+            with open(path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha1(raw).hexdigest()
+            trusted = time.time() - stat.st_mtime > RACY_WINDOW
+            if entry is not None and entry.digest == digest:
+                logger.debug("Config %s content unchanged, parse skipped", path)
+                config = pickle.loads(entry.data)
+                entry = _Entry(key, digest, entry.data, trusted)
+            else:
+                config = self._parse(raw)
+                data = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+                entry = _Entry(key, digest, data, trusted)
+            self._entries[path] = entry
+            if self.persist:
+                self._writeCache(path, entry)
+            return config
+
+    def invalidate(self, path: str = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def _readCache(self, path):
+        cache_path = self.cachePath(path)
+        try:
+            with open(cache_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                # Unpickling runs code: only trust a file nobody else could write
+                if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+                    logger.warning(
+                        f"Ignoring config cache {cache_path}: unsafe owner or mode"
+                    )
+                    return None
+                version, key, digest, data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug("Ignoring config cache %s: %s", cache_path, e)
+            return None
+        if version != CACHE_VERSION:
+            return None
+        # The YAML may have been rewritten within the mtime tick of the cache
+        return _Entry(key, digest, data, False)
+
+    def _writeCache(self, path, entry):
+        cache_path = self.cachePath(path)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        payload = pickle.dumps(
+            (CACHE_VERSION, entry.key, entry.digest, entry.data),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        try:
+            fd = os.open(
+                tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600
+            )
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug("Cannot write config cache %s: %s", cache_path, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+CONFIG_LOADER = ConfigLoader()
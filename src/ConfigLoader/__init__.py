@@ -0,0 +1,3 @@
+from .ConfigLoader import CONFIG_LOADER, ConfigLoader
+
+__all__ = ["ConfigLoader", "CONFIG_LOADER"]
@@ -1,13 +1,47 @@
 from .constants import (
     APP_NAME,
+    BACKOFF_FACTOR,
+    BACKOFF_INITIAL,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    BACKOFF_RESET,
+    CGROUP_CPU_PERIOD,
+    CGROUP_NAME,
     CONFIG_PATH,
+    CONTROL_MAX_REQUEST,
+    CONTROL_SOCKET,
+    EVENT_BUFFER_BYTES,
+    EVENT_FLUSH_INTERVAL,
+    EVENT_LOG_FILE,
+    HISTORY_LIMIT,
+    LAUNCH_WORKERS,
     LIST_NO_RESTART,
     LIST_RESTART,
+    LOG_ASYNC,
+    LOG_BACKUPS,
+    LOG_BATCH_SIZE,
     LOG_DIR,
     LOG_FILE,
     LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    METRICS_HOST,
+    OUTPUT_BUFFER_KB,
+    OUTPUT_READ_SIZE,
     PRINT_SYSLOG,
+    PROFILE_TOP,
+    REAPER_ADOPT_GRACE,
+    REAPER_POLL_INTERVAL,
+    REAPER_RETRY_DELAY,
+    REEXEC_DELAY,
     REMOTE_SYSLOG,
+    SAMPLE_EWMA_ALPHA,
+    SAMPLE_INTERVAL,
+    SOCKET_BACKLOG,
+    STATE_FILE,
+    STATE_WRITE_DELAY,
+    STOP_POLL_INTERVAL,
+    TRACE_RING_SIZE,
+    WATCHDOG_INTERVAL,
 )
 
 __all__ = [
@@ -20,4 +54,38 @@ __all__ = [
     "LIST_NO_RESTART",
     "REMOTE_SYSLOG",
     "PRINT_SYSLOG",
+    "REAPER_POLL_INTERVAL",
+    "REAPER_RETRY_DELAY",
+    "REAPER_ADOPT_GRACE",
+    "CONTROL_SOCKET",
+    "CONTROL_MAX_REQUEST",
+    "STOP_POLL_INTERVAL",
+    "BACKOFF_INITIAL",
+    "BACKOFF_MAX",
+    "BACKOFF_FACTOR",
+    "BACKOFF_JITTER",
+    "BACKOFF_RESET",
+    "CGROUP_NAME",
+    "CGROUP_CPU_PERIOD",
+    "WATCHDOG_INTERVAL",
+    "METRICS_HOST",
+    "TRACE_RING_SIZE",
+    "PROFILE_TOP",
+    "SAMPLE_INTERVAL",
+    "LAUNCH_WORKERS",
+    "EVENT_LOG_FILE",
+    "EVENT_FLUSH_INTERVAL",
+    "EVENT_BUFFER_BYTES",
+    "HISTORY_LIMIT",
+    "STATE_FILE",
+    "STATE_WRITE_DELAY",
+    "REEXEC_DELAY",
+    "LOG_ASYNC",
+    "LOG_QUEUE_SIZE",
+    "LOG_BATCH_SIZE",
+    "SAMPLE_EWMA_ALPHA",
+    "OUTPUT_BUFFER_KB",
+    "OUTPUT_READ_SIZE",
+    "LOG_BACKUPS",
+    "SOCKET_BACKLOG",
 ]
@@ -19,7 +19,24 @@ if not CONFIG_PATH.endswith("/"):
     CONFIG_PATH += "/"
 
 # lits of process for signal
-LIST_RESTART = ["command", "umask", "working_dir", "stdout", "stderr", "env"]
+LIST_RESTART = [
+    "command",
+    "umask",
+    "working_dir",
+    "stdout",
+    "stderr",
+    "env",
+    "log_max_bytes",
+    "log_rotate_interval",
+    "log_backups",
+    "log_compress",
+    "rlimits",
+    "nice",
+    "cpu_affinity",
+    "shell",
+    "process_group",
+    "sockets",
+]
 LIST_NO_RESTART = [
     "processes",
     "start_at_launch",
@@ -29,6 +46,19 @@ LIST_NO_RESTART = [
     "max_restarts",
     "stop_signal",
     "stop_timeout",
+    "restart_mode",
+    "batch_size",
+    "max_unavailable",
+    "backoff_initial",
+    "backoff_max",
+    "backoff_factor",
+    "backoff_jitter",
+    "backoff_reset",
+    "output_buffer",
+    "log_output",
+    "memory_limit",
+    "cpu_limit",
+    "max_memory",
 ]
 
 #  Log Server Variables
@@ -39,3 +69,117 @@ REMOTE_SYSLOG = ("127.0.0.1", 5514)
 #  Log Server Variables
 
 PRINT_SYSLOG = os.getenv("PRINT_SYSLOG", "False").lower() in ("true", "1", "t")
+
+#  Log Pipeline Variables
+
+# Records are written by a background thread (False: in the caller's thread)
+LOG_ASYNC = os.getenv("LOG_ASYNC", "True").lower() in ("true", "1", "t")
+# Records waiting for the writer before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+# Records handed to each handler per write
+LOG_BATCH_SIZE = 256
+
+#  Reaper Variables
+
+# Fallback wake-up interval (s) when SIGCHLD cannot be hooked (non-main thread)
+REAPER_POLL_INTERVAL = 1.0
+# Retry delay (s) when a reaped pid is not registered yet
+REAPER_RETRY_DELAY = 0.01
+# Time (s) an unknown zombie is left alone before the reaper collects it
+REAPER_ADOPT_GRACE = 1.0
+
+#  Event Log Variables
+
+# NDJSON stream of process lifecycle events ("event_log" in the config)
+EVENT_LOG_FILE = os.path.join(LOG_DIR, "events.ndjson")
+# Seconds between two writes + fsyncs of the pending events
+EVENT_FLUSH_INTERVAL = 1.0
+# Pending bytes that trigger a write before the interval
+EVENT_BUFFER_BYTES = 65536
+# Events listed by "history" (the counts cover all of them)
+HISTORY_LIMIT = 50
+
+#  State Snapshot Variables
+
+# JSON snapshot of the process table read by --adopt ("state_file" in the config)
+STATE_FILE = os.path.join(LOG_DIR, "state.json")
+# Seconds a batch of transitions is coalesced for before the snapshot is rewritten
+STATE_WRITE_DELAY = 0.1
+# Seconds between a reexec request and the exec, so that its reply goes out first
+REEXEC_DELAY = 0.2
+
+#  Startup Variables
+
+# Threads building and starting the programs of a fast start
+LAUNCH_WORKERS = 4
+
+#  Control Socket Variables
+
+# Unix socket of the control API, also the default of taskmasterctl
+CONTROL_SOCKET = os.getenv("TASKMASTER_SOCKET", "/tmp/taskmaster.sock")
+# Longest request line (bytes) accepted on the control socket
+CONTROL_MAX_REQUEST = 65536
+
+#  Stop Variables
+
+# Upper bound (s) between two checks of a stop batch
+STOP_POLL_INTERVAL = 0.05
+
+#  Restart Backoff Variables
+
+# Delay (s) before the first restart of a crashed process
+BACKOFF_INITIAL = 1.0
+# Upper bound (s) of the restart delay
+BACKOFF_MAX = 60.0
+# Growth factor of the delay between consecutive crashes
+BACKOFF_FACTOR = 2.0
+# Random spread applied to each delay, as a fraction of it
+BACKOFF_JITTER = 0.1
+# Uptime (s) after which a crash is no longer part of a crash loop
+BACKOFF_RESET = 60.0
+
+#  Resource Limit Variables
+
+# Directory of the per-program cgroups, under the cgroup v2 mount
+CGROUP_NAME = "taskmaster"
+# cpu.max period (us) used to turn cpu_limit into a quota
+CGROUP_CPU_PERIOD = 100000
+# Seconds between two max_memory checks of a program's processes
+WATCHDOG_INTERVAL = 5.0
+
+#  Metrics Variables
+
+# Host of the /metrics endpoint when metrics_address is only a port
+METRICS_HOST = "127.0.0.1"
+
+#  Tracer Variables
+
+# Spans kept in memory by the latency tracer (oldest dropped first)
+TRACE_RING_SIZE = 10000
+# Functions listed by "profile cpu" reports
+PROFILE_TOP = 25
+
+#  Resource Sampler Variables
+
+# Default seconds between two /proc sampling passes (0 disables sampling)
+SAMPLE_INTERVAL = 10.0
+# Weight of the newest sample in the per-process moving averages
+SAMPLE_EWMA_ALPHA = 0.3
+
+#  Output Capture Variables
+
+# Default size (KiB) of the in-memory output ring buffer of each process
+OUTPUT_BUFFER_KB = 64
+# Maximum bytes read from a child pipe per wake-up
+OUTPUT_READ_SIZE = 65536
+
+#  Log Writer Variables
+
+# Default number of rotated stdout/stderr files kept per output file
+LOG_BACKUPS = 5
+
+#  Socket Variables
+
+# Default accept queue length of the listeners of "sockets" (the kernel caps
+# it to net.core.somaxconn)
+SOCKET_BACKLOG = 1024
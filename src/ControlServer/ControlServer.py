@@ -0,0 +1,309 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import socket
+import threading
+
+from Constants import CONTROL_MAX_REQUEST, CONTROL_SOCKET
+from Logger import LOGGER as logger
+
+
+class ControlServer:
+    """
+    Unix-domain control socket served by an asyncio loop in its own thread.
+
+    The protocol is one JSON object per line in both directions, several
+    requests may be sent on the same connection:
+
+        -> {"cmd": "stop", "args": ["web", 2]}
+        <- {"ok": true, "result": "..."}      (text, or JSON data for
+                                               "status --json", "summary", "metrics",
+                                               "history --json")
+        <- {"ok": false, "error": "..."}
+
+    Any number of clients can be connected at once; the commands themselves
+    are run by a single worker thread, so a slow stop does not block the
+    event loop, and under the supervisor's command_lock, shared with the
+    terminal and the signal handlers: the supervisor state is never changed
+    by two commands concurrently, whatever their source.
+
+    Under the asyncio core the server runs on the supervisor's own loop
+    instead (startAsync), commands run inline one at a time behind a lock,
+    and the stopping ones await their stop batch.
+
+    Methods:
+        start(): Bind the socket and start serving.
+        stop(): Close the socket and stop the server thread.
+        startAsync(): Serve on the running event loop.
+        stopAsync(): Close the socket served by startAsync().
+        handle(request): Run one decoded request and return the response.
+        handleAsync(request): Same as handle(), awaiting the stopping commands.
+    """
+
+    def __init__(self, tm, path=CONTROL_SOCKET):
+        self.tm = tm
+        self.path = path
+        self.commands = {
+            "status": self._cmd_status,
+            "summary": self._cmd_summary,
+            "metrics": self._cmd_metrics,
+            "profile": self._cmd_profile,
+            "start": self._cmd_start,
+            "stop": self._cmd_stop,
+            "restart": self._cmd_restart,
+            "reload": self._cmd_reload,
+            "tail": self._cmd_tail,
+            "history": self._cmd_history,
+            "reexec": self._cmd_reexec,
+        }
+        self.async_commands = {
+            "stop": self._cmd_stop_async,
+            "restart": self._cmd_restart_async,
+            "reload": self._cmd_reload_async,
+        }
+        self._inline = False
+        self._lock = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="control"
+        )
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._removeStaleSocket()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._server is None:
+            self._thread = None
+            raise ValueError(f"Cannot serve control socket {self.path}")
+        logger.info(f"Control socket listening on {self.path}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self._executor.shutdown(wait=False)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def startAsync(self):
+        self._removeStaleSocket()
+        self._loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        self._inline = True
+        self._server = await self._serve()
+        logger.info(f"Control socket listening on {self.path}")
+
+    async def stopAsync(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _removeStaleSocket(self):
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Left behind by a supervisor that did not exit cleanly
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise ValueError(f"Control socket {self.path} is already in use")
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            logger.error(f"Control socket {self.path}: {e}")
+        self._ready.set()
+        if self._server is None:
+            self._loop.close()
+            return
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    async def _serve(self):
+        # Only the owner of the supervisor may control it. The file is
+        # restricted before listen(), nobody can connect in between, and the
+        # umask is left alone: it is process wide, other threads spawn
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.path)
+            os.chmod(self.path, 0o600)
+            return await asyncio.start_unix_server(
+                self._client, sock=sock, limit=CONTROL_MAX_REQUEST
+            )
+        except BaseException:
+            sock.close()
+            raise
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    response = {"ok": False, "error": "request too long"}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"ok": False, "error": "malformed request"}
+                else:
+                    response = await self._dispatch(request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request) -> dict:
+        if self._inline:
+            return await self.handleAsync(request)
+        return await self._loop.run_in_executor(self._executor, self.handle, request)
+
+    def handle(self, request) -> dict:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "malformed request"}
+        cmd = request.get("cmd")
+        args = request.get("args") or []
+        if cmd not in self.commands:
+            return {"ok": False, "error": f"Unknown command: {cmd}"}
+        try:
+            with self.tm.command_lock:
+                result = self.commands[cmd](*args)
+            return {"ok": True, "result": result}
+        except TypeError as e:
+            return {"ok": False, "error": f"{cmd}: bad arguments ({e})"}
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return {"ok": False, "error": str(e)}
+
+    async def handleAsync(self, request) -> dict:
+        async with self._lock:
+            handler = None
+            if isinstance(request, dict):
+                handler = self.async_commands.get(request.get("cmd"))
+            if handler is None:
+                return self.handle(request)
+            cmd = request["cmd"]
+            try:
+                return {
+                    "ok": True,
+                    "result": await handler(*(request.get("args") or [])),
+                }
+            except TypeError as e:
+                return {"ok": False, "error": f"{cmd}: bad arguments ({e})"}
+            except Exception as e:
+                logger.error(e, exc_info=True)
+                return {"ok": False, "error": str(e)}
+
+    def _cmd_status(self, *args):
+        # "--json" returns the records themselves instead of text lines
+        as_json = "--json" in args
+        args = [arg for arg in args if arg != "--json"]
+        program_name = args[0] if args else None
+        process_id = int(args[1]) if len(args) > 1 else None
+        if len(args) == 1 and self.tm.parsePid(args[0]):
+            program_name, process_id = None, self.tm.parsePid(args[0])
+        if as_json:
+            return self.tm.statusRecords(program_name, process_id)
+        return "\n".join(self.tm.statusLines(program_name, process_id))
+
+    def _cmd_summary(self, program_name=None):
+        return self.tm.summary(program_name)
+
+    def _cmd_metrics(self):
+        return self.tm.metrics()
+
+    def _cmd_profile(self, *args):
+        return "\n".join(self.tm.profile(args))
+
+    def _cmd_start(self, program_name):
+        self.tm.startProcess(program_name)
+        return f"{program_name}: started"
+
+    def _cmd_stop(self, program_name, index=None):
+        pid = self.tm.parsePid(program_name) if index is None else None
+        if pid:
+            self.tm.stopPid(pid)
+            return f"{pid}: stopped"
+        if index is not None:
+            index = int(index)
+        self.tm.stopProcess(program_name, index)
+        return f"{program_name}: stopped"
+
+    def _cmd_restart(self, program_name):
+        self.tm.restartProcess(program_name, cmd_terminal=True)
+        return f"{program_name}: restarted"
+
+    def _cmd_reload(self, *options):
+        plan = self.tm.reloadConfig(dry_run="--plan" in options)
+        return plan.summary() if plan is not None else "reloaded"
+
+    async def _cmd_stop_async(self, program_name, index=None):
+        pid = self.tm.parsePid(program_name) if index is None else None
+        if pid:
+            await self.tm.stopPidAsync(pid)
+            return f"{pid}: stopped"
+        if index is not None:
+            index = int(index)
+        await self.tm.stopProcessAsync(program_name, index)
+        return f"{program_name}: stopped"
+
+    async def _cmd_restart_async(self, program_name):
+        await self.tm.restartProcessAsync(program_name)
+        return f"{program_name}: restarted"
+
+    async def _cmd_reload_async(self, *options):
+        plan = await self.tm.reloadConfigAsync(dry_run="--plan" in options)
+        return plan.summary() if plan is not None else "reloaded"
+
+    def _cmd_history(self, *args):
+        as_json = "--json" in args
+        args = [arg for arg in args if arg != "--json"]
+        if not args:
+            raise TypeError("a program name is required")
+        since = args[1] if len(args) > 1 else None
+        if as_json:
+            return self.tm.history(args[0], since)
+        return "\n".join(self.tm.historyLines(args[0], since))
+
+    def _cmd_reexec(self):
+        self.tm.reexec()
+        return "re-executing"
+
+    def _cmd_tail(self, program_name, index=None):
+        if index is not None:
+            index = int(index)
+        return self.tm.tailProcess(program_name, index)
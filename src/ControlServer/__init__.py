@@ -0,0 +1,3 @@
+from .ControlServer import ControlServer
+
+__all__ = ["ControlServer"]
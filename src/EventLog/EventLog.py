@@ -0,0 +1,329 @@
+import atexit
+import collections
+import json
+import os
+import threading
+import time
+
+from Constants import EVENT_BUFFER_BYTES, EVENT_FLUSH_INTERVAL
+from Logger import LOGGER as logger
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parseDuration(value) -> float:
+    """Seconds of a duration such as 90, "90", "30m", "12h" or "2d"."""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip().lower()
+        unit = DURATION_UNITS.get(text[-1:]) if text else None
+        try:
+            seconds = float(text[:-1]) * unit if unit else float(text)
+        except ValueError:
+            raise ValueError(f"Invalid duration: {value}")
+    if seconds < 0:
+        raise ValueError(f"Invalid duration: {value}")
+    return seconds
+
+
+class _Block:
+    """One flushed run of lines: where it is and what it holds."""
+
+    __slots__ = ("offset", "length", "first", "last", "programs")
+
+    def __init__(self, offset, length, first, last, programs):
+        self.offset = offset
+        self.length = length
+        self.first = first
+        self.last = last
+        self.programs = programs
+
+    def asDict(self) -> dict:
+        return {
+            "offset": self.offset,
+            "length": self.length,
+            "first": self.first,
+            "last": self.last,
+            "programs": sorted(self.programs),
+        }
+
+    def absorb(self, block) -> bool:
+        """
+        Extend this block with the one right after it, as long as the two
+        fit in EVENT_BUFFER_BYTES: the index stays at about one entry per
+        EVENT_BUFFER_BYTES of events however often they are flushed.
+        """
+        if (
+            self.first is None
+            or block.first is None
+            or self.offset + self.length != block.offset
+            or self.length + block.length > EVENT_BUFFER_BYTES
+        ):
+            return False
+        self.length += block.length
+        self.last = block.last
+        self.programs |= block.programs
+        return True
+
+
+class EventLog:
+    """
+    Append-only newline-delimited JSON stream of process lifecycle events.
+
+    record() only serializes the event into an in-memory buffer; a flusher
+    thread appends the buffer to the file and fsyncs it every
+    EVENT_FLUSH_INTERVAL seconds, or sooner once EVENT_BUFFER_BYTES are
+    pending. Each block gets one line in the ``<file>.idx`` offset index:
+    its byte range, its first and last timestamps and the programs it
+    holds. A flush is merged into the last block (its index line is
+    rewritten) until that block reaches EVENT_BUFFER_BYTES, so a quiet
+    supervisor does not grow the index by one line per flush. A query only
+    reads the blocks that can match, so asking for one program's last hours
+    does not scan the whole file. An index behind the file (e.g. after a
+    crash) is completed from the file on open.
+
+    Methods:
+        open(path): Start writing to path (a no-op if already open there).
+        close(): Flush and close the files.
+        record(event, program, index, pid, **fields): Append one event.
+        flush(): Write the pending events now.
+        stream(program, since=None): Iterate over the events of a program,
+            oldest first, one block in memory at a time.
+        query(program, since=None, limit=None): The last `limit` events of
+            a program, oldest first.
+    """
+
+    def __init__(self):
+        self.path = None
+        self._file = None
+        self._index_file = None
+        self._blocks = []
+        self._tail_line = None
+        self._size = 0
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_programs = set()
+        self._pending_first = None
+        self._pending_last = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def indexPath(path: str) -> str:
+        return f"{path}.idx"
+
+    def open(self, path: str):
+        path = os.path.abspath(path)
+        if path == self.path:
+            return
+        self.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        self._blocks, clean = self._loadIndex(path)
+        self._index_file = open(self.indexPath(path), "a")
+        self._tail_line = None
+        self.path = path
+        self._catchUp(rewrite=not clean)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="event-log", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+        logger.info(f"Event log: {path}")
+
+    def close(self):
+        if self.path is None:
+            return
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+        self._file.close()
+        self._index_file.close()
+        self.path = None
+        atexit.unregister(self.close)
+
+    def _loadIndex(self, path) -> tuple:
+        blocks = []
+        clean = True
+        try:
+            with open(self.indexPath(path)) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        block = _Block(
+                            entry["offset"],
+                            entry["length"],
+                            entry["first"],
+                            entry["last"],
+                            set(entry["programs"]),
+                        )
+                    except (ValueError, KeyError, TypeError):
+                        # Torn by a crash, what follows is rebuilt from the file
+                        clean = False
+                        break
+                    if blocks and blocks[-1].absorb(block):
+                        # Written before blocks were merged: compacted below
+                        clean = False
+                    else:
+                        blocks.append(block)
+        except FileNotFoundError:
+            pass
+        if blocks and blocks[-1].offset + blocks[-1].length > self._size:
+            # The event file was truncated or replaced: index it again
+            logger.warning(f"Event index of {path} does not match it, rebuilding")
+            blocks = []
+            clean = False
+        return blocks, clean
+
+    def _catchUp(self, rewrite=False):
+        """Index the events written after the last indexed block."""
+        offset = (
+            self._blocks[-1].offset + self._blocks[-1].length if self._blocks else 0
+        )
+        if offset >= self._size:
+            if rewrite:
+                self._rewriteIndex()
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        if not data.endswith(b"\n"):
+            # Torn last line: terminate it so the next event starts clean
+            self._file.write(b"\n")
+            self._file.flush()
+            data += b"\n"
+            self._size += 1
+        block = None
+        for line in data.splitlines(keepends=True):
+            try:
+                event = json.loads(line)
+                ts, program = event["ts"], event["program"]
+            except (ValueError, KeyError, TypeError):
+                ts, program = None, None
+            if block is None:
+                block = _Block(offset, 0, ts, ts, set())
+            block.length += len(line)
+            if ts is not None:
+                block.first = ts if block.first is None else block.first
+                block.last = ts
+                block.programs.add(program)
+            offset += len(line)
+            if block.length >= EVENT_BUFFER_BYTES:
+                self._blocks.append(block)
+                block = None
+        if block is not None:
+            self._blocks.append(block)
+        self._rewriteIndex()
+
+    def _rewriteIndex(self):
+        self._index_file.seek(0)
+        self._index_file.truncate()
+        self._tail_line = None
+        for block in self._blocks:
+            if block.first is not None:
+                self._tail_line = self._index_file.tell()
+                self._index_file.write(json.dumps(block.asDict()) + "\n")
+        if self._blocks and self._blocks[-1].first is None:
+            self._tail_line = None
+        self._index_file.flush()
+
+    def record(self, event: str, program: str, index: int, pid: int, **fields):
+        if self.path is None:
+            return
+        now = time.time()
+        entry = {
+            "ts": round(now, 6),
+            "event": event,
+            "program": program,
+            "index": index,
+            "pid": pid,
+        }
+        entry.update(fields)
+        line = json.dumps(entry, separators=(",", ":"), default=str).encode() + b"\n"
+        with self._lock:
+            self._pending.append(line)
+            self._pending_bytes += len(line)
+            self._pending_programs.add(program)
+            if self._pending_first is None:
+                self._pending_first = now
+            self._pending_last = now
+            full = self._pending_bytes >= EVENT_BUFFER_BYTES
+        if full:
+            self._wakeup.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(EVENT_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Cannot write the event log {self.path}: {e}")
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                data = b"".join(self._pending)
+                block = _Block(
+                    self._size,
+                    len(data),
+                    round(self._pending_first, 6),
+                    round(self._pending_last, 6),
+                    self._pending_programs,
+                )
+                self._pending = []
+                self._pending_bytes = 0
+                self._pending_programs = set()
+                self._pending_first = self._pending_last = None
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size += len(data)
+            # Written after the data: an index is never ahead of its file
+            if self._tail_line is not None and self._blocks[-1].absorb(block):
+                self._index_file.seek(self._tail_line)
+                self._index_file.truncate()
+            else:
+                self._tail_line = self._index_file.tell()
+                self._blocks.append(block)
+            self._index_file.write(json.dumps(self._blocks[-1].asDict()) + "\n")
+            self._index_file.flush()
+
+    def query(self, program: str, since: float = None, limit: int = None) -> list:
+        return list(collections.deque(self.stream(program, since), maxlen=limit))
+
+    def stream(self, program: str, since: float = None):
+        if self.path is None:
+            return
+        self.flush()
+        with open(self.path, "rb") as f:
+            for block in list(self._blocks):
+                if program not in block.programs:
+                    continue
+                if since is not None and block.last < since:
+                    continue
+                f.seek(block.offset)
+                for line in f.read(block.length).splitlines():
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event.get("program") != program:
+                        continue
+                    if since is not None and event.get("ts", 0) < since:
+                        continue
+                    yield event
+
+
+EVENT_LOG = EventLog()
@@ -0,0 +1,3 @@
+from .EventLog import EVENT_LOG, EventLog, parseDuration
+
+__all__ = ["EventLog", "EVENT_LOG", "parseDuration"]
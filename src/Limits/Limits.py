@@ -0,0 +1,262 @@
+import json
+import os
+import resource
+import sys
+
+from Constants import CGROUP_CPU_PERIOD, CGROUP_NAME
+from Logger import LOGGER as logger
+
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+RLIMITS = {
+    "nofile": resource.RLIMIT_NOFILE,
+    "as": resource.RLIMIT_AS,
+    "nproc": resource.RLIMIT_NPROC,
+    "cpu": resource.RLIMIT_CPU,
+}
+
+# Run between fork and the program's exec when limits are set: the launcher
+# joins the cgroup and limits itself, then execs the program, which starts
+# with them already in place (the cgroup write is best effort, as attach())
+LAUNCHER = """\
+import json, os, resource, sys
+spec = json.loads(sys.argv[1])
+if spec["cgroup"]:
+    try:
+        with open(spec["cgroup"], "w") as procs:
+            procs.write(str(os.getpid()))
+    except OSError:
+        pass
+try:
+    if spec["nice"] is not None:
+        os.setpriority(os.PRIO_PROCESS, 0, spec["nice"])
+    if spec["cpu_affinity"]:
+        os.sched_setaffinity(0, spec["cpu_affinity"])
+    for rlimit, soft, hard in spec["rlimits"]:
+        resource.setrlimit(rlimit, (soft, hard))
+except (OSError, ValueError) as e:
+    sys.stderr.write(f"Cannot apply the limits: {e}\\n")
+    os._exit(126)
+try:
+    os.execv(sys.argv[2], sys.argv[3:])
+except OSError as e:
+    sys.stderr.write(f"{sys.argv[2]}: {e.strerror}\\n")
+    os._exit(127)
+"""
+
+
+def parseSize(value) -> int:
+    """Bytes from an int or a "512M" style string (K, M, G and T are powers of 1024)."""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid size: {value!r}")
+    if isinstance(value, int):
+        size = value
+    else:
+        text = str(value).strip().upper().removesuffix("B").removesuffix("I")
+        unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+        try:
+            size = int(float(text[: len(text) - len(unit)]) * SIZE_UNITS[unit])
+        except ValueError:
+            raise ValueError(f"Invalid size: {value!r}")
+    if size <= 0:
+        raise ValueError(f"Size must be positive: {value!r}")
+    return size
+
+
+def _parseRlimit(name, value) -> tuple:
+    values = value if isinstance(value, (list, tuple)) else (value, value)
+    if len(values) != 2:
+        raise ValueError(f"rlimit {name} must be a value or a [soft, hard] pair")
+    limits = []
+    for limit in values:
+        if limit in ("unlimited", "infinity", None):
+            limits.append(resource.RLIM_INFINITY)
+        elif name == "as":
+            limits.append(parseSize(limit))
+        else:
+            limits.append(int(limit))
+    soft, hard = limits
+    if hard != resource.RLIM_INFINITY and (
+        soft == resource.RLIM_INFINITY or soft > hard
+    ):
+        raise ValueError(f"rlimit {name}: soft limit above the hard limit")
+    return soft, hard
+
+
+class Limits:
+    """
+    Execution limits of a program's processes: rlimits, nice and CPU affinity.
+
+    subprocess has no way to run code between fork and exec other than a
+    Python preexec_fn, which would rule out vfork(). The program is exec'd
+    through a small launcher instead (launcherCommand), which sets the
+    limits on itself before its own exec, so they hold from the program's
+    first instruction on.
+
+    Args:
+        rlimits (dict): nofile, as, nproc and cpu, each a value or a
+                        [soft, hard] pair; "unlimited" lifts the limit.
+        nice (int): Scheduling priority, -20 to 19.
+        cpu_affinity (list): CPUs the processes may run on.
+
+    Raises:
+        ValueError: If an option is unknown or out of range.
+    """
+
+    def __init__(self, rlimits=None, nice=None, cpu_affinity=None):
+        self._rlimits = []
+        for name, value in (rlimits or {}).items():
+            if name not in RLIMITS:
+                raise ValueError(
+                    f"Unknown rlimit {name!r}, expected one of {', '.join(RLIMITS)}"
+                )
+            self._rlimits.append((RLIMITS[name], _parseRlimit(name, value)))
+        self._nice = None
+        if nice is not None:
+            self._nice = int(nice)
+            if not -20 <= self._nice <= 19:
+                raise ValueError("nice must be between -20 and 19")
+        self._cpu_affinity = None
+        if cpu_affinity is not None:
+            self._cpu_affinity = {int(cpu) for cpu in cpu_affinity}
+            if not self._cpu_affinity or min(self._cpu_affinity) < 0:
+                raise ValueError("cpu_affinity must list at least one CPU number")
+
+    def __bool__(self):
+        return bool(self._rlimits) or self._nice is not None or bool(self._cpu_affinity)
+
+    def launcherCommand(self, executable: str, argv: list, cgroup=None) -> list:
+        """
+        Command line that execs argv (executable being its resolved path)
+        with the limits set, after joining the cgroup.procs file `cgroup`
+        if given. It runs an isolated interpreter without site, which only
+        adds a few ms per spawn.
+        """
+        spec = {
+            "cgroup": cgroup,
+            "nice": self._nice,
+            "cpu_affinity": sorted(self._cpu_affinity or ()),
+            "rlimits": [[rlimit, *limits] for rlimit, limits in self._rlimits],
+        }
+        return [
+            sys.executable,
+            "-I",
+            "-S",
+            "-c",
+            LAUNCHER,
+            json.dumps(spec),
+            executable,
+            *argv,
+        ]
+
+
+def _cgroupMount():
+    try:
+        with open("/proc/self/mounts") as mounts:
+            for line in mounts:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == "cgroup2":
+                    return fields[1]
+    except OSError:
+        pass
+    return None
+
+
+class Cgroup:
+    """
+    cgroup v2 group of one program, under <cgroup2 mount>/taskmaster/<name>.
+
+    memory_limit and cpu_limit apply to all the processes of the program
+    together. When there is no cgroup v2 hierarchy, or it lacks the memory
+    or cpu controller (e.g. hybrid hosts that keep them on v1), the limits
+    are skipped with a warning.
+
+    Methods:
+        setup(memory_limit, cpu_limit): Create the group and write its limits.
+        attach(pid): Move a process into the group.
+        procs: cgroup.procs file that new processes join, None when inactive.
+        remove(): Delete the group once its processes are gone.
+    """
+
+    def __init__(self, name, mount=None):
+        self._mount = mount if mount is not None else _cgroupMount()
+        self.path = None
+        if self._mount:
+            self.path = os.path.join(self._mount, CGROUP_NAME, name)
+        self.active = False
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, "w") as control:
+            control.write(value)
+
+    def _controllers(self) -> set:
+        with open(os.path.join(self._mount, "cgroup.controllers")) as controllers:
+            return set(controllers.read().split())
+
+    def setup(self, memory_limit=None, cpu_limit=None) -> bool:
+        """Create the group and write its limits, False when they cannot be applied."""
+        needed = set()
+        if memory_limit is not None or self.active:
+            needed.add("memory")
+        if cpu_limit is not None or self.active:
+            needed.add("cpu")
+        if not needed:
+            return False
+        if self.path is None:
+            logger.warning("cgroup v2 is not mounted, skipping memory/cpu limits")
+            return False
+        try:
+            missing = needed - self._controllers()
+            if missing:
+                logger.warning(
+                    f"cgroup v2 controllers {', '.join(sorted(missing))} are not "
+                    "available, skipping memory/cpu limits"
+                )
+                return False
+            os.makedirs(self.path, exist_ok=True)
+            enable = " ".join(f"+{controller}" for controller in sorted(needed))
+            for directory in (self._mount, os.path.dirname(self.path)):
+                self._write(os.path.join(directory, "cgroup.subtree_control"), enable)
+            if "memory" in needed:
+                self._write(
+                    os.path.join(self.path, "memory.max"),
+                    "max" if memory_limit is None else str(memory_limit),
+                )
+            if "cpu" in needed:
+                quota = (
+                    "max"
+                    if cpu_limit is None
+                    else str(max(1000, int(cpu_limit * CGROUP_CPU_PERIOD)))
+                )
+                self._write(
+                    os.path.join(self.path, "cpu.max"), f"{quota} {CGROUP_CPU_PERIOD}"
+                )
+        except OSError as e:
+            logger.warning(f"Cannot set up cgroup {self.path}: {e}")
+            return False
+        self.active = True
+        return True
+
+    @property
+    def procs(self):
+        if not self.active:
+            return None
+        return os.path.join(self.path, "cgroup.procs")
+
+    def attach(self, pid):
+        if not self.active:
+            return
+        try:
+            self._write(os.path.join(self.path, "cgroup.procs"), str(pid))
+        except OSError as e:
+            # The process may already be gone
+            logger.debug("Cannot move PID %s into %s: %s", pid, self.path, e)
+
+    def remove(self):
+        if not self.active:
+            return
+        self.active = False
+        try:
+            os.rmdir(self.path)
+        except OSError as e:
+            logger.debug("Cannot remove cgroup %s: %s", self.path, e)
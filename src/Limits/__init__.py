@@ -0,0 +1,3 @@
+from .Limits import Cgroup, Limits, parseSize
+
+__all__ = ["Cgroup", "Limits", "parseSize"]
@@ -0,0 +1,186 @@
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+from Logger import LOGGER as logger
+
+# Suffix given by _rotate(): <path>.<timestamp>[-n], then .gz once compressed
+ROTATED_SUFFIX = re.compile(r"\.\d{8}-\d{6}(-\d+)?(\.gz)?")
+
+
+class LogWriter:
+    """
+    Append-only output file shared by every process writing to the same path.
+
+    The file is opened once and its fd is reused across restarts. When a
+    rotation policy is set (max_bytes and/or rotate_interval), the data is
+    written through write() so the file can be rotated; otherwise the fd is
+    handed to the children directly and the supervisor never copies data.
+
+    Rotated files are renamed to `<path>.<timestamp>`, optionally gzipped in
+    the background, and only the newest `backups` of them are kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        rotate_interval: int = 0,
+        backups: int = 5,
+        compress: bool = False,
+        compressor=None,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compress = compress
+        self._compressor = compressor
+        self._lock = threading.Lock()
+        self._fd = None
+        self._size = 0
+        self._next_rotate = None
+        self._open()
+
+    @property
+    def rotates(self) -> bool:
+        return bool(self.max_bytes or self.rotate_interval)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        if self.rotate_interval:
+            self._next_rotate = time.time() + self.rotate_interval
+
+    def write(self, data: bytes):
+        with self._lock:
+            if self._fd is None:
+                return
+            if self._shouldRotate(len(data)):
+                self._rotate()
+            os.write(self._fd, data)
+            self._size += len(data)
+
+    def _shouldRotate(self, incoming: int) -> bool:
+        if self.max_bytes and self._size and self._size + incoming > self.max_bytes:
+            return True
+        if self._next_rotate is not None and time.time() >= self._next_rotate:
+            return True
+        return False
+
+    def _rotate(self):
+        os.close(self._fd)
+        rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+        try:
+            os.rename(self.path, rotated)
+        except FileNotFoundError:
+            rotated = None
+        self._open()
+        if rotated and self.compress and self._compressor is not None:
+            self._compressor.put((rotated, self))
+        else:
+            self.prune()
+
+    def prune(self):
+        """Delete the oldest rotated files beyond `backups`."""
+        directory, name = os.path.split(self.path)
+        rotated = []
+        # Only our own rotations: other files named after the log are kept
+        for entry in os.listdir(directory or "."):
+            if entry.startswith(name) and ROTATED_SUFFIX.fullmatch(entry[len(name) :]):
+                rotated.append(os.path.join(directory, entry))
+        rotated.sort(key=os.path.getmtime)
+        for old in rotated[: max(len(rotated) - self.backups, 0)]:
+            try:
+                os.unlink(old)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class LogWriterPool:
+    """
+    Reference-counted pool of LogWriter, one per output path.
+
+    Every program instance writing to the same path shares a single writer,
+    and a restart reuses it instead of opening the file again, so the number
+    of open log fds is bounded by the number of distinct paths in use.
+
+    Methods:
+        acquire(path, **policy): Get (or open) the writer for a path.
+        release(path): Drop a reference, the file is closed at zero.
+    """
+
+    def __init__(self):
+        self._writers = {}
+        self._refs = {}
+        self._lock = threading.Lock()
+        self._compress_queue = None
+
+    def acquire(self, path: str, **policy) -> LogWriter:
+        path = os.path.abspath(os.path.expanduser(path))
+        with self._lock:
+            writer = self._writers.get(path)
+            if writer is None:
+                if policy.get("compress"):
+                    policy["compressor"] = self._compressor()
+                writer = self._writers[path] = LogWriter(path, **policy)
+                self._refs[path] = 0
+            self._refs[path] += 1
+            return writer
+
+    def release(self, path: str):
+        path = os.path.abspath(os.path.expanduser(path))
+        with self._lock:
+            if path not in self._refs:
+                return
+            self._refs[path] -= 1
+            if self._refs[path] > 0:
+                return
+            del self._refs[path]
+            writer = self._writers.pop(path)
+        writer.close()
+
+    def __len__(self) -> int:
+        return len(self._writers)
+
+    def _compressor(self) -> queue.Queue:
+        if self._compress_queue is None:
+            self._compress_queue = queue.Queue()
+            threading.Thread(target=self._compressLoop, daemon=True).start()
+        return self._compress_queue
+
+    def _compressLoop(self):
+        while True:
+            rotated, writer = self._compress_queue.get()
+            try:
+                with open(rotated, "rb") as src, gzip.open(
+                    rotated + ".gz", "wb"
+                ) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.unlink(rotated)
+                writer.prune()
+            except Exception as e:
+                logger.error(f"Could not compress {rotated}: {e}", exc_info=True)
+
+
+LOG_WRITERS = LogWriterPool()
@@ -0,0 +1,3 @@
+from .LogWriter import LOG_WRITERS, LogWriter, LogWriterPool
+
+__all__ = ["LogWriter", "LogWriterPool", "LOG_WRITERS"]
@@ -0,0 +1,183 @@
+import collections
+import logging
+import threading
+
+from Constants import LOG_BATCH_SIZE, LOG_QUEUE_SIZE
+
+from .LazyHandlers import LazyFileHandler
+
+# Targets written a whole batch at a time: their emit() is only a format,
+# write and flush (LazyFileHandler only changes _open). Other subclasses
+# (rotation, watched files...) do more per record and go through handle()
+BATCHED_HANDLERS = (logging.StreamHandler, logging.FileHandler, LazyFileHandler)
+
+
+class AsyncHandler(logging.Handler):
+    """
+    Hands the records to a background writer instead of emitting them in
+    the caller's thread.
+
+    The caller only merges the message arguments and appends to a bounded
+    deque, without taking a lock: when the queue is full the record is
+    dropped and counted. One writer thread
+    drains the queue in batches and gives each batch to every target
+    handler at once, so a stream or file handler does a single write and
+    flush per batch, and a slow disk or syslog socket only delays the writer.
+
+    Attributes:
+        targets (list): Handlers fed by the writer.
+        dropped (int): Records dropped because the queue was full.
+        overflows (int): Times the queue filled up.
+
+    Methods:
+        addTarget(handler): Add a handler fed by the writer.
+        flush(): Block until every queued record is written.
+        close(): Flush, then stop the writer.
+    """
+
+    def __init__(self, size=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE):
+        super().__init__()
+        self.targets = []
+        self.dropped = 0
+        self.overflows = 0
+        self._size = size
+        self._batch_size = batch_size
+        self._queue = collections.deque()
+        self._wakeup = threading.Event()
+        self._full = False
+        self._closed = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def addTarget(self, handler):
+        self.targets.append(handler)
+
+    def handle(self, record):
+        # No handler lock: the deque append is atomic
+        if self.filter(record):
+            self.emit(record)
+            return True
+        return False
+
+    def emit(self, record):
+        if self._closed:
+            # Late records, e.g. from finalizers at exit, are written inline
+            self._write([record])
+            return
+        if len(self._queue) >= self._size:
+            self.dropped += 1
+            if not self._full:
+                self._full = True
+                self.overflows += 1
+            return
+        # Merged here: the arguments may be changed by the caller meanwhile
+        record.msg = record.getMessage()
+        record.args = None
+        self._queue.append(record)
+        if self._thread is None:
+            self._start()
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            queue = self._queue
+            while queue:
+                batch = []
+                waiters = []
+                while queue and len(batch) < self._batch_size:
+                    item = queue.popleft()
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                self._write(batch)
+                for waiter in waiters:
+                    waiter.set()
+            if self._full:
+                self._full = False
+                self._write([self._droppedRecord()])
+            if self._closed:
+                return
+
+    def _droppedRecord(self):
+        return logging.makeLogRecord(
+            {
+                "name": "taskmaster.log",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": "Log queue full, %d records dropped so far",
+                "args": (self.dropped,),
+            }
+        )
+
+    def _write(self, batch):
+        for handler in self.targets:
+            records = [
+                record
+                for record in batch
+                if record.levelno >= handler.level and handler.filter(record)
+            ]
+            if not records:
+                continue
+            if type(handler) in BATCHED_HANDLERS:
+                self._writeStream(handler, records)
+            else:
+                for record in records:
+                    handler.handle(record)
+
+    @staticmethod
+    def _writeStream(handler, records):
+        parts = []
+        for record in records:
+            try:
+                parts.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not parts:
+            return
+        handler.acquire()
+        try:
+            if handler.stream is None:
+                # FileHandler opened on the first record
+                handler.stream = handler._open()
+            handler.stream.write("".join(parts))
+            handler.stream.flush()
+        except Exception:
+            handler.handleError(records[-1])
+        finally:
+            handler.release()
+
+    def flush(self):
+        thread = self._thread
+        if (
+            thread is None
+            or thread is threading.current_thread()
+            or not thread.is_alive()
+        ):
+            return
+        done = threading.Event()
+        # Past the size bound on purpose, a flush is never dropped
+        self._queue.append(done)
+        self._wakeup.set()
+        done.wait()
+
+    def close(self):
+        self.flush()
+        self._closed = True
+        thread = self._thread
+        if thread is not None:
+            self._wakeup.set()
+            if thread is not threading.current_thread():
+                thread.join()
+        super().close()
@@ -0,0 +1,45 @@
+import logging
+import os
+import sys
+from logging.handlers import SysLogHandler
+
+
+class LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates its directory and file on the first record."""
+
+    def __init__(self, filename, mode="a", encoding=None):
+        super().__init__(filename, mode, encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class LazySysLogHandler(SysLogHandler):
+    """
+    SysLogHandler that resolves and connects on the first record instead of
+    at import time. If the server cannot be reached then, the handler turns
+    itself off instead of failing on every record.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._connected = False
+        super().__init__(*args, **kwargs)
+
+    def createSocket(self):
+        if self._connected:
+            super().createSocket()
+
+    def emit(self, record):
+        if not self._connected:
+            self._connected = True
+            try:
+                self.createSocket()
+            except OSError as e:
+                self.setLevel(logging.CRITICAL + 1)
+                print(
+                    f"Could not connect to the syslog server {self.address}: {e}",
+                    file=sys.stderr,
+                )
+                return
+        super().emit(record)
@@ -2,10 +2,10 @@ import logging
 import os
 import socket
 import sys
-from logging.handlers import SysLogHandler
 
 from Constants import (
     APP_NAME,
+    LOG_ASYNC,
     LOG_DIR,
     LOG_FILE,
     LOG_LEVEL,
@@ -13,11 +13,10 @@ from Constants import (
     REMOTE_SYSLOG,
 )
 
+from .AsyncHandler import AsyncHandler
 from .CleanFormater import CleanFormatter
 from .LastFrameFormatter import LastFrameFormatter
-
-# 🔹 Ensure log directory exists
-os.makedirs(LOG_DIR, exist_ok=True)
+from .LazyHandlers import LazyFileHandler, LazySysLogHandler
 
 log_string = "[%(asctime)-19s] [%(filename)-20s %(funcName)-20s %(lineno)-4d] %(levelname)-7s - %(message)s"
 datefmt = "%Y-%m-%d %H:%M:%S"
@@ -30,6 +29,11 @@ class Logger:
       - File in LOG_DIR
       - Local Syslog (if available)
       - Remote Syslog server (if configured)
+
+    The log directory, the file and the syslog sockets are only created
+    when the first record is written, so importing the logger stays cheap.
+    Unless LOG_ASYNC is off, the handlers are fed by an AsyncHandler so
+    that logging never blocks the caller on a slow disk or socket.
     """
 
     _loggers = {}
@@ -51,6 +55,7 @@ class Logger:
 
         # Only add handlers once per logger
         if not logger.handlers:
+            handlers = []
             # Console Handler
             clean_formatter = CleanFormatter(log_string, datefmt=datefmt)
             formatter = LastFrameFormatter(log_string, datefmt=datefmt)
@@ -58,24 +63,24 @@ class Logger:
                 stream_handler = logging.StreamHandler(sys.stdout)
                 stream_handler.setLevel(LOG_LEVEL)
                 stream_handler.setFormatter(formatter)
-                logger.addHandler(stream_handler)
+                handlers.append(stream_handler)
             # File Handler
-            file_handler = logging.FileHandler(os.path.join(LOG_DIR, LOG_FILE))
+            file_handler = LazyFileHandler(os.path.join(LOG_DIR, LOG_FILE))
             file_handler.setLevel(LOG_LEVEL)
 
             # I don't need ASCII code when writing to a file
             file_handler.setFormatter(clean_formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
 
             # Local Syslog Handler
             syslog_handler = None
             try:
                 # Try UNIX socket (typical Linux /dev/log)
                 if os.path.exists("/dev/log"):
-                    syslog_handler = SysLogHandler(address="/dev/log")
+                    syslog_handler = LazySysLogHandler(address="/dev/log")
                 else:
                     # Fallback: UDP to localhost:514 or 5514 if no /dev/log
-                    syslog_handler = SysLogHandler(
+                    syslog_handler = LazySysLogHandler(
                         address=("localhost", 514), socktype=socket.SOCK_DGRAM
                     )
             except (FileNotFoundError, PermissionError, OSError):
@@ -85,24 +90,31 @@ class Logger:
                 syslog_handler.setLevel(LOG_LEVEL)
                 syslog_formatter = CleanFormatter(log_string, datefmt=datefmt)
                 syslog_handler.setFormatter(syslog_formatter)
-                logger.addHandler(syslog_handler)
+                handlers.append(syslog_handler)
 
             # Remote Syslog Server Handler (optional)
             if remote_syslog_server:
                 try:
-                    remote_handler = SysLogHandler(
+                    remote_handler = LazySysLogHandler(
                         address=remote_syslog_server, socktype=socket.SOCK_DGRAM
                     )
                     remote_handler.setLevel(LOG_LEVEL)
                     remote_formatter = CleanFormatter(log_string, datefmt=datefmt)
                     remote_handler.setFormatter(remote_formatter)
-                    logger.addHandler(remote_handler)
+                    handlers.append(remote_handler)
                 except Exception as e:
                     print(
                         f"Could not connect to the remote syslog server {remote_syslog_server}: {e}"
                     )
 
-            # Add Console and File Handlers (always last)
+            if LOG_ASYNC:
+                pipeline = AsyncHandler()
+                for handler in handlers:
+                    pipeline.addTarget(handler)
+                logger.addHandler(pipeline)
+            else:
+                for handler in handlers:
+                    logger.addHandler(handler)
 
         Logger._loggers[name] = logger
         return logger
@@ -111,6 +123,8 @@ class Logger:
 # 🔹 Global logger instance (local syslog + console + file)
 # LOGGER = Logger.get_logger(APP_NAME)
 LOGGER = Logger.get_logger(APP_NAME, remote_syslog_server=REMOTE_SYSLOG)
+# Its background pipeline, None when LOG_ASYNC is off
+LOG_PIPELINE = next((h for h in LOGGER.handlers if isinstance(h, AsyncHandler)), None)
 
 # 🔹 Simple test
 if __name__ == "__main__":
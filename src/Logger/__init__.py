@@ -1,3 +1,4 @@
-from .Logger import LOGGER
+from .AsyncHandler import AsyncHandler
+from .Logger import LOG_PIPELINE, LOGGER
 
-__all__ = ["LOGGER"]
+__all__ = ["LOGGER", "LOG_PIPELINE", "AsyncHandler"]
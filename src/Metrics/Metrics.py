@@ -0,0 +1,195 @@
+import bisect
+import math
+
+
+def _formatValue(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatLabels(names, values, extra="") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Counter:
+    """
+    Monotonic value per combination of label values.
+
+    Updates are a plain dict write with no lock of their own: every series
+    is written from the supervisor's spawn, reap and command paths, which
+    already run one at a time, and a scrape only takes a copy of the dict.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        for labels, value in list(self._values.items()):
+            yield self.name, _formatLabels(self.labels, labels), value
+
+
+class Gauge(Counter):
+    """Value that can go up and down, per combination of label values."""
+
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets, per combination
+    of label values. Same locking rules as Counter.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+
+    def observe(self, value, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            # Per-bucket counts, then sum and count
+            series = self._values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels):
+        series = self._values.get(labels)
+        return series[-1] if series else 0
+
+    def samples(self):
+        for labels, series in list(self._values.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    _formatLabels(self.labels, labels, f'le="{_formatValue(bound)}"'),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", _formatLabels(self.labels, labels), series[-2]
+            yield f"{self.name}_count", _formatLabels(self.labels, labels), series[-1]
+
+
+class MetricsRegistry:
+    """
+    The supervisor's metrics, rendered in the Prometheus text format.
+
+    Metrics that already exist elsewhere (per-state process counts, the
+    resource sampler totals) are not duplicated: collectors build them at
+    scrape time from those sources.
+
+    Methods:
+        counter(name, help_text, labels): Register a Counter.
+        gauge(name, help_text, labels): Register a Gauge.
+        histogram(name, help_text, labels, buckets): Register a Histogram.
+        addCollector(callback): callback() returns extra metrics per scrape.
+        removeCollector(callback): Stop calling a collector.
+        render(): Every metric in the text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=()) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def addCollector(self, callback):
+        self._collectors.append(callback)
+
+    def removeCollector(self, callback):
+        if callback in self._collectors:
+            self._collectors.remove(callback)
+
+    def render(self) -> str:
+        metrics = list(self._metrics)
+        for collector in list(self._collectors):
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_formatValue(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+METRICS = MetricsRegistry()
+
+SPAWNS = METRICS.counter("taskmaster_spawns_total", "Processes started.", ("program",))
+RESTARTS = METRICS.counter(
+    "taskmaster_restarts_total",
+    "Automatic restarts of crashed processes.",
+    ("program",),
+)
+EXITS = METRICS.counter(
+    "taskmaster_exits_total",
+    "Process exits by exit code (negative: killed by that signal).",
+    ("program", "code"),
+)
+SPAWN_SECONDS = METRICS.histogram(
+    "taskmaster_spawn_seconds",
+    "Time taken by fork/exec of a process.",
+    ("program",),
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+STOP_SECONDS = METRICS.histogram(
+    "taskmaster_stop_seconds",
+    "Time between stop_signal and the process exit.",
+    ("program",),
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+MONITOR_LAG_SECONDS = METRICS.histogram(
+    "taskmaster_monitor_lag_seconds",
+    "Delay of the success_timeout check past its deadline.",
+    ("program",),
+    (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+RELOAD_SECONDS = METRICS.histogram(
+    "taskmaster_reload_seconds",
+    "Duration of configuration reloads.",
+    (),
+    (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0),
+)
@@ -0,0 +1,91 @@
+import atexit
+import http.server
+import threading
+
+from Constants import METRICS_HOST
+from Logger import LOGGER as logger
+
+from .Metrics import METRICS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per scrape would flood the supervisor log
+        pass
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint serving GET /metrics for Prometheus.
+
+    Requests are served from their own threads and only read the registry,
+    they never take the reaper lock: a scrape cannot delay supervision,
+    whatever the number of processes.
+
+    Methods:
+        start(): Bind the address and start serving.
+        stop(): Close the socket and stop the server thread.
+    """
+
+    def __init__(self, address, registry=METRICS):
+        self.host, self.port = self.parseAddress(address)
+        self._handler = type(
+            "MetricsHandler", (_MetricsHandler,), {"registry": registry}
+        )
+        self._server = None
+        self._thread = None
+
+    @staticmethod
+    def parseAddress(address) -> tuple:
+        """(host, port) from a port number or "host:port"."""
+        host, port = METRICS_HOST, address
+        if isinstance(address, str) and ":" in address:
+            host, port = address.rsplit(":", 1)
+        try:
+            port = int(port)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid metrics address: {address!r}")
+        return host.strip("[]"), port
+
+    def start(self):
+        if self._thread is not None:
+            return
+        try:
+            self._server = http.server.ThreadingHTTPServer(
+                (self.host, self.port), self._handler
+            )
+        except OSError as e:
+            raise ValueError(f"Cannot serve metrics on {self.host}:{self.port}: {e}")
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True, name="metrics"
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._thread = None
+        self._server = None
+        atexit.unregister(self.stop)
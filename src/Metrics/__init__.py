@@ -0,0 +1,41 @@
+from .Metrics import (
+    EXITS,
+    METRICS,
+    MONITOR_LAG_SECONDS,
+    RELOAD_SECONDS,
+    RESTARTS,
+    SPAWN_SECONDS,
+    SPAWNS,
+    STOP_SECONDS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsServer",
+    "METRICS",
+    "SPAWNS",
+    "RESTARTS",
+    "EXITS",
+    "SPAWN_SECONDS",
+    "STOP_SECONDS",
+    "MONITOR_LAG_SECONDS",
+    "RELOAD_SECONDS",
+]
+
+
+def __getattr__(name):
+    # http.server is only imported once a metrics endpoint is configured
+    if name == "MetricsServer":
+        from .MetricsServer import MetricsServer
+
+        # Replaces the submodule, which the import bound to the same name
+        globals()[name] = MetricsServer
+        return MetricsServer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
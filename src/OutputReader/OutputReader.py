@@ -0,0 +1,116 @@
+import atexit
+import os
+import selectors
+import threading
+
+from Constants import OUTPUT_READ_SIZE
+from Logger import LOGGER as logger
+
+
+class OutputReader:
+    """
+    Single selector-based thread draining every captured child pipe.
+
+    Children whose stdout/stderr are not redirected to a file write into a
+    pipe that is registered here. The reader never blocks on a pipe: each
+    readable fd is read once per wake-up and the data is appended to the
+    process' RingBuffer and passed to the optional sinks (callables taking
+    the bytes read), so a chatty child can never fill its pipe and stall.
+
+    Methods:
+        start(): Start the reader thread.
+        stop(): Stop the reader thread.
+        register(stream, ring, sinks=()): Drain a pipe into a ring buffer.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+        logger.info("Started output reader thread.")
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        atexit.unregister(self.stop)
+        self._wake()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _wake(self):
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def register(self, stream, ring, sinks=()):
+        os.set_blocking(stream.fileno(), False)
+        with self._lock:
+            self._selector.register(
+                stream.fileno(), selectors.EVENT_READ, (stream, ring, tuple(sinks))
+            )
+        self._wake()
+        self.start()
+
+    def _unregister(self, fd, stream):
+        with self._lock:
+            self._selector.unregister(fd)
+        stream.close()
+
+    def _loop(self):
+        while self._running:
+            try:
+                events = self._selector.select()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+                continue
+            for key, _ in events:
+                if key.data is None:
+                    self._clearWakeup()
+                    continue
+                self._handleReadable(key.fd, *key.data)
+
+    def _clearWakeup(self):
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _handleReadable(self, fd, stream, ring, sinks):
+        try:
+            data = os.read(fd, OUTPUT_READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.debug("Output pipe %s failed: %s", fd, e)
+            data = b""
+        if not data:
+            self._unregister(fd, stream)
+            return
+        ring.write(data)
+        for sink in sinks:
+            try:
+                sink(data)
+            except Exception as e:
+                logger.error(e, exc_info=True)
+
+
+OUTPUT_READER = OutputReader()
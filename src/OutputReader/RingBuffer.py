@@ -0,0 +1,59 @@
+import threading
+
+
+class RingBuffer:
+    """
+    Fixed-size byte buffer that keeps only the last `capacity` bytes written.
+
+    Writes are two slice copies at most, no matter how much data has been
+    written before, so a chatty process costs a bounded amount of memory.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("RingBuffer capacity must be positive")
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        self._pos = 0
+        self._full = False
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def write(self, data: bytes):
+        with self._lock:
+            self._write(data)
+
+    def _write(self, data: bytes):
+        size = len(data)
+        if size >= self._capacity:
+            self._buffer[:] = data[-self._capacity :]
+            self._pos = 0
+            self._full = True
+            return
+        end = self._pos + size
+        if end <= self._capacity:
+            self._buffer[self._pos : end] = data
+        else:
+            split = self._capacity - self._pos
+            self._buffer[self._pos :] = data[:split]
+            self._buffer[: size - split] = data[split:]
+        if end >= self._capacity:
+            self._full = True
+        self._pos = end % self._capacity
+
+    def read(self) -> bytes:
+        with self._lock:
+            if not self._full:
+                return bytes(self._buffer[: self._pos])
+            return bytes(self._buffer[self._pos :] + self._buffer[: self._pos])
+
+    def clear(self):
+        with self._lock:
+            self._pos = 0
+            self._full = False
+
+    def __len__(self) -> int:
+        return self._capacity if self._full else self._pos
@@ -0,0 +1,4 @@
+from .OutputReader import OUTPUT_READER, OutputReader
+from .RingBuffer import RingBuffer
+
+__all__ = ["OutputReader", "OUTPUT_READER", "RingBuffer"]
@@ -0,0 +1,68 @@
+import os
+import select
+
+# Exit code reported for an adopted process that is not our child: only its
+# parent may read the real status, all that is known is that it is gone
+UNKNOWN_EXIT_CODE = 255
+
+
+class AdoptedProcess:
+    """
+    Popen stand-in for a process started by a previous supervisor and taken
+    over from a state snapshot.
+
+    After an in-place re-exec the process is still our child and is polled
+    with waitpid() like a Popen. After a full restart it has been reparented
+    (to init or a subreaper), so its exit is watched through a pidfd instead,
+    which the reaper selects on since no SIGCHLD will come; its exit code is
+    then UNKNOWN_EXIT_CODE.
+
+    Attributes:
+        pid (int): PID of the process.
+        returncode (int): Exit code once known, None while it runs.
+        stdout, stderr: Inherited output pipes, or None.
+        pidfd (int): pidfd watched by the reaper, None for our own children.
+    """
+
+    def __init__(self, pid, stdout=None, stderr=None, returncode=None):
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = returncode
+        self.pidfd = None
+        if returncode is not None:
+            return
+        try:
+            finished, status = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            # Raises ProcessLookupError if the PID is already gone
+            self.pidfd = os.pidfd_open(pid)
+            return
+        if finished:
+            self.returncode = os.waitstatus_to_exitcode(status)
+
+    def poll(self):
+        if self.returncode is not None:
+            return self.returncode
+        if self.pidfd is None:
+            try:
+                finished, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                finished, status = self.pid, None
+            if finished:
+                self.returncode = (
+                    UNKNOWN_EXIT_CODE
+                    if status is None
+                    else os.waitstatus_to_exitcode(status)
+                )
+        else:
+            # A pidfd becomes readable once its process has exited
+            poller = select.poll()
+            poller.register(self.pidfd, select.POLLIN)
+            if poller.poll(0):
+                # The pidfd itself is closed by the reaper when it lets go
+                self.returncode = UNKNOWN_EXIT_CODE
+        return self.returncode
+
+    def __repr__(self):
+        return f"AdoptedProcess(pid={self.pid}, returncode={self.returncode})"
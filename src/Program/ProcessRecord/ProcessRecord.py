@@ -0,0 +1,190 @@
+import enum
+
+
+class ProcessState(enum.IntEnum):
+    """Lifecycle state of one process instance."""
+
+    STARTING = 0
+    RUNNING = 1
+    BACKOFF = 2
+    STOPPING = 3
+    STOPPED = 4
+    EXITED = 5
+    CLOSED = 6
+
+    def __str__(self):
+        return self.name.lower()
+
+
+# States in which the process is alive and may be signalled
+ALIVE_STATES = frozenset((ProcessState.STARTING, ProcessState.RUNNING))
+
+
+class ProcessRecord:
+    """
+    Everything the supervisor tracks about one process instance.
+
+    Slotted so that thousands of instances cost a few pointers each instead
+    of a dict per process, and every field is a plain attribute read.
+    """
+
+    __slots__ = (
+        "index",
+        "popen",
+        "pid",
+        "state",
+        "start_time",
+        "restarts",
+        "exit_code",
+        "successful",
+        "writers",
+        "startup_timer",
+        "kill_timer",
+        "backoff_timer",
+        "backoff",
+        "replace",
+        "recycled",
+        "killed",
+        "stop_time",
+        "stop_requested",
+        "stop_signal_used",
+        "proc_start",
+    )
+
+    def __init__(self, index, popen, writers=(None, None), start_time=None):
+        self.index = index
+        self.popen = popen
+        self.pid = popen.pid
+        self.state = ProcessState.STARTING
+        self.start_time = start_time
+        self.restarts = 0
+        self.exit_code = None
+        self.successful = None
+        self.writers = writers
+        self.startup_timer = None
+        self.kill_timer = None
+        self.backoff_timer = None
+        self.backoff = 0
+        self.replace = False
+        self.recycled = False
+        self.killed = False
+        self.stop_time = None
+        self.stop_requested = None
+        self.stop_signal_used = None
+        self.proc_start = None
+
+    def __repr__(self):
+        return f"ProcessRecord(index={self.index}, pid={self.pid}, state={self.state})"
+
+
+class PidIndex:
+    """
+    Supervisor-wide PID -> (program name, process index) map, kept up to
+    date by the ProcessTables so that finding the owner of a PID never
+    scans the programs.
+
+    Methods:
+        add(pid, program, index, table): Record the owner of a PID.
+        discard(pid, table): Forget a PID if table still owns it.
+        get(pid): (program, index) of a PID, or None.
+        snapshot(): {pid: (program, index)} of the processes not reaped yet.
+    """
+
+    def __init__(self):
+        self._pids = {}
+
+    def add(self, pid, program, index, table):
+        self._pids[pid] = (program, index, table)
+
+    def discard(self, pid, table):
+        entry = self._pids.get(pid)
+        # The PID may have been reused since, e.g. by a reloaded program
+        if entry is not None and entry[2] is table:
+            del self._pids[pid]
+
+    def get(self, pid):
+        entry = self._pids.get(pid)
+        return entry[:2] if entry is not None else None
+
+    def snapshot(self) -> dict:
+        # Reaped PIDs may already belong to unrelated processes
+        pids = {}
+        for pid, (program, index, table) in list(self._pids.items()):
+            record = table.byPid(pid)
+            if record is not None and record.popen.returncode is None:
+                pids[pid] = (program, index)
+        return pids
+
+    def __len__(self):
+        return len(self._pids)
+
+
+PID_INDEX = PidIndex()
+
+
+class ProcessTable:
+    """
+    The process records of one program: an array indexed by process index
+    (1-based, like the rest of the code) plus a PID -> record index. Every
+    change is mirrored into the supervisor-wide PID_INDEX.
+
+    Methods:
+        get(index): Record at index, or None.
+        set(index, record): Store a record, replacing the previous one.
+        byPid(pid): Record of a PID, or None.
+        values(): Every stored record, by index.
+        indexes(): Every index holding a record.
+        clear(): Drop every record, e.g. when the program goes away.
+    """
+
+    __slots__ = ("_program", "_records", "_by_pid", "_count")
+
+    def __init__(self, program=None):
+        self._program = program
+        self._records = [None]
+        self._by_pid = {}
+        self._count = 0
+
+    def get(self, index, default=None):
+        if index is None or not 0 < index < len(self._records):
+            return default
+        record = self._records[index]
+        return default if record is None else record
+
+    def set(self, index, record):
+        if index >= len(self._records):
+            self._records.extend([None] * (index + 1 - len(self._records)))
+        old = self._records[index]
+        if old is None:
+            self._count += 1
+        else:
+            self._by_pid.pop(old.pid, None)
+            PID_INDEX.discard(old.pid, self)
+        self._records[index] = record
+        self._by_pid[record.pid] = record
+        PID_INDEX.add(record.pid, self._program, index, self)
+
+    def clear(self):
+        for pid in self._by_pid:
+            PID_INDEX.discard(pid, self)
+        self._records = [None]
+        self._by_pid = {}
+        self._count = 0
+
+    def byPid(self, pid):
+        return self._by_pid.get(pid)
+
+    def values(self):
+        return [record for record in self._records if record is not None]
+
+    def indexes(self):
+        return [record.index for record in self._records if record is not None]
+
+    def __contains__(self, index):
+        return self.get(index) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.indexes())
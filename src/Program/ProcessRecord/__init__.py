@@ -0,0 +1,20 @@
+from .AdoptedProcess import UNKNOWN_EXIT_CODE, AdoptedProcess
+from .ProcessRecord import (
+    ALIVE_STATES,
+    PID_INDEX,
+    PidIndex,
+    ProcessRecord,
+    ProcessState,
+    ProcessTable,
+)
+
+__all__ = [
+    "ProcessRecord",
+    "ProcessState",
+    "ProcessTable",
+    "PidIndex",
+    "PID_INDEX",
+    "ALIVE_STATES",
+    "AdoptedProcess",
+    "UNKNOWN_EXIT_CODE",
+]
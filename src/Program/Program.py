@@ -5,16 +5,29 @@ from Program.ProgramProcess.ProgramProcess import ProgramProcess
 
 class Program:
     def __init__(self, dict: dict = None):
-        logger.debug(f"Initializing Program with config: {dict}")
-        self._program_config = ProgramConfig(dict)
+        logger.debug("Initializing Program with config: %s", dict)
+        if isinstance(dict, ProgramConfig):
+            # Already validated, e.g. by the reload diff
+            self._program_config = dict
+        else:
+            self._program_config = ProgramConfig(dict)
         self._process = ProgramProcess(self._program_config)
-        logger.debug(f"Program '{self._program_config.name}' initialized.")
+        logger.debug("Program '%s' initialized.", self._program_config.name)
 
     def getStatus(self, process_id: int = None):
         self._process.getStatus(process_id)
 
-    def updateProcess(self, ProgramConfig, cmdList):
-        self._process.updateProcess(ProgramConfig, cmdList)
+    def statusLines(self, process_id: int = None) -> list:
+        return self._process.statusLines(process_id)
+
+    def statusRecords(self, process_id: int = None) -> list:
+        return self._process.statusRecords(process_id)
+
+    def summary(self) -> dict:
+        return self._process.summary()
+
+    def updateProcess(self, ProgramConfig, cmdList) -> list:
+        return self._process.updateProcess(ProgramConfig, cmdList)
 
     def startProcess(self):
         self._process.startProcess()
@@ -22,11 +35,37 @@ class Program:
     def stopProcess(self, index=None, flag=None):
         self._process.stopProcess(index, flag=flag)
 
+    def sendStop(self, index=None, flag=None) -> list:
+        return self._process._stopTargets(index, flag=flag)
+
+    @staticmethod
+    def waitStopped(targets):
+        ProgramProcess.waitStopped(targets)
+
+    @staticmethod
+    async def waitStoppedAsync(targets):
+        await ProgramProcess.waitStoppedAsync(targets)
+
     def restartProcess(self, flag=None, cmd_terminal=False):
         self._process.restartProcess(flag=flag, cmd_terminal=cmd_terminal)
 
-    def check_startup_timeouts(self):
-        self._process.check_startup_timeouts()
+    def tail(self, index=None) -> str:
+        return self._process.tail(index)
+
+    def rollingReplace(self, new_config):
+        self._process.rollingReplace(new_config)
+
+    def snapshotState(self, inherit=False) -> dict:
+        return self._process.snapshotState(inherit)
+
+    def adoptProcesses(self, state: dict, inherit=False):
+        self._process.adoptProcesses(state, inherit)
+
+    def detach(self):
+        self._process.detach()
+
+    def close(self):
+        self._process.close()
 
     def rebootProcess(self):
         self._process.rebootProcess()
@@ -1,7 +1,20 @@
-from pathlib import Path
+import os
 from typing import Any, Iterator, List, Tuple
 
+from Backoff import Backoff
+from Constants import (
+    BACKOFF_FACTOR,
+    BACKOFF_INITIAL,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    BACKOFF_RESET,
+    LOG_BACKUPS,
+    OUTPUT_BUFFER_KB,
+)
+from Limits import Limits, parseSize
 from Logger import LOGGER as logger
+from Sockets import parseSocket
+from Tracer import TRACER
 
 
 class ProgramConfig(dict):
@@ -11,6 +24,7 @@ class ProgramConfig(dict):
         self.program_config = program_config
         self._load_config()
 
+    @TRACER.traced("config.validate")
     def _load_config(self):
         """
         Load and validate program configuration from a YAML file.
@@ -34,12 +48,51 @@ class ProgramConfig(dict):
             max_restarts (int): Maximum number of restart attempts before aborting (default: 3).
             stop_signal (str): Signal to use for graceful shutdown (default: 'SIGTERM').
             stop_timeout (int): Seconds to wait after graceful stop before killing the program (default: 10).
+            restart_mode (str): How a restart replaces the processes: 'all' at once or
+                                    'rolling' batch by batch (default: 'all').
+            batch_size (int): Processes replaced per batch in rolling mode (default: 1).
+            max_unavailable (int): Maximum processes down at the same time in rolling
+                                    mode (default: 1).
+            backoff_initial (float): Seconds before restarting a crashed process (default: 1).
+            backoff_max (float): Upper bound of the restart delay (default: 60).
+            backoff_factor (float): Growth of the delay on each consecutive crash (default: 2).
+            backoff_jitter (float): Random spread of each delay, as a fraction (default: 0.1).
+            backoff_reset (float): Uptime after which the delay goes back to backoff_initial
+                                    (default: 60).
             stdout (Optional[str]): File path to redirect standard output (default: None).
             stderr (Optional[str]): File path to redirect standard error (default: None).
             discard_output (bool): Whether to discard stdout/stderr instead of redirecting (default: False).
+            output_buffer (int): KiB of captured stdout/stderr kept in memory per process
+                                    when they are not redirected (default: 64).
+            log_output (bool): Whether to forward captured output to the logger (default: False).
+            log_max_bytes (int): Rotate stdout/stderr files bigger than this many bytes
+                                    (default: 0, no size rotation).
+            log_rotate_interval (int): Rotate stdout/stderr files every this many seconds
+                                    (default: 0, no time rotation).
+            log_backups (int): Number of rotated files kept per output file (default: 5).
+            log_compress (bool): Whether to gzip rotated files in the background (default: False).
             env (Dict[str, str]): Environment variables to set before launching the program (default: {}).
             working_dir (str): Working directory to set before launching the program (default: current working directory).
             umask (str): Umask to set before launching the program (default: '022').
+            shell (bool): Whether to run the command through /bin/sh (default: False).
+            process_group (bool): Whether each process gets its own session and process
+                                    group, so that stops and kills reach the processes it
+                                    forks as well (default: True).
+            sockets (List[dict]): Listeners bound by the supervisor and passed to every
+                                    process as fds 3, 4... with LISTEN_FDS, LISTEN_FDNAMES
+                                    and LISTEN_PID set, each a tcp://host:port or
+                                    unix:///path address or a dict with address, name,
+                                    backlog and mode (default: []).
+            rlimits (Dict[str, Any]): nofile, as, nproc and cpu limits, each a value or a
+                                    [soft, hard] pair (default: {}).
+            nice (Optional[int]): Scheduling priority of the processes (default: None).
+            cpu_affinity (Optional[List[int]]): CPUs the processes may run on (default: None).
+            memory_limit (Optional[int]): cgroup v2 memory.max of the whole program,
+                                    bytes or a size like '512M' (default: None).
+            cpu_limit (Optional[float]): cgroup v2 CPU quota of the whole program,
+                                    in CPUs (default: None).
+            max_memory (Optional[int]): RSS above which a process is restarted
+                                    through the restart policy (default: None).
 
         Raises:
             FileNotFoundError: If the YAML configuration file does not exist.
@@ -72,19 +125,84 @@ class ProgramConfig(dict):
         self["stop_signal"] = self.program_config.get("stop_signal", "SIGTERM")
         self["stop_timeout"] = int(self.program_config.get("stop_timeout", 10))
 
+        # Restart behavior
+        self["restart_mode"] = self.program_config.get("restart_mode", "all")
+        if self["restart_mode"] not in ("all", "rolling"):
+            raise ValueError("restart_mode must be 'all' or 'rolling'")
+        self["batch_size"] = int(self.program_config.get("batch_size", 1))
+        self["max_unavailable"] = int(self.program_config.get("max_unavailable", 1))
+        if self["batch_size"] < 1 or self["max_unavailable"] < 1:
+            raise ValueError("batch_size and max_unavailable must be at least 1")
+        self["backoff_initial"] = float(
+            self.program_config.get("backoff_initial", BACKOFF_INITIAL)
+        )  # seconds
+        self["backoff_max"] = float(self.program_config.get("backoff_max", BACKOFF_MAX))
+        self["backoff_factor"] = float(
+            self.program_config.get("backoff_factor", BACKOFF_FACTOR)
+        )
+        self["backoff_jitter"] = float(
+            self.program_config.get("backoff_jitter", BACKOFF_JITTER)
+        )
+        self["backoff_reset"] = float(
+            self.program_config.get("backoff_reset", BACKOFF_RESET)
+        )  # seconds
+        Backoff(
+            self["backoff_initial"],
+            self["backoff_max"],
+            self["backoff_factor"],
+            self["backoff_jitter"],
+            self["backoff_reset"],
+        )  # raises ValueError on an invalid policy
+
         # Logging
         self["stdout"] = self.program_config.get("stdout", None)
         self["stderr"] = self.program_config.get("stderr", None)
         self["discard_output"] = bool(self.program_config.get("discard_output", False))
         if self["discard_output"] and (self["stdout"] or self["stderr"]):
             raise ValueError("Cannot discard output if stdout or stderr are set")
+        self["output_buffer"] = int(
+            self.program_config.get("output_buffer", OUTPUT_BUFFER_KB)
+        )  # KiB
+        if self["output_buffer"] <= 0:
+            raise ValueError("output_buffer must be a positive number of KiB")
+        self["log_output"] = bool(self.program_config.get("log_output", False))
+        self["log_max_bytes"] = int(self.program_config.get("log_max_bytes", 0))
+        self["log_rotate_interval"] = int(
+            self.program_config.get("log_rotate_interval", 0)
+        )  # seconds
+        self["log_backups"] = int(self.program_config.get("log_backups", LOG_BACKUPS))
+        self["log_compress"] = bool(self.program_config.get("log_compress", False))
 
         # Environment & execution context
         self["env"] = {
             str(k): str(v) for k, v in self.program_config.get("env", {}).items()
         }
-        self["working_dir"] = self.program_config.get("working_dir", str(Path.cwd()))
+        self["working_dir"] = self.program_config.get("working_dir", os.getcwd())
         self["umask"] = self.program_config.get("umask", 0o22)
+        self["shell"] = bool(self.program_config.get("shell", False))
+        self["process_group"] = bool(self.program_config.get("process_group", True))
+        self["sockets"] = [
+            parseSocket(spec) for spec in self.program_config.get("sockets") or []
+        ]
+        addresses = [spec["address"] for spec in self["sockets"]]
+        if len(set(addresses)) != len(addresses):
+            raise ValueError("The same socket address is listed more than once")
+
+        # Resource limits
+        self["rlimits"] = dict(self.program_config.get("rlimits") or {})
+        self["nice"] = self.program_config.get("nice", None)
+        self["cpu_affinity"] = self.program_config.get("cpu_affinity", None)
+        Limits(
+            self["rlimits"], self["nice"], self["cpu_affinity"]
+        )  # raises ValueError on an invalid limit
+        for key in ("memory_limit", "max_memory"):
+            value = self.program_config.get(key, None)
+            self[key] = None if value is None else parseSize(value)  # bytes
+        self["cpu_limit"] = self.program_config.get("cpu_limit", None)
+        if self["cpu_limit"] is not None:
+            self["cpu_limit"] = float(self["cpu_limit"])
+            if self["cpu_limit"] <= 0:
+                raise ValueError("cpu_limit must be a positive number of CPUs")
 
         logger.info("ProgramConfig initialized correctly")
 
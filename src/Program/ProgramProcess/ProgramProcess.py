@@ -1,15 +1,61 @@
-import copy
+import asyncio
+import collections
+import functools
 import os
+import shutil
 import signal
 import subprocess
+import sys
 import time
 
+from Backoff import Backoff
+from Constants import (
+    BACKOFF_FACTOR,
+    BACKOFF_INITIAL,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    BACKOFF_RESET,
+    LIST_RESTART,
+    LOG_BACKUPS,
+    OUTPUT_BUFFER_KB,
+    STOP_POLL_INTERVAL,
+    WATCHDOG_INTERVAL,
+)
+from EventLog import EVENT_LOG
+from Limits import Cgroup, Limits
 from Logger import LOGGER as logger
+from LogWriter import LOG_WRITERS
+from Metrics import (
+    EXITS,
+    MONITOR_LAG_SECONDS,
+    RESTARTS,
+    SPAWN_SECONDS,
+    SPAWNS,
+    STOP_SECONDS,
+)
+from OutputReader import OUTPUT_READER, RingBuffer
 from Program.BaseUtils import BaseUtils
+from Program.ProcessRecord import (
+    ALIVE_STATES,
+    UNKNOWN_EXIT_CODE,
+    AdoptedProcess,
+    ProcessRecord,
+    ProcessState,
+    ProcessTable,
+)
 from Program.ProgramConfig import ProgramConfig
+from Reaper import REAPER
+from ResourceSampler import SAMPLER, readRss, readStartTime
+from Sockets import LISTENERS, launcherCommand
+from StateSnapshot import STATE_SNAPSHOT
+from Status import StatusSummary
+from Tracer import TRACER
 
 
 class ProgramProcess(BaseUtils, dict):
+    # Update functions return the stop targets they sent, if any: the caller
+    # waits for them, from a thread or from the event loop
+
     @staticmethod
     def nothing(obj):
         pass
@@ -17,18 +63,15 @@ class ProgramProcess(BaseUtils, dict):
     @staticmethod
     def processUpdate(obj):
         if obj.old_num_proc > obj._num_proc:
-            for index in range(obj._num_proc, obj.old_num_proc):
-                index += 1
+            indexes = range(obj._num_proc + 1, obj.old_num_proc + 1)
+            for index in indexes:
                 logger.info(
                     f"About to destroy process {index} of program {obj['name']} "
                 )
-                obj.stopProcess(index)
+            obj._refreshStopSettings()
+            return obj._sendStop(indexes)
         elif obj.old_num_proc < obj._num_proc:
-            for index in range(obj.old_num_proc, obj._num_proc):
-                index += 1
-                obj._processes[index] = obj._initProcess(
-                    name_proc=obj["name"], index=index
-                )
+            obj._spawnBatch(range(obj.old_num_proc + 1, obj._num_proc + 1))
 
     @staticmethod
     def startUpdate(obj):
@@ -39,7 +82,19 @@ class ProgramProcess(BaseUtils, dict):
                 else:
                     obj.startProcess()
             else:
-                obj.stopProcess(flag=True)
+                return obj._stopTargets(flag=True)
+
+    @staticmethod
+    def backoffUpdate(obj):
+        obj._backoff = obj._backoffPolicy()
+
+    @staticmethod
+    def cgroupUpdate(obj):
+        obj._applyCgroup()
+
+    @staticmethod
+    def watchdogUpdate(obj):
+        obj._armWatchdog()
 
     attr_map = {
         "processes": ("_num_proc", processUpdate),
@@ -50,6 +105,19 @@ class ProgramProcess(BaseUtils, dict):
         "max_restarts": ("_max_restarts", nothing),
         "stop_signal": ("_stop_signal", nothing),
         "stop_timeout": ("_stop_timeout", nothing),
+        "restart_mode": ("_restart_mode", nothing),
+        "batch_size": ("_batch_size", nothing),
+        "max_unavailable": ("_max_unavailable", nothing),
+        "backoff_initial": ("_backoff_initial", backoffUpdate),
+        "backoff_max": ("_backoff_max", backoffUpdate),
+        "backoff_factor": ("_backoff_factor", backoffUpdate),
+        "backoff_jitter": ("_backoff_jitter", backoffUpdate),
+        "backoff_reset": ("_backoff_reset", backoffUpdate),
+        "output_buffer": ("_output_buffer", nothing),
+        "log_output": ("_log_output", nothing),
+        "memory_limit": ("_memory_limit", cgroupUpdate),
+        "cpu_limit": ("_cpu_limit", cgroupUpdate),
+        "max_memory": ("_max_memory", watchdogUpdate),
     }
     """
     ProgramProcess is a class for managing and controlling multiple subprocesses with advanced configuration options.
@@ -61,32 +129,78 @@ class ProgramProcess(BaseUtils, dict):
         ValueError: If the input configuration dictionary is None or if process initialization/stopping fails.
     Attributes:
         _num_proc (int): Number of processes to manage.
-        _processes (dict): Dictionary holding information about each managed process.
+        _processes (ProcessTable): ProcessRecord of each managed process, by index and by PID.
         _command (list): Command to execute for the subprocess.
         _working_directory (str): Working directory for the subprocess.
         _use_shell (bool): Whether to use shell for subprocess execution.
+        _process_group (bool): Whether each process leads its own session and process
+                               group, which stop and kill signals are sent to.
         _max_restarts (int): Maximum number of allowed restarts for a process.
         _success_timeout (float): Timeout to consider a process as successfully started.
         _restart_policy (str): Policy for restarting processes ("always", "unexpected", "never").
         _start_at_launch (bool): Whether to start processes automatically at launch.
         _expected_exit_codes (list): List of exit codes considered as expected.
         _env (dict): Environment variables for the subprocess.
-        _preexec_fn (callable): Function to execute in the child process before running the command.
+        _executable (str): Resolved path of the command, looked up once per program.
+        _umask (int): Umask applied by the C child setup code (no Python preexec_fn).
+        _limits (Limits): rlimits, nice and CPU affinity each new process starts with.
+        _cgroup (Cgroup): cgroup v2 group holding memory_limit and cpu_limit.
+        _max_memory (int): RSS in bytes above which the watchdog recycles a process.
+        _watchdog_timer (int): Reaper timer of the next max_memory check.
         _stop_timeout (float): Timeout for stopping a process.
         _stop_signal (signal): Signal used to stop a process.
+        _output (dict): In-memory RingBuffer of captured output per process index.
+        _output_buffer (int): Size in KiB of each output RingBuffer.
+        _log_output (bool): Whether captured output is forwarded to the logger.
+        _writers (dict): Pooled LogWriter per output path, reused across restarts.
+        _listeners (dict): Pooled Listener per address of "sockets", held while the
+                           program exists so that restarts never close them.
+        _pass_fds (tuple): Listener fds kept open in every new process.
+        _rolling (dict): State of the rolling restart in progress (pending and
+                         in-flight indexes), None when there is none.
+        _log_policy (dict): Rotation options passed to the LogWriter pool.
+        _summary (StatusSummary): Counters per state, updated on every transition.
+        _detached (bool): Set when the supervisor exits leaving the processes running.
     Methods:
         printContent(data): Prints the content of the process configuration.
         addDataProcess(data): Adds process configuration data to the instance.
-        _initRedirectionFile(num_proc, name_file, index): Initializes file redirection for process output.
+        _initRedirectionFile(name_file, index): Returns the pooled LogWriter for a process output file.
+        _releaseWriters(): Gives the pooled LogWriters back when the program goes away.
+        _acquireListeners(): Returns the pooled Listeners of the "sockets" addresses.
+        _releaseListeners(listeners, keep=()): Gives pooled Listeners back.
+        _passListeners(): Makes every spawn hand the listeners over systemd-style.
+        _outputTargets(index): Returns the stdout/stderr redirections and pipe writers of a process.
         _initProcess(name_proc, index): Initializes a single subprocess and stores its metadata.
+        _prepareSpawn(): Precomputes the spawn arguments shared by every instance.
+        _launchArgs(): Returns the Popen command, going through the Limits launcher if needed.
+        _spawnProcess(index, restarts=0): Starts a process and hands it to the reaper.
+        _spawnBatch(indexes): Starts several instances in one batch.
+        _onProcessExit(index, pid, exit_code): Reaper callback when a process exits.
+        _onStartupDeadline(index, pid): Reaper timer fired after success_timeout.
         _createProcess(): Creates and starts all configured subprocesses.
+        _applyCgroup(): Writes memory_limit and cpu_limit to the program's cgroup.
+        _armWatchdog(): (Re)schedules the max_memory checks.
+        _memoryWatchdog(): Stops the processes whose RSS is over max_memory.
         _getStopSignal(): Retrieves the signal to use for stopping processes.
-        _stopSingleProcess(process): Stops a single subprocess, force kills if timeout is exceeded.
-        _stopAllProcess(): Stops all managed subprocesses.
+        _signal(pid, signum): Sends a signal to the process group of a process, or to the process.
+        _sweepGroup(pid): Kills what is left of the process group of a process that is gone.
+        _sendStop(indexes): Sends stop_signal to the given processes without waiting.
+        waitStopped(targets): Waits for a stop batch, force kills what outlives its deadline.
+        waitStoppedAsync(targets): Same as waitStopped, awaited from the asyncio core.
+        _stopTargets(index=None, pid=None, flag=None): Sends stop_signal to the processes selected for stopping.
         _getProcess(index=None, pid=None): Retrieves process information by index or PID.
-        _restartProcessIfNeeded(index): Restarts a process if needed based on the restart policy.
+        _restartProcessIfNeeded(index): Schedules a restart if needed based on the restart policy.
+        _scheduleRestart(index, proc_info): Restarts a crashed process after its backoff delay.
         startProcess(): Starts processes based on the configuration.
-        stopProcess(index=None, pid=None): Stops a specific process or all processes based on configuration.
+        stopProcess(index=None, pid=None, flag=None): Stops a specific process or all processes based on configuration.
+        tail(index=None): Returns the captured output kept in memory for one or all processes.
+        statusRecords(process_id=None): Returns the status of the processes as dicts.
+        summary(): Returns the per-program status summary as a dict.
+        rollingReplace(new_config): Applies a LIST_RESTART change with a rolling restart.
+        snapshotState(inherit=False): Returns the state of the processes for the state snapshot.
+        adoptProcesses(state, inherit=False): Takes over the processes of a state snapshot.
+        detach(): Leaves the processes running when the program goes away.
+        close(): Stops the processes and releases what the program holds.
     """
 
     def __init__(self, pc: dict):
@@ -94,27 +208,70 @@ class ProgramProcess(BaseUtils, dict):
             raise ValueError(self.ERROR + " Null parameter in constructor")
         self.addDataProcess(pc)
         self._num_proc = self.get("processes")
-        self._processes = {}
+        self._processes = ProcessTable(self.get("name"))
+        self._output = {}
+        self._writers = {}
+        self._old_writers = {}
+        self._rolling = None
+        self._summary = StatusSummary(self.get("name"))
         self._log_restart_fails = True
+        self._cgroup = Cgroup(self.get("name"))
+        self._watchdog_timer = None
+        self._detached = False
+        self._closed = False
+        self._pass_fds = ()
+        self._old_listeners = {}
+        self._listeners = self._acquireListeners()
 
-    def __del__(self):
+    def close(self):
+        """
+        Stop the processes and give back the reaper timers, pooled log
+        writers, listeners and cgroup of the program, once it is removed or
+        replaced. Not left to __del__: the watchdog timer holds a reference
+        to the program, which would then never be collected.
+        """
+        with REAPER.lock:
+            # Under the lock: a running watchdog would reschedule itself
+            if self._closed:
+                return
+            self._closed = True
+            REAPER.cancel(self._watchdog_timer)
+            self._watchdog_timer = None
+        if self._detached:
+            return
         self.stopProcess()
+        self._finishRolling()
+        self._releaseWriters()
+        self._releaseListeners(self._listeners)
+        self._listeners = {}
+        self._processes.clear()
+        self._cgroup.remove()
+
+    def __del__(self):
+        if hasattr(self, "_closed"):
+            self.close()
 
     def printContent(self, data):
         for key, value in data:
-            logger.debug(
-                self.BLUE + self.LIGTH + str(key) + self.END + ": " + str(value)
-            )
+            logger.debug("%s%s%s%s: %s", self.BLUE, self.LIGTH, key, self.END, value)
 
     def addDataProcess(self, data: ProgramConfig):
+        # Every load builds a fresh ProgramConfig and nothing here mutates the
+        # values in place, so they are shared instead of deep-copied
         for proc, cont in data.items():
-            self[proc] = copy.deepcopy(cont)
+            self[proc] = cont
 
-    def updateProcess(self, data_update: ProgramConfig, no_restart_list: list):
+    def updateProcess(self, data_update: ProgramConfig, no_restart_list: list) -> list:
+        """
+        Apply a change of LIST_NO_RESTART keys. The processes it stops (scale
+        down, start_at_launch turned off) are only sent their stop signal:
+        the returned targets are for the caller to wait for.
+        """
+        targets = []
         self.old_num_proc = self._num_proc
         self._old_start_at_launch = self["start_at_launch"]
         for idx in range(0, len(no_restart_list)):
-            logger.debug(f"update no restart list -- {no_restart_list[idx]}")
+            logger.debug("update no restart list -- %s", no_restart_list[idx])
             parameter = no_restart_list[idx]
             self[parameter] = data_update[parameter]
             if parameter in self.attr_map:
@@ -122,72 +279,408 @@ class ProgramProcess(BaseUtils, dict):
                 setattr(self, private_attr_name, data_update[parameter])
 
         for idx in range(0, len(no_restart_list)):
-            logger.debug(f"call function update -- {no_restart_list[idx]}")
+            logger.debug("call function update -- %s", no_restart_list[idx])
             parameter = no_restart_list[idx]
             self[parameter] = data_update[parameter]
             if parameter in self.attr_map:
                 _, update_func = self.attr_map[parameter]
-                update_func(self)
+                targets.extend(update_func(self) or ())
         logger.info(f"Process '{self['name']}' configuration updated.")
+        return targets
 
-    @staticmethod
-    def _initRedirectionFile(num_proc, name_file, index):
+    def _initRedirectionFile(self, name_file, index):
         file_output = name_file
-        if num_proc > 1:
+        if self._num_proc > 1:
             base, ext = os.path.splitext(file_output)
             file_output = f"{base}{index}{ext}"
-        file_output = open(os.path.expanduser(file_output), "a")
-        return file_output
+        # One pooled writer per path: restarts reuse it instead of open()ing
+        writer = self._writers.get(file_output)
+        if writer is None:
+            writer = LOG_WRITERS.acquire(file_output, **self._log_policy)
+            self._writers[file_output] = writer
+        return writer
 
-    def _initProcess(self, name_proc, index) -> dict:
-        curr_name = f"{name_proc}" + (f"{index}" if self._num_proc > 1 else "")
-        new_process = {}
+    def _releaseWriters(self):
+        for path in self._writers:
+            LOG_WRITERS.release(path)
+        self._writers = {}
+
+    def _acquireListeners(self) -> dict:
+        listeners = {}
+        try:
+            for spec in self.get("sockets") or ():
+                listeners[spec["address"]] = LISTENERS.acquire(spec)
+        except ValueError:
+            self._releaseListeners(listeners)
+            raise
+        return listeners
+
+    @staticmethod
+    def _releaseListeners(listeners, keep=()):
+        for address in listeners:
+            if address not in keep:
+                LISTENERS.release(address)
+
+    def _outputTargets(self, index) -> tuple:
         stdout = subprocess.PIPE
         stderr = subprocess.PIPE
+        stdout_writer = stderr_writer = None
         if self.get("discard_output", False):
             stdout = subprocess.DEVNULL
             stderr = subprocess.DEVNULL
         else:
+            # Rotating writers are fed through a pipe, the others get the fd
             if self.get("stdout", ""):
-                stdout = self._initRedirectionFile(
-                    self._num_proc, self["stdout"], index
-                )
+                stdout_writer = self._initRedirectionFile(self["stdout"], index)
+                if not stdout_writer.rotates:
+                    stdout = stdout_writer.fileno()
+                    stdout_writer = None
             if self.get("stderr", ""):
-                stderr = self._initRedirectionFile(
-                    self._num_proc, self["stderr"], index
-                )
+                stderr_writer = self._initRedirectionFile(self["stderr"], index)
+                if not stderr_writer.rotates:
+                    stderr = stderr_writer.fileno()
+                    stderr_writer = None
+            elif stdout is subprocess.PIPE and stdout_writer is None:
+                # Both captured: share one pipe, the ring buffer is shared anyway
+                stderr = subprocess.STDOUT
+        return stdout, stderr, (stdout_writer, stderr_writer)
+
+    @TRACER.traced("spawn")
+    def _initProcess(self, name_proc, index) -> ProcessRecord:
+        curr_name = f"{name_proc}" + (f"{index}" if self._num_proc > 1 else "")
+        stdout, stderr, writers = self._outputTargets(index)
+        command, executable, use_shell = self._launchArgs()
         try:
+            spawn_start = time.perf_counter()
             process = subprocess.Popen(
-                self._command,
+                command,
+                executable=executable,
                 cwd=self._working_directory,
                 env=self._env,
                 stdout=stdout,
                 stderr=stderr,
-                shell=self._use_shell,
-                preexec_fn=self._preexec_fn,
+                shell=use_shell,
+                umask=self._umask,
+                start_new_session=self._process_group,
+                pass_fds=self._pass_fds,
             )
-            new_process["_popen"] = process
-            new_process['_pid'] = process.pid
-            new_process["_status"] = "starting"
-            new_process["_start_time"] = time.time()
-            new_process["_restarts"] = 0
+            SPAWN_SECONDS.observe(time.perf_counter() - spawn_start, self["name"])
+            SPAWNS.inc(self["name"])
+            new_process = ProcessRecord(index, process, writers, time.time())
             logger.debug(
-                f"{self.GREEN}{self.LIGTH}Process{self.END} '{curr_name}' initialized (PID: {process.pid})"
+                "%s%sProcess%s '%s' initialized (PID: %s)",
+                self.GREEN,
+                self.LIGTH,
+                self.END,
+                curr_name,
+                process.pid,
             )
         except Exception as err:
             raise ValueError(f"In process initialization {curr_name}: {err}")
         return new_process
 
-    def _createProcess(self):
-        self._command = self.get("command", "").split()
-        self._working_directory = self.get("working_dir", None)
+    def _spawnProcess(self, index, restarts=0) -> ProcessRecord:
+        new_process = self._initProcess(name_proc=self["name"], index=index)
+        return self._trackProcess(index, new_process, restarts)
+
+    def _spawnBatch(self, indexes):
+        # Holding the reaper lock keeps exit callbacks and timer wake-ups from
+        # interleaving with the batch; they are handled once it is launched
+        with REAPER.lock:
+            for index in indexes:
+                self._spawnProcess(index)
+
+    def _trackProcess(self, index, new_process, restarts=0) -> ProcessRecord:
+        new_process.restarts = restarts
+        self._captureOutput(index, new_process.popen, new_process.writers)
+        old_process = self._processes.get(index)
+        if old_process is not None:
+            self._summary.remove(old_process.state)
+        self._summary.add(new_process.state)
+        if restarts:
+            self._summary.restarts += 1
+            RESTARTS.inc(self["name"])
+        self._processes.set(index, new_process)
+        STATE_SNAPSHOT.changed()
+        self._logEvent(
+            "restarted" if restarts else "spawned", new_process, restarts=restarts
+        )
+        pid = new_process.pid
+        REAPER.register(
+            pid,
+            new_process.popen,
+            functools.partial(self._onProcessExit, index, pid),
+        )
+        new_process.startup_timer = REAPER.schedule(
+            self._success_timeout, self._onStartupDeadline, index, pid
+        )
+        return new_process
+
+    def _captureOutput(self, index, process, writers=(None, None)):
+        streams = [
+            (stream, writer)
+            for stream, writer in zip((process.stdout, process.stderr), writers)
+            if stream is not None
+        ]
+        if not streams:
+            return
+        size = self._output_buffer * 1024
+        ring = self._output.get(index)
+        if ring is None or ring.capacity != size:
+            ring = self._output[index] = RingBuffer(size)
+        sinks = []
+        if self._log_output:
+            sinks.append(functools.partial(self._logOutput, index))
+        for stream, writer in streams:
+            stream_sinks = (sinks + [writer.write]) if writer else sinks
+            OUTPUT_READER.register(stream, ring, stream_sinks)
+
+    def _logOutput(self, index, data: bytes):
+        for line in data.decode(errors="replace").splitlines():
+            logger.info("[%s:%s] %s", self["name"], index, line)
+
+    def tail(self, index=None) -> str:
+        if index is not None:
+            ring = self._output.get(index)
+            return ring.read().decode(errors="replace") if ring else ""
+        output = []
+        for idx in sorted(self._output):
+            output.append(f"==> {self['name']}:{idx} <==")
+            output.append(self._output[idx].read().decode(errors="replace"))
+        return "\n".join(output)
+
+    def _onProcessExit(self, index, pid, exit_code):
+        proc_info = self._processes.get(index)
+        if proc_info is None or proc_info.pid != pid:
+            return
+        REAPER.cancel(proc_info.startup_timer)
+        self._sweepGroup(pid)
+        if proc_info.state == ProcessState.STOPPING and proc_info.replace:
+            # Old instance of a rolling restart: bring up its replacement, even
+            # if the roll was aborted meanwhile, or the index would stay down
+            REAPER.cancel(proc_info.kill_timer)
+            self._markStopped(index, proc_info, proc_info.killed)
+            self._spawnProcess(index)
+            return
+        if proc_info.state in (ProcessState.STOPPING, ProcessState.STOPPED):
+            return
+        self._recordExit(index, exit_code)
+        proc_info.exit_code = exit_code
+        self._logEvent(
+            "exited", proc_info, exit_code=exit_code, uptime=self._uptime(proc_info)
+        )
+        if proc_info.recycled:
+            # Stopped by the memory watchdog: replaced whatever the restart
+            # policy and exit code, and not counted against max_restarts
+            REAPER.cancel(proc_info.kill_timer)
+            self._spawnProcess(index, restarts=proc_info.restarts)
+            return
+        if proc_info.state == ProcessState.STARTING:
+            self._markStartupFailed(index, proc_info)
+        self._restartProcessIfNeeded(index)
+
+    @TRACER.traced("startup.check")
+    def _onStartupDeadline(self, index, pid):
+        proc_info = self._processes.get(index)
+        if proc_info is None or proc_info.pid != pid:
+            return
+        if proc_info.state != ProcessState.STARTING:
+            return
+        MONITOR_LAG_SECONDS.observe(
+            max(0.0, time.time() - proc_info.start_time - self._success_timeout),
+            self["name"],
+        )
+        # The exit has not been reaped yet, the reaper callback will handle it
+        if proc_info.popen.returncode is not None:
+            return
+        self._markRunning(index, proc_info)
+
+    def _recordExit(self, index, exit_code):
+        self._summary.recordExit(index, exit_code)
+        EXITS.inc(self["name"], str(exit_code))
+
+    def _logEvent(self, event, proc_info, **fields):
+        EVENT_LOG.record(event, self["name"], proc_info.index, proc_info.pid, **fields)
+
+    @staticmethod
+    def _uptime(proc_info) -> float:
+        return round(time.time() - proc_info.start_time, 3)
+
+    def _setStatus(self, proc_info, status):
+        self._summary.transition(proc_info.state, status)
+        proc_info.state = status
+        STATE_SNAPSHOT.changed()
+
+    def _markStartupFailed(self, index, proc_info):
+        self._setStatus(proc_info, ProcessState.EXITED)
+        proc_info.successful = False
+        logger.warning(
+            f"{self.RED}Program '{self['name']}', Process index {index} exited "
+            f"before reaching success_timeout ({self._success_timeout}s).{self.END}"
+        )
+        if self._rolling is not None and index in self._rolling["inflight"]:
+            logger.error(
+                f"{self.ERROR} Rolling restart of '{self['name']}' aborted: "
+                f"process index {index} failed its health gate"
+            )
+            self._finishRolling()
+
+    def _markRunning(self, index, proc_info):
+        self._setStatus(proc_info, ProcessState.RUNNING)
+        proc_info.successful = True
+        self._logEvent("running", proc_info, startup=self._uptime(proc_info))
+        logger.info(
+            f"{self.GREEN}Program '{self['name']}', Process index {index} "
+            f"has successfully started after {self._success_timeout}s.{self.END}"
+        )
+        if self._rolling is not None and index in self._rolling["inflight"]:
+            self._rolling["inflight"].discard(index)
+            self._rollNext()
+
+    def _rollingRestart(self, indexes):
+        """
+        Replace the given processes batch_size at a time. A batch only counts
+        as done once its new processes reach success_timeout ("running"), and
+        no more than max_unavailable processes are down at any time. Progress
+        is driven by the reaper callbacks, so this returns immediately.
+        """
+        self._refreshStopSettings()
+        logger.info(
+            f"{self.MODE} Rolling restart of '{self['name']}' "
+            f"(batch_size={self._batch_size}, max_unavailable={self._max_unavailable})"
+        )
+        # Exit and startup callbacks must not see a half-sent batch
+        with REAPER.lock:
+            self._rolling = {
+                "pending": collections.deque(indexes),
+                "inflight": set(),
+            }
+            self._rollNext()
+
+    def _rollNext(self):
+        rolling = self._rolling
+        batch_size = min(self._batch_size, self._max_unavailable)
+        while rolling["pending"]:
+            if rolling["inflight"] and (
+                len(rolling["inflight"]) + batch_size > self._max_unavailable
+            ):
+                return
+            batch = []
+            while rolling["pending"] and len(batch) < batch_size:
+                batch.append(rolling["pending"].popleft())
+            rolling["inflight"].update(batch)
+            self._rollBatch(batch)
+        if not rolling["inflight"]:
+            logger.info(f"{self.INFO} Rolling restart of '{self['name']}' done")
+            self._finishRolling()
+
+    def _rollBatch(self, batch):
+        live = []
+        for index in batch:
+            proc_info = self._processes.get(index)
+            if proc_info and proc_info.state in ALIVE_STATES:
+                live.append(index)
+            else:
+                self._spawnProcess(index)
+        # The replacement is spawned by _onProcessExit once the old one is gone
+        for _, index, proc_info, _ in self._sendStop(live):
+            proc_info.replace = True
+            proc_info.kill_timer = REAPER.schedule(
+                self._stop_timeout, self._killIfAlive, index, proc_info.pid
+            )
+
+    def _killIfAlive(self, index, pid):
+        proc_info = self._processes.get(index)
+        if proc_info is None or proc_info.pid != pid:
+            return
+        if (
+            proc_info.state != ProcessState.STOPPING
+            or proc_info.popen.returncode is not None
+        ):
+            return
+        try:
+            self._signal(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            return
+        proc_info.killed = True
+        logger.warning(
+            f"{self.YELLOW}Process '{pid}' force killed with SIGKILL after timeout{self.END}"
+        )
+
+    def _finishRolling(self):
+        self._rolling = None
+        for path in self._old_writers:
+            if path not in self._writers:
+                LOG_WRITERS.release(path)
+        self._old_writers = {}
+        self._releaseListeners(self._old_listeners, keep=self._listeners)
+        self._old_listeners = {}
+
+    def _liveIndexes(self) -> list:
+        # Records past processes (after a scale down) are kept but not rolled
+        return [i for i in self._processes.indexes() if i <= self._num_proc]
+
+    def rollingReplace(self, new_config: ProgramConfig):
+        """
+        Apply a change of LIST_RESTART keys (command, env, ...) in place: the
+        new spawn settings are used by every process started from now on, and
+        the running processes are replaced by a rolling restart.
+        """
+        for key in LIST_RESTART:
+            self[key] = new_config.get(key)
+        if not self._old_writers:
+            self._old_writers = self._writers
+        self._writers = {}
+        # The new listeners are bound before the old ones are let go, so an
+        # address kept by the new config keeps its socket and accept queue
+        listeners = self._acquireListeners()
+        if self._old_listeners:
+            self._releaseListeners(self._listeners, keep=listeners)
+        else:
+            self._old_listeners = self._listeners
+        self._listeners = listeners
+        self._prepareSpawn()
+        self._rollingRestart(self._liveIndexes())
+
+    @staticmethod
+    def _parseUmask(value) -> int:
+        # YAML gives 022 as an int but "027" as an octal string
+        if isinstance(value, str):
+            return int(value, 8)
+        return int(value)
+
+    def _prepareSpawn(self):
+        """
+        Compute once per program everything Popen needs, so that each spawn
+        is only a fork and an exec. There is no Python preexec_fn: umask, cwd,
+        env and redirections are applied by the C child code of
+        _posixsubprocess, which lets CPython use vfork() instead of copying
+        the supervisor's address space.
+        """
         self._use_shell = self.get("shell", False)
+        # With a shell the whole command line is the script run by sh -c
+        command = self.get("command", "")
+        self._command = [command] if self._use_shell else command.split()
+        self._process_group = self.get("process_group", True)
+        self._working_directory = self.get("working_dir", None)
 
         self._max_restarts = self.get("max_restarts")
         self._success_timeout = self.get("success_timeout")
         self._restart_policy = self.get("restart_policy")
         self._start_at_launch = self.get("start_at_launch")
         self._expected_exit_codes = self.get("expected_exit_codes")
+        self._restart_mode = self.get("restart_mode", "all")
+        self._batch_size = self.get("batch_size", 1)
+        self._max_unavailable = self.get("max_unavailable", 1)
+        self._backoff = self._backoffPolicy()
+        self._output_buffer = self.get("output_buffer", OUTPUT_BUFFER_KB)
+        self._log_output = self.get("log_output", False)
+        self._log_policy = {
+            "max_bytes": self.get("log_max_bytes", 0),
+            "rotate_interval": self.get("log_rotate_interval", 0),
+            "backups": self.get("log_backups", LOG_BACKUPS),
+            "compress": self.get("log_compress", False),
+        }
 
         if self._working_directory:
             self._working_directory = os.path.expanduser(self._working_directory)
@@ -198,64 +691,351 @@ class ProgramProcess(BaseUtils, dict):
         if "env" in self:
             self._env.update(self["env"])
 
-        self._preexec_fn = None
-        if "umask" in self:
-            umask_val = self["umask"]
-            self._preexec_fn = lambda: os.umask(umask_val)
-        for new in range(1, self._num_proc + 1):
-            self._processes[new] = self._initProcess(name_proc=self["name"], index=new)
+        self._umask = -1
+        if self.get("umask") is not None:
+            self._umask = self._parseUmask(self["umask"])
+
+        self._limits = Limits(
+            self.get("rlimits"), self.get("nice"), self.get("cpu_affinity")
+        )
+        self._applyCgroup()
+        self._armWatchdog()
+
+        # Resolve bare command names once instead of letting every child walk
+        # PATH; paths are left to the child since they may be relative to cwd
+        self._executable = None
+        if not self._use_shell and self._command and os.sep not in self._command[0]:
+            self._executable = shutil.which(
+                self._command[0], path=self._env.get("PATH")
+            )
+            if self._executable is None:
+                raise ValueError(
+                    f"{self.ERROR} command not found for {self['name']}: {self._command[0]}"
+                )
+        self._pass_fds = ()
+        if self._listeners:
+            self._passListeners()
+
+    def _passListeners(self):
+        """
+        Hand the listeners to every process the systemd way: as fds 3, 4...
+        with LISTEN_FDS, LISTEN_FDNAMES and LISTEN_PID set, so that all the
+        instances accept on the same sockets. Popen can only keep the fds
+        open, so the command is exec'd through a small launcher that moves
+        them in place and sets LISTEN_PID, which only exists after the fork.
+        """
+        self._pass_fds = tuple(
+            listener.fileno() for listener in self._listeners.values()
+        )
+        self._env["LISTEN_FDS"] = str(len(self._pass_fds))
+        self._env["LISTEN_FDNAMES"] = ":".join(
+            spec["name"] or self["name"] for spec in self["sockets"]
+        )
+        if self._use_shell:
+            argv = ["/bin/sh", "-c", self._command[0]]
+        else:
+            argv = self._command
+        self._command = launcherCommand(
+            self._pass_fds, self._executable or argv[0], argv
+        )
+        self._executable = sys.executable
+        self._use_shell = False
+
+    def _launchArgs(self) -> tuple:
+        """
+        Command, executable and shell flag given to Popen. With limits or a
+        cgroup, the command is exec'd through the Limits launcher so that
+        they are in place before the program starts. Decided on each spawn,
+        since a reload may set up the cgroup at any time.
+        """
+        if not self._limits and not self._cgroup.active:
+            return self._command, self._executable, self._use_shell
+        if self._use_shell:
+            argv = ["/bin/sh", "-c", self._command[0]]
+        else:
+            argv = self._command
+        command = self._limits.launcherCommand(
+            self._executable or argv[0], argv, self._cgroup.procs
+        )
+        return command, sys.executable, False
+
+    def _applyCgroup(self):
+        memory_limit = self.get("memory_limit")
+        cpu_limit = self.get("cpu_limit")
+        if memory_limit is None and cpu_limit is None and not self._cgroup.active:
+            return
+        if self._cgroup.setup(memory_limit, cpu_limit):
+            for proc_info in self._processes.values():
+                if proc_info.state in ALIVE_STATES:
+                    self._cgroup.attach(proc_info.pid)
+
+    def _armWatchdog(self):
+        REAPER.cancel(self._watchdog_timer)
+        self._watchdog_timer = None
+        self._max_memory = self.get("max_memory")
+        if self._max_memory:
+            self._watchdog_timer = REAPER.schedule(
+                WATCHDOG_INTERVAL, self._memoryWatchdog
+            )
+
+    def _memoryWatchdog(self):
+        """
+        Stop the processes whose RSS went over max_memory. They are not
+        marked as stopping, but as recycled: their exit is recorded like any
+        other, then they are restarted at once, even under restart_policy
+        "never" or after a clean exit, without using up max_restarts. SIGKILL
+        follows if stop_signal is ignored for stop_timeout seconds.
+        """
+        self._watchdog_timer = REAPER.schedule(WATCHDOG_INTERVAL, self._memoryWatchdog)
+        for proc_info in self._processes.values():
+            if proc_info.state not in ALIVE_STATES or proc_info.kill_timer is not None:
+                continue
+            rss = readRss(proc_info.pid)
+            if rss is None or rss <= self._max_memory:
+                continue
+            logger.warning(
+                f"{self.YELLOW}Program '{self['name']}', Process index {proc_info.index} "
+                f"(PID: {proc_info.pid}) uses {rss} bytes, over max_memory "
+                f"({self._max_memory}): restarting it{self.END}"
+            )
+            try:
+                self._signal(proc_info.pid, self._getStopSignal())
+            except ProcessLookupError:
+                continue
+            proc_info.recycled = True
+            self._logEvent("killed", proc_info, reason="max_memory", rss=rss)
+            proc_info.kill_timer = REAPER.schedule(
+                self.get("stop_timeout"),
+                self._killOverMemory,
+                proc_info.index,
+                proc_info.pid,
+            )
+
+    def _killOverMemory(self, index, pid):
+        proc_info = self._processes.get(index)
+        if proc_info is None or proc_info.pid != pid:
+            return
+        if (
+            proc_info.state not in ALIVE_STATES
+            or proc_info.popen.returncode is not None
+        ):
+            return
+        try:
+            self._signal(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            return
+        logger.warning(
+            f"{self.YELLOW}Process '{pid}' force killed with SIGKILL after timeout{self.END}"
+        )
+
+    def _createProcess(self):
+        self._prepareSpawn()
+        self._spawnBatch(range(1, self._num_proc + 1))
 
     def _getStopSignal(self):
         signal_name = self.get("stop_signal")
         return getattr(signal, signal_name, signal.SIGTERM)
 
-    def _stopSingleProcess(self, process):
-        os.kill(process.pid, self._stop_signal)
+    def _signal(self, pid, signum):
+        """
+        Signal the whole process group led by pid, so that what the program
+        forked (the command of a shell, worker helpers...) gets it too.
+        Processes spawned without a group of their own (process_group off,
+        or adopted from an older supervisor) only get it themselves.
+        """
+        if self._process_group:
+            try:
+                os.killpg(pid, signum)
+                return
+            except ProcessLookupError:
+                pass
+        os.kill(pid, signum)
+
+    def _sweepGroup(self, pid):
+        # The group outlives its leader as long as a member is left, and its
+        # id cannot be reused meanwhile: kill the leftovers holding resources
+        if not self._process_group:
+            return
         try:
-            process.wait(timeout=self._stop_timeout)
-        except subprocess.TimeoutExpired:
-            os.kill(process.pid, signal.SIGKILL)
-            process.wait()
-            logger.warning(
-                f"{self.YELLOW}Process '{process.pid}' force killed with SIGKILL after timeout{self.END}"
-            )
-        logger.info(f"Process '{process.pid}' stopped.")
+            os.killpg(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            return
+        logger.info(f"Killed the leftover processes of group {pid} ({self['name']})")
 
-    def _stopAllProcess(self):
-        for new in range(1, self._num_proc + 1):
-            if (new) in self._processes:
+    def _sendStop(self, indexes) -> list:
+        """
+        First stop phase: mark every live process in `indexes` as stopping
+        and send it stop_signal without waiting. Returns the stop targets to
+        hand to waitStopped(), possibly together with other programs' targets.
+        """
+        targets = []
+        now = time.monotonic()
+        # Under the reaper lock: its callbacks check a state and then act on
+        # it (backoff restarts, startup deadlines), they must not interleave
+        with REAPER.lock:
+            for index in indexes:
+                proc_info = self._processes.get(index)
+                if proc_info and proc_info.state == ProcessState.BACKOFF:
+                    # Nothing to signal, just drop the pending restart
+                    REAPER.cancel(proc_info.backoff_timer)
+                    proc_info.backoff_timer = None
+                    self._setStatus(proc_info, ProcessState.STOPPED)
+                    proc_info.stop_time = time.time()
+                    continue
                 if (
-                    self._processes[new]["_status"] == "running"
-                    or self._processes[new]["_status"] == "starting"
+                    proc_info
+                    and proc_info.replace
+                    and proc_info.state == ProcessState.STOPPING
                 ):
-                    process = self._processes[new]["_popen"]
+                    # Already stopping for a rolling restart: not replaced
+                    # anymore, waited for with the rest of the batch
+                    proc_info.replace = False
+                    targets.append((self, index, proc_info, now + self._stop_timeout))
+                    continue
+                if not proc_info or proc_info.state not in ALIVE_STATES:
+                    continue
+                self._setStatus(proc_info, ProcessState.STOPPING)
+                proc_info.stop_requested = now
+                REAPER.cancel(proc_info.startup_timer)
+                try:
+                    self._signal(proc_info.pid, self._stop_signal)
+                except ProcessLookupError:
+                    pass
+                except Exception as err:
+                    raise ValueError(
+                        f"{self.ERROR} stopping process: {proc_info.pid}: {err}"
+                    )
+                targets.append((self, index, proc_info, now + self._stop_timeout))
+        return targets
+
+    @staticmethod
+    @TRACER.traced("stop.wait")
+    def waitStopped(targets):
+        """
+        Second stop phase: wait for all targets together. Processes still
+        alive after their own deadline get SIGKILL, so the whole batch takes
+        about one stop_timeout no matter how many processes it holds.
+        """
+        for timeout in ProgramProcess.stopSteps(targets):
+            REAPER.waitExit(timeout)
+
+    @staticmethod
+    async def waitStoppedAsync(targets):
+        """waitStopped() for the asyncio core: the event loop keeps running."""
+        with TRACER.span("stop.wait"):
+            for timeout in ProgramProcess.stopSteps(targets):
+                await asyncio.sleep(timeout)
+
+    @staticmethod
+    def stopSteps(targets):
+        """
+        The stop batch state machine shared by both waits: yields how long
+        to wait before checking the remaining targets again.
+        """
+        pending = list(targets)
+        killed = set()
+        while pending:
+            still_alive = []
+            now = time.monotonic()
+            for target in pending:
+                owner, index, proc_info, deadline = target
+                process = proc_info.popen
+                with REAPER.lock:
+                    if process.poll() is not None:
+                        owner._markStopped(index, proc_info, process.pid in killed)
+                        continue
+                if now >= deadline and process.pid not in killed:
                     try:
-                        self._stopSingleProcess(process)
-                        self._processes[new]["_status"] = "stopped"
-                        self._processes[new]["_exit_code"] = process.returncode
-                        self._processes[new]["stop_time"] = time.time()
-                        self._processes[new]["_stop_signal_used"] = self._stop_timeout
-                        logger.debug(
-                            f"{self.YELLOW} Process {self.END} program index:{new} -- pid:{self._processes[new]['_pid']} {self.RED}{self.LIGTH}stopped{self.END}"
-                        )
-                    except Exception as err:
-                        raise ValueError(
-                            f"{self.ERROR} stopping process: {self._processes[new]['_pid']}: {err}"
-                        )
+                        owner._signal(process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    killed.add(process.pid)
+                    logger.warning(
+                        f"{owner.YELLOW}Process '{process.pid}' force killed with SIGKILL after timeout{owner.END}"
+                    )
+                still_alive.append(target)
+            pending = still_alive
+            if pending:
+                timeout = STOP_POLL_INTERVAL
+                deadlines = [t[3] for t in pending if t[2].pid not in killed]
+                if deadlines:
+                    timeout = min(timeout, max(min(deadlines) - now, 0.0))
+                yield timeout
+
+    def _markStopped(self, index, proc_info, killed=False):
+        process = proc_info.popen
+        REAPER.unregister(process.pid)
+        self._sweepGroup(process.pid)
+        self._setStatus(proc_info, ProcessState.STOPPED)
+        proc_info.exit_code = process.returncode
+        self._recordExit(index, process.returncode)
+        fields = {"exit_code": process.returncode, "uptime": self._uptime(proc_info)}
+        if proc_info.stop_requested is not None:
+            stop_seconds = time.monotonic() - proc_info.stop_requested
+            STOP_SECONDS.observe(stop_seconds, self["name"])
+            fields["stop_seconds"] = round(stop_seconds, 3)
+        if killed:
+            fields["reason"] = "stop_timeout"
+        self._logEvent("killed" if killed else "stopped", proc_info, **fields)
+        proc_info.stop_time = time.time()
+        proc_info.stop_signal_used = signal.SIGKILL if killed else self._stop_signal
+        logger.info(f"Process '{process.pid}' stopped.")
+        logger.debug(
+            "%s Process %s program index:%s -- pid:%s %s%sstopped%s",
+            self.YELLOW,
+            self.END,
+            index,
+            proc_info.pid,
+            self.RED,
+            self.LIGTH,
+            self.END,
+        )
+
+    def _backoffPolicy(self) -> Backoff:
+        return Backoff(
+            self.get("backoff_initial", BACKOFF_INITIAL),
+            self.get("backoff_max", BACKOFF_MAX),
+            self.get("backoff_factor", BACKOFF_FACTOR),
+            self.get("backoff_jitter", BACKOFF_JITTER),
+            self.get("backoff_reset", BACKOFF_RESET),
+        )
+
+    def _refreshStopSettings(self):
+        self._stop_timeout = self.get("stop_timeout")
+        self._stop_signal = self._getStopSignal()
+
+    def _stopTargets(self, index=None, pid=None, flag=None) -> list:
+        self._refreshStopSettings()
+
+        if index is not None or pid is not None:
+            stop = self._getProcess(index, pid)
+            if stop is None:
+                return []
+            return self._sendStop([stop.index])
+        elif self["start_at_launch"] or flag is not None:
+            # Stopping the whole program cancels a rolling restart
+            with REAPER.lock:
+                self._rolling = None
+                return self._sendStop(range(1, self._num_proc + 1))
+        return []
 
     def _getProcess(self, index=None, pid=None):
-        proc = self._processes.get(index, None)
-        if proc is None:
-            proc = self._processes.get(pid, None)
+        proc = self._processes.get(index)
+        if proc is None and pid is not None:
+            proc = self._processes.byPid(pid)
         return proc
 
     def _restartProcessIfNeeded(self, index, flag=None):
         if not self._processes or not self["start_at_launch"]:
             return
-        proc_info = self._processes[index]
-        if flag and proc_info["_status"] == "stopped":
+        proc_info = self._processes.get(index)
+        if proc_info is None:
+            return
+        if flag and proc_info.state == ProcessState.STOPPED:
+            return
+        if proc_info.state == ProcessState.BACKOFF:
             return
-        exit_code = proc_info["_popen"].poll()
+        exit_code = proc_info.popen.poll()
         if exit_code is None:
             return
         restart_needed = False
@@ -271,32 +1051,73 @@ class ProgramProcess(BaseUtils, dict):
         elif self._restart_policy == "never":
             restart_needed = False
         if restart_needed:
-            restarts = proc_info.get("_restarts", 0)
+            restarts = proc_info.restarts
             if restarts < self._max_restarts:
-                logger.info(
-                    f"{self.YELLOW}Restarting process index {index}...{self.END}"
-                )
-                self._processes[index] = self._initProcess(
-                    name_proc=self["name"], index=index
-                )
-                self._processes[index]["_restarts"] = restarts + 1
+                self._scheduleRestart(index, proc_info)
             else:
                 if self._log_restart_fails:
                     self._log_restart_fails = False
-                    proc_info["_exit_code"] = exit_code
+                    proc_info.exit_code = exit_code
                     logger.info(
                         f"{self.RED}Max restarts reached for process index {index}{self.END}"
                     )
         else:
-            proc_info["_status"] = "closed"
-            proc_info["_exit_code"] = exit_code
+            self._setStatus(proc_info, ProcessState.CLOSED)
+            proc_info.exit_code = exit_code
             # logger.info(
             #     f"Process index {index} exited normally with code {exit_code}"
             # )
 
+    def _scheduleRestart(self, index, proc_info):
+        """
+        Put a dead process in "backoff" and restart it from the reaper timer
+        heap once its delay expires, so a crash loop neither spins the
+        supervisor nor hammers the program's dependencies.
+        """
+        uptime = time.time() - proc_info.start_time
+        attempt = self._backoff.nextAttempt(proc_info.backoff, uptime)
+        delay = self._backoff.delay(attempt)
+        proc_info.backoff = attempt
+        self._setStatus(proc_info, ProcessState.BACKOFF)
+        self._logEvent("backoff", proc_info, delay=round(delay, 3), attempt=attempt)
+        proc_info.backoff_timer = REAPER.schedule(
+            delay, self._onBackoffExpired, index, proc_info.pid
+        )
+        logger.info(
+            f"{self.YELLOW}Restarting process index {index} in {delay:.2f}s...{self.END}"
+        )
+
+    def _onBackoffExpired(self, index, pid):
+        proc_info = self._processes.get(index)
+        if proc_info is None or proc_info.pid != pid:
+            return
+        if proc_info.state != ProcessState.BACKOFF:
+            return
+        try:
+            new_process = self._spawnProcess(index, restarts=proc_info.restarts + 1)
+        except ValueError as e:
+            # E.g. the executable is being replaced or fork hit EAGAIN: a
+            # failed restart, retried after the next delay until max_restarts
+            logger.error(e)
+            proc_info.restarts += 1
+            proc_info.backoff += 1
+            proc_info.start_time = time.time()
+            if proc_info.restarts < self._max_restarts:
+                self._scheduleRestart(index, proc_info)
+            else:
+                self._setStatus(proc_info, ProcessState.EXITED)
+                logger.info(
+                    f"{self.RED}Max restarts reached for process index {index}{self.END}"
+                )
+            return
+        new_process.backoff = proc_info.backoff + 1
+
     def restartProcess(self, flag=None, cmd_terminal=False):
-        if cmd_terminal:
+        if cmd_terminal and self.get("restart_mode") == "rolling" and self._processes:
+            self._rollingRestart(self._liveIndexes())
+        elif cmd_terminal:
             self.stopProcess()
+            indexes = []
             for index in range(1, self._num_proc + 1):
                 logger.info(
                     f"{self.YELLOW}Restarting process index {index}...{self.END}"
@@ -304,37 +1125,231 @@ class ProgramProcess(BaseUtils, dict):
                 proc = self._processes.get(index, None)
                 if proc is None:
                     continue
-                new = self._initProcess(name_proc=self["name"], index=index)
-                self._processes.update({index: new})
+                indexes.append(index)
+            self._spawnBatch(indexes)
         else:
             for index in range(1, self._num_proc + 1):
                 self._restartProcessIfNeeded(index, flag)
 
     def rebootProcess(self):
+        indexes = []
         for index in range(1, self._num_proc + 1):
             proc = self._processes.get(index, None)
             if proc is None:
                 continue
-            if proc["_status"] != "running" and proc["_status"] != "starting":
-                new = self._initProcess(name_proc=self["name"], index=index)
-                self._processes.update({index: new})
+            if proc.state not in ALIVE_STATES:
+                indexes.append(index)
+        self._spawnBatch(indexes)
 
-    def getStatus(self, process_id=None):
-        if not self._processes:
-            return
-        for index in range(1, self._num_proc + 1):
-            proc = self._processes[index]
-            if process_id is None or proc['_pid'] == process_id:
-                status = proc["_status"]
-                pid = proc['_pid']
-                start_time = time.strftime(
-                    "%Y-%m-%d %H:%M:%S", time.localtime(proc["_start_time"])
+    def snapshotState(self, inherit=False) -> dict:
+        """
+        The state of every process for the state snapshot. With inherit the
+        output pipes are made inheritable and their fds recorded, so that
+        they survive an exec of the supervisor.
+        """
+        processes = []
+        for record in self._processes.values():
+            entry = {
+                "index": record.index,
+                "pid": record.pid,
+                "state": str(record.state),
+                "start_time": record.start_time,
+                "restarts": record.restarts,
+                "backoff": record.backoff,
+                "exit_code": record.exit_code,
+            }
+            if record.state in ALIVE_STATES or record.state == ProcessState.STOPPING:
+                # Read once: the PID and its start time identify the process
+                if record.proc_start is None:
+                    record.proc_start = readStartTime(record.pid)
+                entry["proc_start"] = record.proc_start
+                if inherit:
+                    entry["fds"] = [
+                        self._inheritFd(record.popen.stdout),
+                        self._inheritFd(record.popen.stderr),
+                    ]
+            processes.append(entry)
+        return {"restarts": self._summary.restarts, "processes": processes}
+
+    @staticmethod
+    def _inheritFd(stream):
+        if stream is None or stream.closed:
+            return None
+        try:
+            fd = stream.fileno()
+            os.set_inheritable(fd, True)
+        except (OSError, ValueError):
+            return None
+        return fd
+
+    @staticmethod
+    def _openInherited(fds) -> list:
+        streams = []
+        for fd in fds or (None, None):
+            if fd is None:
+                streams.append(None)
+                continue
+            os.set_inheritable(fd, False)
+            streams.append(os.fdopen(fd, "rb"))
+        return streams
+
+    def adoptProcesses(self, state: dict, inherit=False):
+        """
+        Take over the processes of a previous supervisor from its state
+        snapshot instead of spawning new ones. A live process is only
+        adopted if its PID still runs with the recorded /proc start time,
+        so that a reused PID is never mistaken for it; the ones that are
+        gone are started again, as after a crash. Stopped and exited
+        processes stay so, pending backoff restarts are scheduled again.
+        With inherit (after an exec of this very process) the recorded
+        output pipes are read again.
+        """
+        self._prepareSpawn()
+        entries = {entry["index"]: entry for entry in state.get("processes", ())}
+        with REAPER.lock:
+            self._summary.restarts = state.get("restarts", 0)
+            for index in range(1, self._num_proc + 1):
+                entry = entries.pop(index, None)
+                if entry is not None:
+                    self._adoptProcess(entry, inherit)
+                elif self["start_at_launch"]:
+                    self._spawnProcess(index)
+        if inherit:
+            # Past processes of a scale down: nothing reads them anymore
+            for entry in entries.values():
+                for stream in self._openInherited(entry.get("fds")):
+                    if stream is not None:
+                        stream.close()
+
+    def _adoptProcess(self, entry, inherit):
+        index, pid = entry["index"], entry["pid"]
+        state = ProcessState[entry["state"].upper()]
+        alive = state in ALIVE_STATES or state == ProcessState.STOPPING
+        if alive:
+            streams = self._openInherited(entry.get("fds")) if inherit else [None, None]
+            popen = None
+            if entry.get("proc_start") is not None and (
+                readStartTime(pid) == entry["proc_start"]
+            ):
+                try:
+                    popen = AdoptedProcess(pid, *streams)
+                except OSError:
+                    popen = None
+            if popen is None:
+                for stream in streams:
+                    if stream is not None:
+                        stream.close()
+                logger.warning(
+                    f"{self.YELLOW}Program '{self['name']}', Process index {index} "
+                    f"(PID: {pid}) is gone, starting it again{self.END}"
                 )
-                exit_code = proc.get("_exit_code", "N/A")
-                restarts = proc.get("_restarts", 0)
-                print(
-                    f"Program:{self['name']} Process index: {index}, PID: {pid}, Status: {status}, Start Time: {start_time}, Exit Code: {exit_code}, Restarts: {restarts}"
+                self._spawnProcess(index, restarts=entry["restarts"] + 1)
+                return
+            _, _, writers = self._outputTargets(index)
+            record = ProcessRecord(index, popen, writers, entry["start_time"])
+            record.proc_start = entry["proc_start"]
+            # A stop in progress is not resumed, the process is just running
+            if state != ProcessState.STARTING:
+                record.state = ProcessState.RUNNING
+                record.successful = True
+        else:
+            exit_code = entry["exit_code"]
+            popen = AdoptedProcess(
+                pid,
+                returncode=UNKNOWN_EXIT_CODE if exit_code is None else exit_code,
+            )
+            record = ProcessRecord(index, popen, start_time=entry["start_time"])
+            record.state = state
+            record.exit_code = exit_code
+        record.restarts = entry["restarts"]
+        record.backoff = entry["backoff"]
+        self._summary.add(record.state)
+        self._processes.set(index, record)
+        STATE_SNAPSHOT.changed()
+        self._logEvent("adopted", record, state=str(record.state))
+        if state == ProcessState.BACKOFF:
+            record.backoff_timer = REAPER.schedule(
+                self._backoff.delay(record.backoff), self._onBackoffExpired, index, pid
+            )
+        if not alive:
+            return
+        self._captureOutput(index, popen, record.writers)
+        if record.state == ProcessState.STARTING:
+            remaining = self._success_timeout - (time.time() - record.start_time)
+            record.startup_timer = REAPER.schedule(
+                max(0.0, remaining), self._onStartupDeadline, index, pid
+            )
+        if popen.returncode is not None:
+            # Exited while the supervisor was being replaced
+            self._onProcessExit(index, pid, popen.returncode)
+        else:
+            REAPER.register(
+                pid, popen, functools.partial(self._onProcessExit, index, pid)
+            )
+
+    def detach(self):
+        """
+        Leave the processes running when this program goes away, e.g. when
+        the supervisor exits to be replaced by one that adopts them.
+        """
+        self._detached = True
+        self._rolling = None
+        REAPER.cancel(self._watchdog_timer)
+        self._watchdog_timer = None
+        for proc_info in self._processes.values():
+            REAPER.unregister(proc_info.pid)
+            for timer in (
+                proc_info.startup_timer,
+                proc_info.kill_timer,
+                proc_info.backoff_timer,
+            ):
+                REAPER.cancel(timer)
+
+    def statusRecords(self, process_id=None) -> list:
+        if process_id is not None:
+            proc = self._processes.byPid(process_id)
+            procs = [proc] if proc is not None and proc.index <= self._num_proc else []
+        else:
+            procs = [self._processes.get(i) for i in range(1, self._num_proc + 1)]
+        records = []
+        for proc in procs:
+            if proc is not None:
+                records.append(
+                    {
+                        "program": self['name'],
+                        "index": proc.index,
+                        "pid": proc.pid,
+                        "status": str(proc.state),
+                        "start_time": proc.start_time,
+                        "exit_code": proc.exit_code,
+                        "restarts": proc.restarts,
+                        "resources": SAMPLER.get(proc.pid),
+                    }
                 )
+        return records
+
+    def statusLines(self, process_id=None) -> list:
+        lines = []
+        for record in self.statusRecords(process_id):
+            start_time = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(record["start_time"])
+            )
+            exit_code = record["exit_code"]
+            line = f"Program:{record['program']} Process index: {record['index']}, PID: {record['pid']}, Status: {record['status']}, Start Time: {start_time}, Exit Code: {'N/A' if exit_code is None else exit_code}, Restarts: {record['restarts']}"
+            resources = record["resources"]
+            if resources is not None:
+                line += f", CPU: {resources['cpu_percent']}%, RSS: {resources['rss'] / 1048576:.1f} MiB"
+            lines.append(line)
+        return lines
+
+    def summary(self) -> dict:
+        summary = self._summary.asDict()
+        summary["resources"] = SAMPLER.programTotals(self["name"])
+        return summary
+
+    def getStatus(self, process_id=None):
+        for line in self.statusLines(process_id):
+            print(line)
 
     def startProcess(self):
         start_at_launch = self.get("start_at_launch")
@@ -346,57 +1361,4 @@ class ProgramProcess(BaseUtils, dict):
             )
 
     def stopProcess(self, index=None, pid=None, flag=None):
-        self._stop_timeout = self.get("stop_timeout")
-        self._stop_signal = self._getStopSignal()
-
-        if index is not None or pid is not None:
-            stop = self._getProcess(index, pid)
-            if stop is None:
-                return
-            if stop["_status"] != "running" or stop["_status"] != "starting":
-                return
-            logger.debug(stop)
-            try:
-                process = stop["_popen"]
-                self._stopSingleProcess(process)
-                stop["_status"] = "stopped"
-                stop["_exit_code"] = process.returncode
-                stop["stop_time"] = time.time()
-                stop["_stop_signal_used"] = self._stop_timeout
-            except Exception as err:
-                raise ValueError(
-                    f"{self.ERROR} stopping process: {stop['_pid']}: {err}"
-                )
-
-        elif self["start_at_launch"]:
-            self._stopAllProcess()
-        elif flag is not None:
-            self._stopAllProcess()
-
-    def check_startup_timeouts(self):
-        current_time = time.time()
-        for index in range(1, self._num_proc + 1):
-            proc_info = self._processes.get(index)
-            if not proc_info:
-                continue
-
-            if proc_info["_status"] == "starting":
-                proc = proc_info["_popen"]
-
-                if proc.poll() is not None:
-                    proc_info["_status"] = "exited"
-                    proc_info["_successful"] = False
-                    logger.warning(
-                        f"{self.RED}Program '{self['name']}', Process index {index} exited "
-                        f"before reaching success_timeout ({self._success_timeout}s).{self.END}"
-                    )
-                    continue
-
-                elapsed_time = current_time - proc_info["_start_time"]
-                if elapsed_time >= self._success_timeout:
-                    proc_info["_status"] = "running"
-                    proc_info["_successful"] = True
-                    logger.info(
-                        f"{self.GREEN}Program '{self['name']}', Process index {index} "
-                        f"has successfully started after {self._success_timeout}s.{self.END}"
-                    )
+        self.waitStopped(self._stopTargets(index, pid, flag))
@@ -0,0 +1,388 @@
+import atexit
+import ctypes
+import heapq
+import itertools
+import os
+import selectors
+import signal
+import threading
+import time
+
+from Constants import REAPER_ADOPT_GRACE, REAPER_POLL_INTERVAL, REAPER_RETRY_DELAY
+from Logger import LOGGER as logger
+from Tracer import TRACER
+
+# From <linux/prctl.h>
+PR_SET_CHILD_SUBREAPER = 36
+
+
+class Reaper:
+    """
+    Event-driven child reaper with a deadline queue.
+
+    Instead of polling every managed Popen once per second, a single thread
+    sleeps on a self-pipe installed as the signal wakeup fd, which the C
+    signal handler writes to as soon as SIGCHLD arrives, whatever thread the
+    kernel delivers it to. On wake-up it
+    asks the kernel which children have exited with
+    ``os.waitid(P_ALL, WEXITED | WNOHANG | WNOWAIT)`` and only touches those,
+    so an idle supervisor costs nothing regardless of the number of children.
+
+    The actual reaping is left to ``Popen.poll()`` so that the Popen objects
+    stay consistent with any concurrent ``Popen.wait()`` in the stop paths.
+
+    Timers (e.g. the ``success_timeout`` transition) are kept in a heap and
+    the thread sleeps exactly until the next deadline.
+
+    Processes adopted from a previous supervisor that are not our children
+    send no SIGCHLD: their registered Popen stand-in carries a pidfd, which
+    is watched next to the self-pipe and becomes readable when they exit.
+
+    With the asyncio core the same work is driven by the event loop instead
+    of a thread: SIGCHLD goes through ``loop.add_signal_handler`` (asyncio
+    owns the signal wakeup fd then), the self-pipe becomes a loop reader
+    and the next deadline a ``call_later``.
+
+    Methods:
+        start(): Install the SIGCHLD hook and start the reaper thread.
+        attach(loop): Run the reaper from an asyncio loop instead of a thread.
+        stop(): Stop the reaper thread and restore the previous handler.
+        register(pid, popen, on_exit): Call on_exit(exit_code) when pid exits.
+        unregister(pid): Forget a pid, its exit will not be reported.
+        waitExit(timeout): Wait until the next handled child exit.
+        schedule(delay, callback, *args): Run callback after delay seconds.
+        cancel(timer_id): Cancel a timer returned by schedule().
+        drain(): Handle every child that has already exited.
+        runTimers(): Run the timers whose deadline has passed.
+        setSubreaper(enabled): Adopt the orphans of the managed process trees.
+    """
+
+    def __init__(self):
+        self._children = {}
+        self._strangers = {}
+        self._timers = []
+        # Ids of the timers still due: a cancelled one is only dropped from
+        # the heap when it reaches the top, a fired one is not kept at all
+        self._pending = set()
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self._exited = threading.Condition(self._lock)
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._pidfds = {}
+        self._thread = None
+        self._running = False
+        self._sigchld_hooked = False
+        self._prev_handler = None
+        self._prev_wakeup_fd = -1
+        self._retry = False
+        self._event_loop = None
+        self._loop_timer = None
+        self._adopt_grace = REAPER_ADOPT_GRACE
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        if threading.current_thread() is threading.main_thread():
+            self._prev_handler = signal.signal(signal.SIGCHLD, self._handleSigchld)
+            self._prev_wakeup_fd = signal.set_wakeup_fd(
+                self._wakeup_w, warn_on_full_buffer=False
+            )
+            self._sigchld_hooked = True
+        else:
+            logger.warning(
+                "Reaper started outside the main thread, "
+                f"falling back to a {REAPER_POLL_INTERVAL}s wait poll"
+            )
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        # Join the thread before finalization freezes it, maybe holding the lock
+        atexit.register(self.stop)
+        # Children spawned before the hook was installed may already be gone
+        self.wake()
+        logger.info("Started child reaper thread.")
+
+    def attach(self, loop):
+        if self._running:
+            return
+        self._running = True
+        self._event_loop = loop
+        loop.add_signal_handler(signal.SIGCHLD, self._onLoopWakeup)
+        loop.add_reader(self._wakeup_r, self._onLoopWakeup)
+        for pidfd in list(self._pidfds):
+            loop.add_reader(pidfd, self._handlePidfd, pidfd)
+        self._sigchld_hooked = True
+        self._onLoopWakeup()
+        logger.info("Child reaper attached to the event loop.")
+
+    def _onLoopWakeup(self):
+        self._clearWakeup()
+        try:
+            with TRACER.span("reaper.tick"):
+                self.drain()
+                self.runTimers()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+        if self._loop_timer is not None:
+            self._loop_timer.cancel()
+            self._loop_timer = None
+        timeout = self._nextTimeout()
+        if timeout is not None and self._running:
+            self._loop_timer = self._event_loop.call_later(timeout, self._onLoopWakeup)
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        if self._event_loop is not None:
+            if self._loop_timer is not None:
+                self._loop_timer.cancel()
+                self._loop_timer = None
+            self._event_loop.remove_reader(self._wakeup_r)
+            for pidfd in list(self._pidfds):
+                self._event_loop.remove_reader(pidfd)
+            self._event_loop.remove_signal_handler(signal.SIGCHLD)
+            self._event_loop = None
+            self._sigchld_hooked = False
+            return
+        self.wake()
+        current = threading.current_thread()
+        if self._thread is not None and self._thread is not current:
+            self._thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+        if self._sigchld_hooked and current is threading.main_thread():
+            signal.set_wakeup_fd(self._prev_wakeup_fd)
+            signal.signal(signal.SIGCHLD, self._prev_handler or signal.SIG_DFL)
+            self._sigchld_hooked = False
+
+    def _handleSigchld(self, signum, frame):
+        # The wakeup fd has already been written by the C handler
+        pass
+
+    def wake(self):
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except (BlockingIOError, OSError):
+            # Pipe already full: the reaper is going to wake up anyway
+            pass
+
+    def register(self, pid, popen, on_exit):
+        with self._lock:
+            self._children[pid] = (popen, on_exit)
+            pidfd = getattr(popen, "pidfd", None)
+            if pidfd is not None:
+                self._watch(pidfd, popen)
+            if self._strangers.pop(pid, None) is not None:
+                self.wake()
+
+    def unregister(self, pid):
+        with self._lock:
+            child = self._children.pop(pid, None)
+            pidfd = getattr(child[0], "pidfd", None) if child else None
+            if pidfd in self._pidfds:
+                self._unwatch(pidfd)
+
+    def _watch(self, pidfd, popen):
+        self._pidfds[pidfd] = popen
+        self._selector.register(pidfd, selectors.EVENT_READ, popen)
+        if self._event_loop is not None:
+            self._event_loop.add_reader(pidfd, self._handlePidfd, pidfd)
+
+    def _unwatch(self, pidfd):
+        popen = self._pidfds.pop(pidfd)
+        self._selector.unregister(pidfd)
+        if self._event_loop is not None:
+            self._event_loop.remove_reader(pidfd)
+        os.close(pidfd)
+        popen.pidfd = None
+
+    def _handlePidfd(self, pidfd):
+        """An adopted process that is not our child has exited."""
+        with self._lock:
+            popen = self._pidfds.get(pidfd)
+            if popen is None:
+                return
+            child = self._children.pop(popen.pid, None)
+            exit_code = popen.poll()
+            self._unwatch(pidfd)
+            if child is not None and child[0] is popen:
+                child[1](exit_code)
+                self._exited.notify_all()
+
+    def waitExit(self, timeout):
+        """Block until the reaper handles a child exit or timeout expires."""
+        with self._exited:
+            self._exited.wait(timeout)
+
+    def schedule(self, delay, callback, *args) -> int:
+        timer_id = next(self._seq)
+        with self._lock:
+            heapq.heappush(
+                self._timers, (time.monotonic() + delay, timer_id, callback, args)
+            )
+            self._pending.add(timer_id)
+            # Only a new earliest deadline changes how long the thread sleeps
+            earliest = self._timers[0][1] == timer_id
+        if earliest:
+            self.wake()
+        return timer_id
+
+    def cancel(self, timer_id):
+        if timer_id is None:
+            return
+        with self._lock:
+            self._pending.discard(timer_id)
+
+    def _nextTimeout(self):
+        with self._lock:
+            while self._timers and self._timers[0][1] not in self._pending:
+                heapq.heappop(self._timers)
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+        if self._retry:
+            timeout = (
+                REAPER_RETRY_DELAY
+                if timeout is None
+                else min(timeout, REAPER_RETRY_DELAY)
+            )
+        if not self._sigchld_hooked:
+            timeout = (
+                REAPER_POLL_INTERVAL
+                if timeout is None
+                else min(timeout, REAPER_POLL_INTERVAL)
+            )
+        return timeout
+
+    def _loop(self):
+        while self._running:
+            try:
+                timeout = self._nextTimeout()
+                ready = self._selector.select(timeout)
+                with TRACER.span("reaper.tick"):
+                    for key, _ in ready:
+                        if key.data is None:
+                            self._clearWakeup()
+                        else:
+                            self._handlePidfd(key.fd)
+                    self.drain()
+                    self.runTimers()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+
+    def _clearWakeup(self):
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def drain(self):
+        self._retry = False
+        while True:
+            try:
+                info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            except ChildProcessError:
+                return
+            if info is None or info.si_pid == 0:
+                return
+            if not self._handleExit(info.si_pid):
+                # The first exited child has to wait (an unregistered one in
+                # its grace period, a busy Popen): P_ALL would keep reporting
+                # it, so the registered children are checked one by one
+                self._drainRegistered()
+                return
+
+    def _drainRegistered(self):
+        with self._lock:
+            pids = list(self._children)
+        for pid in pids:
+            try:
+                info = os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            except ChildProcessError:
+                # Adopted from another supervisor, watched through its pidfd
+                continue
+            if info is not None and info.si_pid != 0:
+                self._handleExit(pid)
+
+    def _handleExit(self, pid) -> bool:
+        """
+        Handle an exited child. Returns False when it has to be left for
+        later, still unreaped.
+        """
+        with self._lock:
+            child = self._children.pop(pid, None)
+        if child is None:
+            return self._handleStranger(pid)
+        popen, on_exit = child
+        exit_code = popen.poll()
+        if exit_code is None:
+            # Another thread holds the Popen wait lock, try again shortly
+            with self._lock:
+                self._children.setdefault(pid, child)
+            self._retry = True
+            return False
+        with self._lock:
+            on_exit(exit_code)
+            self._exited.notify_all()
+        return True
+
+    def _handleStranger(self, pid) -> bool:
+        """
+        An exited child that nobody registered. Most of the time it is a
+        process whose Popen has not been registered yet, so give its owner
+        a short grace period before collecting it ourselves. Returns whether
+        it was collected.
+        """
+        now = time.monotonic()
+        first_seen = self._strangers.setdefault(pid, now)
+        if now - first_seen < self._adopt_grace:
+            self._retry = True
+            return False
+        self._strangers.pop(pid, None)
+        try:
+            os.waitpid(pid, os.WNOHANG)
+            logger.debug("Reaped unmanaged child (PID: %s)", pid)
+        except ChildProcessError:
+            pass
+        return True
+
+    def setSubreaper(self, enabled: bool = True):
+        """
+        Become (or stop being) the child subreaper: orphans of the managed
+        process trees are reparented to the supervisor instead of init.
+        They are collected as soon as they exit, without the grace period
+        left to unregistered Popens: every program is spawned under the
+        reaper lock and registered before the lock is released, so an
+        unknown child seen under the lock is never one of ours.
+        """
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_CHILD_SUBREAPER, int(enabled), 0, 0, 0) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"PR_SET_CHILD_SUBREAPER: {os.strerror(errno)}")
+        self._adopt_grace = 0.0 if enabled else REAPER_ADOPT_GRACE
+        logger.info(f"Child subreaper {'enabled' if enabled else 'disabled'}.")
+
+    def runTimers(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._timers or self._timers[0][0] > now:
+                    return
+                _, timer_id, callback, args = heapq.heappop(self._timers)
+                if timer_id not in self._pending:
+                    continue
+                self._pending.discard(timer_id)
+                callback(*args)
+
+
+REAPER = Reaper()
@@ -0,0 +1,3 @@
+from .Reaper import REAPER, Reaper
+
+__all__ = ["Reaper", "REAPER"]
@@ -0,0 +1,301 @@
+import atexit
+import errno
+import os
+import resource
+import sys
+import threading
+import time
+
+from Constants import SAMPLE_EWMA_ALPHA, SAMPLE_INTERVAL
+from Logger import LOGGER as logger
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+# Large enough for /proc/<pid>/stat, schedstat, statm and io
+READ_SIZE = 1024
+# schedstat is about 3x cheaper for the kernel to produce than stat and
+# has ns precision, stat is the fallback for kernels without schedstats
+CPU_FILE = "schedstat" if os.path.exists("/proc/self/schedstat") else "stat"
+
+
+class ProcessSample:
+    """Latest resource figures of one process, plus its EWMA."""
+
+    __slots__ = (
+        "program",
+        "index",
+        "cpu_time",
+        "cpu_percent",
+        "cpu_avg",
+        "rss",
+        "rss_avg",
+        "read_bytes",
+        "write_bytes",
+        "time",
+    )
+
+    def __init__(self, program, index):
+        self.program = program
+        self.index = index
+        self.cpu_time = None
+        self.cpu_percent = 0.0
+        self.cpu_avg = 0.0
+        self.rss = 0
+        self.rss_avg = 0.0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        self.time = None
+
+    def asDict(self) -> dict:
+        return {
+            "cpu_percent": round(self.cpu_percent, 2),
+            "cpu_avg": round(self.cpu_avg, 2),
+            "rss": self.rss,
+            "rss_avg": int(self.rss_avg),
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+        }
+
+
+def parseStat(data: bytes) -> float:
+    """utime + stime seconds from /proc/<pid>/stat."""
+    # comm may contain spaces and parentheses, the fields start after the last ")"
+    fields = data[data.rindex(b")") + 2 :].split(b" ", 14)
+    return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+def parseStartTime(data: bytes) -> int:
+    """Start time in clock ticks after boot (field 22) from /proc/<pid>/stat."""
+    return int(data[data.rindex(b")") + 2 :].split(b" ", 20)[19])
+
+
+def readStartTime(pid):
+    """
+    Start time of a PID, which together with the PID identifies a process
+    even after the PID has been reused. None once it is gone.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat:
+            return parseStartTime(stat.read())
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def parseSchedstat(data: bytes) -> float:
+    """On-CPU seconds from /proc/<pid>/schedstat."""
+    return int(data[: data.index(b" ")]) / 1e9
+
+
+def parseCpu(data: bytes) -> float:
+    """On-CPU seconds from whichever file CPU_FILE names."""
+    return parseSchedstat(data) if CPU_FILE == "schedstat" else parseStat(data)
+
+
+def parseStatm(data: bytes) -> int:
+    """Resident set size in bytes from /proc/<pid>/statm."""
+    return int(data.split(b" ", 2)[1]) * PAGE_SIZE
+
+
+def readRss(pid):
+    """Current RSS in bytes of a PID, None once it is gone."""
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as statm:
+            return parseStatm(statm.read())
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def parseIo(data: bytes) -> tuple:
+    """(read_bytes, write_bytes) from /proc/<pid>/io."""
+    start = data.find(b"\nread_bytes: ") + 13
+    read_bytes = int(data[start : data.index(b"\n", start)]) if start > 12 else 0
+    start = data.find(b"\nwrite_bytes: ") + 14
+    write_bytes = int(data[start : data.index(b"\n", start)]) if start > 13 else 0
+    return read_bytes, write_bytes
+
+
+class ResourceSampler:
+    """
+    Periodic /proc sampler of every managed process.
+
+    One thread walks the supervisor-wide PID index every interval and reads
+    ``/proc/<pid>/schedstat`` (or ``stat``), ``statm`` and ``io``. The files
+    are opened once per process and re-read with ``os.preadv`` into a single
+    reused buffer, so a pass is three syscalls per process.
+    At most half of the fd limit goes to cached files: the processes beyond
+    that, or past an EMFILE, are read without caching instead of failing.
+    The limit itself is left alone, the programs would inherit a raised one.
+
+    CPU% comes from the on-CPU time delta between two passes. Each process
+    keeps an exponentially weighted average of its CPU% and RSS, and every
+    pass also builds the per-program totals.
+
+    Methods:
+        start(pid_index, interval): Start sampling the PIDs of pid_index.
+        stop(): Stop the sampler thread and close the cached fds.
+        sample(): Run one pass now.
+        get(pid): Latest figures of a PID as a dict, or None.
+        programTotals(program=None): Per-program aggregates.
+    """
+
+    def __init__(self):
+        self._pid_index = None
+        self._interval = SAMPLE_INTERVAL
+        self._fds = {}
+        self._samples = {}
+        self._totals = {}
+        self._buf = bytearray(READ_SIZE)
+        self._bufs = [self._buf]
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._cache_fds = True
+        self._max_cached = self._fdBudget()
+        self.last_duration = 0.0
+
+    def start(self, pid_index, interval=SAMPLE_INTERVAL):
+        if self._thread is not None or not interval:
+            return
+        self._pid_index = pid_index
+        self._interval = interval
+        self._max_cached = self._fdBudget()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Started resource sampler ({interval}s interval).")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+        with self._lock:
+            for pid in list(self._fds):
+                self._close(pid)
+
+    @staticmethod
+    def _fdBudget() -> int:
+        # Processes whose three files may stay open
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        if soft == resource.RLIM_INFINITY:
+            return sys.maxsize
+        return soft // 2 // 3
+
+    def _loop(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+
+    def _open(self, pid):
+        fds = []
+        try:
+            for name in (CPU_FILE, "statm", "io"):
+                fds.append(os.open(f"/proc/{pid}/{name}", os.O_RDONLY | os.O_CLOEXEC))
+        except OSError:
+            for fd in fds:
+                os.close(fd)
+            raise
+        return fds
+
+    def _close(self, pid):
+        for fd in self._fds.pop(pid, ()):
+            os.close(fd)
+
+    def _readProcess(self, pid):
+        fds = self._fds.get(pid)
+        cached = fds is not None
+        if not cached:
+            fds = self._open(pid)
+            if self._cache_fds and len(self._fds) < self._max_cached:
+                self._fds[pid] = fds
+                cached = True
+        buf, bufs = self._buf, self._bufs
+        try:
+            cpu = parseCpu(buf[: os.preadv(fds[0], bufs, 0)])
+            rss = parseStatm(buf[: os.preadv(fds[1], bufs, 0)])
+            return cpu, rss, parseIo(buf[: os.preadv(fds[2], bufs, 0)])
+        finally:
+            if not cached:
+                for fd in fds:
+                    os.close(fd)
+
+    def sample(self):
+        start = time.monotonic()
+        pids = self._pid_index.snapshot()
+        samples, totals = {}, {}
+        with self._lock:
+            for pid in set(self._fds) - pids.keys():
+                self._close(pid)
+            for pid, (program, index) in pids.items():
+                try:
+                    cpu_time, rss, (read_bytes, write_bytes) = self._readProcess(pid)
+                except OSError as e:
+                    if e.errno in (errno.EMFILE, errno.ENFILE) and self._cache_fds:
+                        logger.warning("Out of fds, sampling without cached files")
+                        self._cache_fds = False
+                    # Gone or not readable anymore
+                    self._close(pid)
+                    continue
+                except (ValueError, IndexError):
+                    continue
+                now = time.monotonic()
+                previous = self._samples.get(pid)
+                if previous is None or previous.program != program:
+                    current = ProcessSample(program, index)
+                else:
+                    current = previous
+                if current.cpu_time is not None and now > current.time:
+                    elapsed = now - current.time
+                    current.cpu_percent = (
+                        100.0 * (cpu_time - current.cpu_time) / elapsed
+                    )
+                    current.cpu_avg += SAMPLE_EWMA_ALPHA * (
+                        current.cpu_percent - current.cpu_avg
+                    )
+                    current.rss_avg += SAMPLE_EWMA_ALPHA * (rss - current.rss_avg)
+                else:
+                    current.rss_avg = rss
+                current.cpu_time = cpu_time
+                current.time = now
+                current.rss = rss
+                current.read_bytes = read_bytes
+                current.write_bytes = write_bytes
+                samples[pid] = current
+                total = totals.setdefault(
+                    program,
+                    {
+                        "processes": 0,
+                        "cpu_percent": 0.0,
+                        "rss": 0,
+                        "read_bytes": 0,
+                        "write_bytes": 0,
+                    },
+                )
+                total["processes"] += 1
+                total["cpu_percent"] += current.cpu_percent
+                total["rss"] += rss
+                total["read_bytes"] += read_bytes
+                total["write_bytes"] += write_bytes
+            for total in totals.values():
+                total["cpu_percent"] = round(total["cpu_percent"], 2)
+            self._samples = samples
+            self._totals = totals
+        self.last_duration = time.monotonic() - start
+
+    def get(self, pid):
+        current = self._samples.get(pid)
+        return current.asDict() if current is not None else None
+
+    def programTotals(self, program=None):
+        if program is not None:
+            return self._totals.get(program)
+        return dict(self._totals)
+
+
+SAMPLER = ResourceSampler()
@@ -0,0 +1,9 @@
+from .ResourceSampler import (
+    SAMPLER,
+    ProcessSample,
+    ResourceSampler,
+    readRss,
+    readStartTime,
+)
+
+__all__ = ["ResourceSampler", "ProcessSample", "SAMPLER", "readRss", "readStartTime"]
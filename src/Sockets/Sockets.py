@@ -0,0 +1,257 @@
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+
+from Constants import SOCKET_BACKLOG
+from Logger import LOGGER as logger
+
+# First fd of the passed listeners, as in systemd's SD_LISTEN_FDS_START
+LISTEN_FDS_START = 3
+# Environment variable carrying the listener fds across a supervisor reexec
+INHERIT_ENV = "TASKMASTER_LISTENERS"
+
+# Run between fork and the program's exec when listeners are passed: Popen
+# can only keep fds open, not renumber them, so this moves them to 3, 4, ...
+# (going through fds above that range first, since the two may overlap)
+_LAUNCHER = """\
+import fcntl, os, sys
+fds = [int(fd) for fd in sys.argv[1].split(",")]
+moved = [fcntl.fcntl(fd, fcntl.F_DUPFD, %(start)d + len(fds)) for fd in fds]
+for fd in fds:
+    os.close(fd)
+for target, fd in enumerate(moved, %(start)d):
+    os.dup2(fd, target)
+    os.close(fd)
+os.environ["LISTEN_PID"] = str(os.getpid())
+try:
+    os.execv(sys.argv[2], sys.argv[3:])
+except OSError as e:
+    sys.stderr.write(f"{sys.argv[2]}: {e.strerror}\\n")
+    os._exit(127)
+"""
+LAUNCHER = _LAUNCHER % {"start": LISTEN_FDS_START}
+
+
+def _splitAddress(address: str) -> tuple:
+    """Socket family and bind address of a tcp://host:port or unix:///path."""
+    scheme, sep, target = address.partition("://")
+    if not sep or scheme not in ("tcp", "unix"):
+        raise ValueError(f"Invalid socket address {address!r}: use tcp:// or unix://")
+    if scheme == "unix":
+        if not target:
+            raise ValueError(f"Invalid socket address {address!r}: missing path")
+        return socket.AF_UNIX, target
+    host, sep, port = target.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        port = -1
+    if not sep or not 0 <= port <= 65535:
+        raise ValueError(f"Invalid socket address {address!r}: missing port")
+    host = host.strip("[]")
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    return family, (host, port)
+
+
+def parseSocket(spec) -> dict:
+    """
+    Normalized entry of a program's "sockets" list, given either as an
+    address or as a dict with address, name, backlog and mode (permissions
+    of a Unix socket file).
+    """
+    if not isinstance(spec, dict):
+        spec = {"address": spec}
+    unknown = set(spec) - {"address", "name", "backlog", "mode"}
+    if unknown:
+        raise ValueError(f"Unknown socket options: {', '.join(sorted(unknown))}")
+    address = str(spec.get("address") or "").strip()
+    family, target = _splitAddress(address)
+    if family == socket.AF_UNIX:
+        address = "unix://" + os.path.abspath(os.path.expanduser(target))
+    name = spec.get("name")
+    if name is not None:
+        name = str(name)
+        # LISTEN_FDNAMES is a colon separated list
+        if not name or ":" in name or len(name) > 255:
+            raise ValueError(f"Invalid socket name {name!r}")
+    backlog = int(spec.get("backlog", SOCKET_BACKLOG))
+    if backlog < 1:
+        raise ValueError("Socket backlog must be at least 1")
+    mode = spec.get("mode")
+    if mode is not None:
+        # YAML gives 0660 as an int but "0660" as an octal string
+        mode = int(mode, 8) if isinstance(mode, str) else int(mode)
+    return {"address": address, "name": name, "backlog": backlog, "mode": mode}
+
+
+class Listener:
+    """
+    Listening socket bound by the supervisor and passed to the processes.
+
+    The supervisor never accepts on it: it only keeps it open, so that the
+    kernel keeps queueing connections while no process is there to accept
+    them (between a crash and its restart, during a rolling restart...).
+    """
+
+    def __init__(self, address: str, backlog=SOCKET_BACKLOG, mode=None, fd=None):
+        self.address = address
+        family, target = _splitAddress(address)
+        self._path = target if family == socket.AF_UNIX else None
+        if fd is not None:
+            # Inherited through a reexec, already bound and listening
+            self._socket = socket.socket(fileno=fd)
+            self._socket.set_inheritable(False)
+            return
+        if self._path is not None:
+            self._removeStale()
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            if self._path is None:
+                # Rebind at once after a supervisor restart, despite TIME_WAIT
+                self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind(target)
+            if self._path is not None and mode is not None:
+                os.chmod(self._path, mode)
+            self._socket.listen(backlog)
+        except OSError as e:
+            self._socket.close()
+            raise ValueError(f"Cannot listen on {address}: {e}")
+
+    def fileno(self) -> int:
+        return self._socket.fileno()
+
+    def _removeStale(self):
+        try:
+            if not stat.S_ISSOCK(os.lstat(self._path).st_mode):
+                return
+        except FileNotFoundError:
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self._path)
+        except ConnectionRefusedError:
+            # Left behind by a supervisor that did not exit cleanly
+            os.unlink(self._path)
+        except OSError:
+            pass
+        finally:
+            probe.close()
+
+    def close(self, unlink=True):
+        self._socket.close()
+        if unlink and self._path is not None:
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+
+
+class ListenerPool:
+    """
+    Reference-counted pool of Listener, one per address.
+
+    Every program (and every configuration of a program) listening on the
+    same address holds the same socket. A new configuration acquires its
+    listeners before the old one releases them, so a reload or a rolling
+    restart never closes a listener that stays in use, and its queue keeps
+    accepting connections while the processes are replaced.
+
+    Methods:
+        acquire(spec): Get (or bind) the listener of a parseSocket() entry.
+        release(address): Drop a reference, the socket is closed at zero.
+        inheritForExec(): Keep the listeners open across an exec of the supervisor.
+        closeInherited(): Close the inherited listeners that no program took.
+    """
+
+    def __init__(self):
+        self._listeners = {}
+        self._refs = {}
+        self._lock = threading.Lock()
+        self._inherited = self._loadInherited()
+
+    @staticmethod
+    def _loadInherited() -> dict:
+        # Popped so that the programs do not see it in their environment
+        data = os.environ.pop(INHERIT_ENV, None)
+        if not data:
+            return {}
+        try:
+            return {str(k): int(v) for k, v in json.loads(data).items()}
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring the inherited listeners {data!r}: {e}")
+            return {}
+
+    def acquire(self, spec: dict) -> Listener:
+        address = spec["address"]
+        with self._lock:
+            listener = self._listeners.get(address)
+            if listener is None:
+                listener = Listener(
+                    address,
+                    spec.get("backlog", SOCKET_BACKLOG),
+                    spec.get("mode"),
+                    fd=self._inherited.pop(address, None),
+                )
+                self._listeners[address] = listener
+                self._refs[address] = 0
+            self._refs[address] += 1
+            return listener
+
+    def release(self, address: str):
+        with self._lock:
+            if address not in self._refs:
+                return
+            self._refs[address] -= 1
+            if self._refs[address] > 0:
+                return
+            del self._refs[address]
+            listener = self._listeners.pop(address)
+        listener.close()
+
+    def inheritForExec(self):
+        """
+        Make the listeners survive an exec of the supervisor: they are left
+        open and their fds are passed in the environment, for the new image
+        to pick them up instead of binding again.
+        """
+        with self._lock:
+            fds = {}
+            for address, listener in self._listeners.items():
+                os.set_inheritable(listener.fileno(), True)
+                fds[address] = listener.fileno()
+        if fds:
+            os.environ[INHERIT_ENV] = json.dumps(fds)
+
+    def closeInherited(self):
+        with self._lock:
+            inherited, self._inherited = self._inherited, {}
+        for address, fd in inherited.items():
+            logger.info(f"Closing the inherited listener {address}, no program uses it")
+            Listener(address, fd=fd).close()
+
+    def __len__(self) -> int:
+        return len(self._listeners)
+
+
+def launcherCommand(fds: list, executable: str, argv: list) -> list:
+    """
+    Command line that execs argv (executable being its resolved path) with
+    the listener fds moved to LISTEN_FDS_START and LISTEN_PID set. It runs
+    an isolated interpreter without site, which only adds a few ms per spawn.
+    """
+    return [
+        sys.executable,
+        "-I",
+        "-S",
+        "-c",
+        LAUNCHER,
+        ",".join(str(fd) for fd in fds),
+        executable,
+        *argv,
+    ]
+
+
+LISTENERS = ListenerPool()
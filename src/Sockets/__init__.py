@@ -0,0 +1,17 @@
+from .Sockets import (
+    LISTEN_FDS_START,
+    LISTENERS,
+    Listener,
+    ListenerPool,
+    launcherCommand,
+    parseSocket,
+)
+
+__all__ = [
+    "Listener",
+    "ListenerPool",
+    "LISTENERS",
+    "LISTEN_FDS_START",
+    "launcherCommand",
+    "parseSocket",
+]
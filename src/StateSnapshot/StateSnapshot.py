@@ -0,0 +1,114 @@
+import json
+import os
+import time
+
+from Constants import STATE_WRITE_DELAY
+from Logger import LOGGER as logger
+from Reaper import REAPER
+
+STATE_VERSION = 1
+
+
+class StateSnapshot:
+    """
+    JSON snapshot of the process table, so that a new supervisor can take
+    over the running processes instead of respawning them (--adopt).
+
+    Transitions only call changed(): the first one of a batch schedules a
+    reaper timer and the whole batch is written once, STATE_WRITE_DELAY
+    later. The timer runs under the reaper lock, so the snapshot never sees
+    half of a transition. Each write goes to a temporary file that is then
+    renamed over the snapshot, so a reader finds either the old or the new
+    snapshot, never a torn one.
+
+    Methods:
+        open(path, provider): Snapshot provider() to path from now on.
+        close(remove=False, provider=None): Stop writing (only if provider is
+            still the one written, when given), optionally deleting the snapshot.
+        changed(): Note a transition, the snapshot is rewritten shortly.
+        write(inherit=False): Write the snapshot now.
+        load(path): The snapshot stored at path, or None.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.writes = 0
+        self._provider = None
+        self._timer = None
+
+    def open(self, path, provider):
+        self.path = path
+        self._provider = provider
+        self.changed()
+
+    def close(self, remove=False, provider=None):
+        if provider is not None and provider != self._provider:
+            # Already taken over by another supervisor instance
+            return
+        REAPER.cancel(self._timer)
+        self._timer = None
+        if remove and self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self.path = None
+        self._provider = None
+
+    def changed(self):
+        if self._timer is None and self._provider is not None:
+            self._timer = REAPER.schedule(STATE_WRITE_DELAY, self._onTimer)
+
+    def _onTimer(self):
+        self._timer = None
+        try:
+            self.write()
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Cannot write the state snapshot {self.path}: {e}")
+
+    def write(self, inherit: bool = False):
+        """
+        Write the snapshot. With inherit the output pipes of the processes
+        are made inheritable and recorded, for an exec of this very process.
+        """
+        if self._provider is None or self.path is None:
+            return
+        state = {
+            "version": STATE_VERSION,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "inherit": inherit,
+            "programs": self._provider(inherit),
+        }
+        data = json.dumps(state, separators=(",", ":")).encode()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(
+            tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600
+        )
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, self.path)
+        self.writes += 1
+
+    @staticmethod
+    def load(path) -> dict:
+        try:
+            with open(path, "rb") as f:
+                state = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring the state snapshot {path}: {e}")
+            return None
+        if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+            logger.warning(f"Ignoring the state snapshot {path}: unknown version")
+            return None
+        return state
+
+
+STATE_SNAPSHOT = StateSnapshot()
@@ -0,0 +1,3 @@
+from .StateSnapshot import STATE_SNAPSHOT, StateSnapshot
+
+__all__ = ["StateSnapshot", "STATE_SNAPSHOT"]
@@ -0,0 +1,58 @@
+import collections
+
+
+class StatusSummary:
+    """
+    Per-program status counters kept up to date on every state transition.
+
+    The owner reports each change instead of the summary scanning the
+    processes, so reading it costs the same for 1 or 10k instances.
+
+    Attributes:
+        states (Counter): Number of processes in each state.
+        restarts (int): Automatic restarts since the program was created.
+        exits (int): Process exits seen, stops included.
+        last_exit_codes (dict): Last exit code of each process index.
+
+    Methods:
+        add(status): A process entered the table in the given state.
+        remove(status): A process left the table.
+        transition(old, new): A process moved from one state to another.
+        recordExit(index, exit_code): A process exited.
+        asDict(): JSON-serializable copy of the summary.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.states = collections.Counter()
+        self.restarts = 0
+        self.exits = 0
+        self.last_exit_codes = {}
+
+    def add(self, status):
+        self.states[status] += 1
+
+    def remove(self, status):
+        self.states[status] -= 1
+        if not self.states[status]:
+            del self.states[status]
+
+    def transition(self, old, new):
+        if old == new:
+            return
+        self.remove(old)
+        self.add(new)
+
+    def recordExit(self, index, exit_code):
+        self.exits += 1
+        self.last_exit_codes[index] = exit_code
+
+    def asDict(self) -> dict:
+        return {
+            "program": self.name,
+            "processes": sum(self.states.values()),
+            "states": {str(state): count for state, count in self.states.items()},
+            "restarts": self.restarts,
+            "exits": self.exits,
+            "last_exit_codes": dict(self.last_exit_codes),
+        }
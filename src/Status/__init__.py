@@ -0,0 +1,3 @@
+from .StatusSummary import StatusSummary
+
+__all__ = ["StatusSummary"]
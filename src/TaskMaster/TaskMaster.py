@@ -1,157 +1,485 @@
+import asyncio
+import collections
+import concurrent.futures
+import io
+import os
 import signal
 import sys
 import threading
 import time
 
-import yaml
-
-from Constants import LIST_NO_RESTART, LIST_RESTART
+from ConfigDiff import ConfigDiff, ReloadPlan, configHash
+from ConfigLoader import CONFIG_LOADER
+from Constants import (
+    EVENT_LOG_FILE,
+    HISTORY_LIMIT,
+    LAUNCH_WORKERS,
+    LIST_NO_RESTART,
+    LOG_DIR,
+    PROFILE_TOP,
+    REEXEC_DELAY,
+    SAMPLE_INTERVAL,
+    STATE_FILE,
+)
+from EventLog import EVENT_LOG, parseDuration
+from Logger import LOG_PIPELINE
 from Logger import LOGGER as logger
+from Metrics import METRICS, RELOAD_SECONDS, Counter, Gauge
 from Program import Program
 from Program.BaseUtils import BaseUtils
-from Program.ProgramConfig import ProgramConfig
+from Program.ProcessRecord import PID_INDEX
+from Reaper import REAPER
+from ResourceSampler import SAMPLER, readStartTime
+from Sockets import LISTENERS
+from StateSnapshot import STATE_SNAPSHOT, StateSnapshot
+from Tracer import TRACER
 
 # import sys
 
 
 class TaskMaster(BaseUtils):
-    def __init__(self, config: dict):
-        # Registrar el handler
-        signal.signal(signal.SIGHUP, self.handle_sighup)
-        signal.signal(signal.SIGINT, self.handle_sig_ign)
+    def __init__(self, config: dict, loop=None):
+        # With an event loop the signals are handled by the AsyncSupervisor
+        self._loop = loop
+        if loop is None:
+            # Registrar el handler
+            signal.signal(signal.SIGHUP, self.handle_sighup)
+            signal.signal(signal.SIGINT, self.handle_sig_ign)
         self.config = config
         self.new_config = None
         self.programs = {}
         self.file_path = self.config["file_path"]
         self._new_programs = {}
-
+        self.metrics_server = None
+        self._profiler = None
+        self._profile_report = None
+        self._launcher = None
+        self._launch_cancelled = False
+        self._launched = threading.Event()
+        self._launch_lock = threading.Lock()
+        # Held by every command source (terminal, control socket, signals)
+        # for a whole command, so that two of them never interleave
+        self.command_lock = threading.RLock()
+        self._detached = False
+        self._inherit = False
+        self._adopted = {}
         programs_config = self.config.get("programs", {})
-        self.programs, self._num_proc = self._get_new_programs(programs_config)
-        for program in self.programs.values():
-            program.startProcess()
-        self.monitorProcesses()
+        if not programs_config:
+            # Checked before anything is started, there is nothing to undo
+            raise ValueError("No programs defined in configuration")
+        if self.config.get("trace", False):
+            TRACER.enable()
+        if self.config.get("subreaper", False):
+            try:
+                REAPER.setSubreaper()
+            except OSError as e:
+                logger.error(f"Cannot become the child subreaper: {e}")
+        if self.config.get("adopt", False):
+            self._adopted = self._loadSnapshot()
+        self._openEventLog()
+        self._openStateFile()
+
+        if self.config.get("fast_start", False):
+            self.monitorProcesses()
+            self._startLaunch(programs_config)
+        else:
+            self.programs, self._num_proc = self._get_new_programs(programs_config)
+            self._config_hashes = {
+                v["name"]: configHash(v)
+                for v in programs_config.values()
+                if v["name"] in self.programs
+            }
+            for name in self.programs:
+                self._startProgram(name)
+            self._retireSnapshot()
+            self._launched.set()
+            self.monitorProcesses()
         logger.info("TaskMaster initialized.")
 
+    @staticmethod
+    def _newProgram(key, v):
+        # Since we don't include name in the configs,
+        # we assign name using the key in the list of dicts
+        if "name" not in v:
+            v["name"] = key
+        try:
+            return Program(v)
+        except Exception as e:
+            logger.error(
+                f"Error initializing program {v['name']}: {e}",
+                exc_info=True,
+            )
+            return None
+
     def _get_new_programs(self, programs_config) -> dict | int:
         if not programs_config:
             raise ValueError("No programs defined in configuration")
         new_programs = {}
         for k, v in programs_config.items():
-            # Since we don't include name in the configs,
-            # we assign name using the key in the list of dicts
-            if "name" not in v:
-                v["name"] = k
-            try:
-                new_programs[v["name"]] = Program(v)
-            except Exception as e:
-                logger.error(
-                    f"Error initializing program {v['name']}: {e}",
-                    exc_info=True,
-                )
+            program = self._newProgram(k, v)
+            if program is not None:
+                new_programs[v["name"]] = program
         num_proc = len(new_programs)
         return new_programs, num_proc
 
+    def _openEventLog(self):
+        path = self.config.get("event_log", EVENT_LOG_FILE)
+        if not path:
+            EVENT_LOG.close()
+            return
+        try:
+            EVENT_LOG.open(path)
+        except OSError as e:
+            logger.error(f"Cannot open the event log {path}: {e}")
+
+    def _openStateFile(self):
+        path = self.config.get("state_file", STATE_FILE)
+        if path:
+            STATE_SNAPSHOT.open(path, self.snapshotState)
+        else:
+            STATE_SNAPSHOT.close(provider=self.snapshotState)
+
+    def _loadSnapshot(self) -> dict:
+        """The programs of the state snapshot, to adopt their processes."""
+        path = self.config.get("state_file", STATE_FILE)
+        state = StateSnapshot.load(path) if path else None
+        if state is None:
+            logger.info("No state snapshot to adopt processes from")
+            return {}
+        # Recorded pipe fds are only valid in the process that wrote them,
+        # i.e. when this is the same supervisor after a reexec
+        self._inherit = bool(state.get("inherit")) and state.get("pid") == os.getpid()
+        logger.info(f"Adopting the processes of the state snapshot {path}")
+        return state.get("programs", {})
+
+    def _startProgram(self, name):
+        """
+        Launch-time start of a program: its processes are adopted from the
+        state snapshot if its config is the one they were started with.
+        """
+        state = self._adopted.pop(name, None)
+        program = self.programs[name]
+        if state is not None and state.get("hash") == self._config_hashes.get(name):
+            program.adoptProcesses(state, self._inherit)
+            return
+        if state is not None:
+            self._retireProcesses(name, state)
+        program.startProcess()
+
+    def _retireSnapshot(self):
+        for name, state in self._adopted.items():
+            self._retireProcesses(name, state)
+        self._adopted = {}
+        # Listeners kept across a reexec that no program took back
+        LISTENERS.closeInherited()
+
+    def _retireProcesses(self, name, state):
+        """
+        Processes of the snapshot that are not adopted, since their program
+        changed or is gone: they are sent SIGTERM rather than left running
+        unsupervised next to their replacements.
+        """
+        for entry in state.get("processes", ()):
+            for fd in entry.get("fds", ()) if self._inherit else ():
+                if fd is not None:
+                    os.close(fd)
+            if entry.get("proc_start") is None:
+                continue
+            if readStartTime(entry["pid"]) != entry["proc_start"]:
+                continue
+            logger.warning(
+                f"Program '{name}' changed since the state snapshot, "
+                f"stopping its old process (PID: {entry['pid']})"
+            )
+            try:
+                os.killpg(entry["pid"], signal.SIGTERM)
+            except ProcessLookupError:
+                # Not a group leader, e.g. spawned with process_group off
+                try:
+                    os.kill(entry["pid"], signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    def snapshotState(self, inherit=False) -> dict:
+        programs = {}
+        for name, program in list(self.programs.items()):
+            state = program.snapshotState(inherit)
+            state["hash"] = self._config_hashes.get(name)
+            programs[name] = state
+        return programs
+
+    def _startLaunch(self, programs_config):
+        """
+        Fast start: the programs are built and started by a small thread pool
+        while the terminal and the control socket are already serving. Each
+        program is listed as soon as it is built, the config order is
+        restored once all of them are.
+        """
+        self._num_proc = 0
+        self._config_hashes = {}
+        self._launcher = threading.Thread(
+            target=self._launchPrograms,
+            args=(programs_config,),
+            name="launcher",
+            daemon=True,
+        )
+        self._launcher.start()
+
+    def _launchPrograms(self, programs_config):
+        start = time.monotonic()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(LAUNCH_WORKERS) as pool:
+                for _ in pool.map(self._launchProgram, programs_config.items()):
+                    pass
+            self._retireSnapshot()
+            with self._launch_lock:
+                self.programs = {
+                    v["name"]: self.programs[v["name"]]
+                    for v in programs_config.values()
+                    if v.get("name") in self.programs
+                }
+                self._num_proc = len(self.programs)
+            logger.info(
+                f"Launched {self._num_proc} programs in {time.monotonic() - start:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"Error while launching programs: {e}", exc_info=True)
+        finally:
+            self._launched.set()
+
+    def _launchProgram(self, item):
+        if self._launch_cancelled:
+            return
+        key, v = item
+        program = self._newProgram(key, v)
+        if program is None:
+            return
+        name = v["name"]
+        with self._launch_lock:
+            # Copied, not updated in place: commands may be iterating it
+            self.programs = {**self.programs, name: program}
+            self._config_hashes[name] = configHash(v)
+        try:
+            self._startProgram(name)
+        except Exception as e:
+            logger.error(f"{e}")
+
+    def waitLaunched(self, timeout: float = None) -> bool:
+        """Block until every program of a fast start is built and started."""
+        return self._launched.wait(timeout)
+
+    def _cancelLaunch(self):
+        # Programs not built yet are skipped, those being started finish first
+        self._launch_cancelled = True
+        launcher = self._launcher
+        if launcher is not None and launcher is not threading.current_thread():
+            launcher.join()
+
     def __del__(self):
+        self.stopMetrics()
+        self._cancelLaunch()
+        if self._detached:
+            return
+        # A clean stop leaves nothing to adopt
+        STATE_SNAPSHOT.close(remove=True, provider=self.snapshotState)
         try:
-            for program in self.programs:
-                self.stopProcess(program)
+            self._stopPrograms(self.programs.values())
+            for program in self.programs.values():
+                program.close()
             logger.info("TaskMaster stopped and cleaned up.")
         except Exception as e:
             logger.error(
                 f"Error while stopping processes in __del__: {e}", exc_info=True
             )
 
+    @TRACER.traced("config.load")
     def _get_config(self) -> dict:
-        logger.debug(f"Reloading YAML file: {self.file_path}")
+        logger.debug("Reloading YAML file: %s", self.file_path)
 
-        with open(self.file_path, "r") as f:
-            return yaml.safe_load(f)
+        return CONFIG_LOADER.load(self.file_path)
+
+    @staticmethod
+    def _stopPrograms(programs):
+        """
+        Stop several programs at once: every process of every program gets
+        its stop_signal first, then all of them are waited for together.
+        """
+        Program.waitStopped(TaskMaster._sendStopAll(programs))
+
+    @staticmethod
+    def _sendStopAll(programs) -> list:
+        targets = []
+        for program in programs:
+            targets.extend(program.sendStop(flag=True))
+        return targets
 
     def _stop_all_processes(self):
-        for program in self.programs:
-            self.stopProcess(program)
+        logger.info("Stopping all programs")
+        self._stopPrograms(self.programs.values())
+        for program in self.programs.values():
+            program.close()
         self.programs = {}
 
+    def planReload(self) -> ReloadPlan:
+        """
+        Diff the new config against the running programs. Only the programs
+        whose config hash changed are validated and compared.
+        """
+        programs_config = (self.new_config or {}).get("programs", None)
+        if not programs_config:
+            logger.warning("No programs defined in the new configuration")
+        return ConfigDiff.plan(self.programs, self._config_hashes, programs_config)
+
+    def _applyPlan(self, plan: ReloadPlan):
+        targets, rolling = self._sendPlanStops(plan)
+        Program.waitStopped(targets)
+        Program.waitStopped(self._finishPlan(plan, rolling))
+
+    def _sendPlanStops(self, plan: ReloadPlan):
+        logger.info(f"Reload plan: {plan!r}")
+        rolling = {
+            name: new_config
+            for name, new_config in plan.restart.items()
+            if new_config.get("restart_mode") == "rolling"
+            and new_config.get("processes") == self.programs[name].get("processes")
+        }
+        for name in rolling:
+            plan.restart.pop(name)
+        # Removed and restarted programs are all stopped in one batch, so a
+        # reload costs at most about one stop_timeout
+        targets = self._sendStopAll(
+            self.programs[name] for name in plan.remove + list(plan.restart)
+        )
+        return targets, rolling
+
+    def _finishPlan(self, plan: ReloadPlan, rolling: dict) -> list:
+        """
+        Remove, update and (re)start the programs of a plan whose stops are
+        over. Returns the processes that in-place updates had to stop, for
+        the caller to wait for the way it waits for stops.
+        """
+        targets = []
+        for name in plan.remove:
+            logger.info(f"{self.REMOVE} program '{name}'")
+            self.programs.pop(name).close()
+        for name, (new_config, keys) in plan.update.items():
+            targets.extend(self.programs[name].updateProcess(new_config, keys))
+        for name, new_config in rolling.items():
+            program = self.programs[name]
+            keys = [
+                key
+                for key in LIST_NO_RESTART
+                if program.get(key) != new_config.get(key)
+            ]
+            if keys:
+                targets.extend(program.updateProcess(new_config, keys))
+            program.rollingReplace(new_config)
+        for name, new_config in list(plan.restart.items()) + list(plan.add.items()):
+            try:
+                program = Program(new_config)
+            except Exception as e:
+                logger.error(f"Error initializing program {name}: {e}", exc_info=True)
+                plan.hashes.pop(name, None)
+                continue
+            # Closed once the new one holds the listeners they share
+            old = self.programs.get(name)
+            self.programs[name] = program
+            if old is not None:
+                old.close()
+            self.startProcess(name)
+        self._config_hashes = plan.hashes
+        self._num_proc = len(self.programs)
+        return targets
+
+    @TRACER.traced("reload.apply")
     def configCmp(self):
         if self.new_config is None:
             logger.warning("new config is None")
             self._stop_all_processes()
+            self._config_hashes = {}
             return
-        elif self.config is None and self.new_config is None:
-            logger.warning("old config is None, new config is None")
-            return
-        elif self.new_config is not None:
-            try:
-                new_programs, self._num_proc = self._get_new_programs(
-                    self.new_config.get("programs", None)
-                )
-            except Exception as e:
-                logger.warning(f"{e}")
-                new_programs = None
-        old_programs = self.programs.copy()
-        # In case we don't have any programs in the new config
-        # we stop all current processes
-        if new_programs is None:
-            logger.warning("new programs is None")
-            for program in old_programs:
-                self.stopProcess(program)
-            self.programs = {}
-            return
-        for program, config in new_programs.items():
-            restart = False
-            if "name" not in config:
-                config["name"] = program
-            if program not in old_programs:
-                self.programs[config["name"]] = Program(config)
-                self.startProcess(program)
-            else:
-                for cmd in LIST_RESTART:
-                    if cmd not in old_programs[program] and cmd not in config:
-                        continue
-                    if cmd in old_programs[program] and cmd in config:
-                        if old_programs[program][cmd] != config[cmd]:
-                            restart = True
-                            break
-                    elif (
-                        cmd in config
-                        and cmd not in old_programs[program]
-                        or cmd in old_programs[program]
-                        and cmd not in config
-                    ):
-                        restart = True
-                if restart:
-                    self.programs[config["name"]] = Program(config)
-                    self.startProcess(program)
-                else:
-                    new_dict = old_programs[program]
-                    no_restart_list = []
-                    for cmd in LIST_NO_RESTART:
-                        old_cmd = old_programs[program].get(cmd, None)
-                        new_cmd = config.get(cmd, None)
-                        if old_cmd != new_cmd:
-                            no_restart_list.append(cmd)
-                            new_dict.update({cmd: new_cmd})
-                    if not no_restart_list:
-                        continue
-                    update = ProgramConfig(new_dict)
-                    self.programs[program].updateProcess(update, no_restart_list)
+        self._applyPlan(self.planReload())
 
     def monitorProcesses(self):
-        def monitor():
-            while True:
-                try:
-                    for program in self.programs.values():
-                        program.check_startup_timeouts()
-                        program.restartProcess()
-                except Exception as e:
-                    logger.error(e, exc_info=True)
-                time.sleep(1)
+        # Exits and success_timeout transitions are pushed to the programs by
+        # the reaper (SIGCHLD + deadline queue) instead of a polling loop
+        if self._loop is not None:
+            REAPER.attach(self._loop)
+        else:
+            REAPER.start()
+        SAMPLER.start(PID_INDEX, self.config.get("sample_interval", SAMPLE_INTERVAL))
+        METRICS.addCollector(self._collectMetrics)
+        if self.config.get("metrics_address") is not None:
+            from Metrics import MetricsServer
 
-        self.thread = threading.Thread(target=monitor, daemon=True)
-        self.thread.start()
-        logger.info("Started process monitoring thread.")
+            try:
+                self.metrics_server = MetricsServer(self.config["metrics_address"])
+                self.metrics_server.start()
+            except ValueError as e:
+                logger.error(e)
+                self.metrics_server = None
+        logger.info("Started process monitoring.")
+
+    def stopMetrics(self):
+        METRICS.removeCollector(self._collectMetrics)
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def _collectMetrics(self) -> list:
+        """Scrape-time gauges built from the status summaries and the sampler."""
+        processes = Gauge(
+            "taskmaster_processes", "Processes in each state.", ("program", "state")
+        )
+        cpu = Gauge(
+            "taskmaster_cpu_percent", "CPU% at the last resource sample.", ("program",)
+        )
+        rss = Gauge(
+            "taskmaster_rss_bytes", "RSS at the last resource sample.", ("program",)
+        )
+        for name, program in list(self.programs.items()):
+            summary = program.summary()
+            for state, count in summary["states"].items():
+                processes.set(count, name, state)
+            resources = summary["resources"]
+            if resources is not None:
+                cpu.set(resources["cpu_percent"], name)
+                rss.set(resources["rss"], name)
+        sample_duration = Gauge(
+            "taskmaster_sample_duration_seconds",
+            "Duration of the last resource sample.",
+        )
+        sample_duration.set(SAMPLER.last_duration)
+        collected = [processes, cpu, rss, sample_duration]
+        if LOG_PIPELINE is not None:
+            dropped = Counter(
+                "taskmaster_log_dropped_total",
+                "Log records dropped because the log queue was full.",
+            )
+            dropped.inc(amount=LOG_PIPELINE.dropped)
+            overflows = Counter(
+                "taskmaster_log_overflows_total", "Times the log queue filled up."
+            )
+            overflows.inc(amount=LOG_PIPELINE.overflows)
+            collected += [dropped, overflows]
+        return collected
+
+    def findPid(self, pid: int) -> tuple:
+        """(program name, process index) of a PID, without scanning programs."""
+        entry = PID_INDEX.get(pid)
+        if entry is None or entry[0] not in self.programs:
+            raise ValueError(f"No process with PID {pid}")
+        return entry
+
+    def parsePid(self, arg: str):
+        """A lone numeric argument that is not a program name is a PID."""
+        if isinstance(arg, int) or (arg.isdigit() and arg not in self.programs):
+            return int(arg)
+        return None
 
     def getStatus(self, program_name: str = None, process_id: int = None):
+        if program_name is None and process_id is not None:
+            program_name, _ = self.findPid(process_id)
         if program_name is None:
             logger.info("Getting status for all programs")
             for _, program in self.programs.items():
@@ -162,22 +490,217 @@ class TaskMaster(BaseUtils):
             logger.info(f"Getting status for program '{program_name}'")
             self.programs[program_name].getStatus(process_id)
 
+    def statusLines(self, program_name: str = None, process_id: int = None) -> list:
+        if program_name is None and process_id is not None:
+            program_name, _ = self.findPid(process_id)
+        if program_name is None:
+            return [
+                line
+                for program in self.programs.values()
+                for line in program.statusLines(process_id)
+            ]
+        if program_name not in self.programs:
+            raise ValueError(f"The process {program_name} does not exist")
+        return self.programs[program_name].statusLines(process_id)
+
+    def statusRecords(self, program_name: str = None, process_id: int = None) -> list:
+        if program_name is None and process_id is not None:
+            program_name, _ = self.findPid(process_id)
+        if program_name is None:
+            return [
+                record
+                for program in self.programs.values()
+                for record in program.statusRecords(process_id)
+            ]
+        if program_name not in self.programs:
+            raise ValueError(f"The process {program_name} does not exist")
+        return self.programs[program_name].statusRecords(process_id)
+
+    def metrics(self) -> dict:
+        return {
+            "programs": SAMPLER.programTotals(),
+            "sample_duration": SAMPLER.last_duration,
+        }
+
+    def profile(self, args=()) -> list:
+        """
+        profile                 Percentile summary of the traced spans.
+        profile on|off|clear    Switch the tracer on or off, or drop its spans.
+        profile cpu <seconds>   cProfile the reaper context for that long.
+        """
+        action = args[0] if args else None
+        if action == "on":
+            TRACER.enable()
+        elif action == "off":
+            TRACER.disable()
+        elif action == "clear":
+            TRACER.clear()
+        elif action == "cpu":
+            seconds = float(args[1]) if len(args) > 1 else 10.0
+            self._startCpuProfile(seconds)
+            return [f"CPU profile running for {seconds}s"]
+        elif action is not None:
+            raise ValueError(f"Unknown profile action: {action}")
+        lines = TRACER.summaryLines()
+        if self._profiler is not None:
+            lines.append("CPU profile running...")
+        elif self._profile_report:
+            lines.append(self._profile_report)
+        return lines
+
+    def _startCpuProfile(self, seconds: float):
+        # cProfile only sees the thread that enables it, so it is switched on
+        # and off from reaper timers: that is where exits, restarts and
+        # health checks run (and everything, under the asyncio core)
+        import cProfile
+
+        if self._profiler is not None:
+            raise ValueError("A CPU profile is already running")
+        if seconds <= 0:
+            raise ValueError("The profile duration must be positive")
+        self._profiler = cProfile.Profile()
+        REAPER.schedule(0, self._profiler.enable)
+        REAPER.schedule(seconds, self._stopCpuProfile)
+
+    def _stopCpuProfile(self):
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        import pstats
+
+        path = os.path.join(LOG_DIR, f"profile-{int(time.time())}.prof")
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Cannot save CPU profile to {path}: {e}")
+            path = None
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        self._profile_report = stream.getvalue().strip()
+        if path:
+            self._profile_report += f"\n\nFull profile saved to {path}"
+        logger.info(f"CPU profile done ({path})")
+
+    def history(self, program_name: str, since=None) -> dict:
+        """
+        Lifecycle events of a program from the event log, over the last
+        `since` (e.g. "12h") or everything: per-event counts, and the last
+        HISTORY_LIMIT events.
+        """
+        start = time.time() - parseDuration(since) if since is not None else None
+        events = collections.deque(maxlen=HISTORY_LIMIT)
+        counts = {}
+        for event in EVENT_LOG.stream(program_name, start):
+            counts[event["event"]] = counts.get(event["event"], 0) + 1
+            events.append(event)
+        return {
+            "program": program_name,
+            "since": start,
+            "counts": counts,
+            "events": list(events),
+        }
+
+    def historyLines(self, program_name: str, since=None) -> list:
+        history = self.history(program_name, since)
+        counts = ", ".join(f"{event}: {n}" for event, n in history["counts"].items())
+        lines = [f"Program:{program_name} {counts or 'no events'}"]
+        for event in history["events"]:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["ts"]))
+            details = " ".join(
+                f"{key}={value}"
+                for key, value in event.items()
+                if key not in ("ts", "event", "program")
+            )
+            lines.append(f"{when} {event['event']:<9} {details}")
+        return lines
+
+    def summary(self, program_name: str = None):
+        if program_name is None:
+            return [program.summary() for program in self.programs.values()]
+        if program_name not in self.programs:
+            raise ValueError(f"The process {program_name} does not exist")
+        return self.programs[program_name].summary()
+
     def handle_sighup(self, signum, frame):
         logger.info("signal: SIGHUP, reload config file...")
-        self.reboot()
+        # Not reloaded from the handler itself: it interrupts the main thread,
+        # possibly in the middle of a terminal command that holds the lock
+        threading.Thread(target=self._reloadFromSignal, daemon=True).start()
+
+    def _reloadFromSignal(self):
+        with self.command_lock:
+            try:
+                self.reboot()
+            except Exception as e:
+                logger.error(e, exc_info=True)
 
     def handle_sig_ign(self, signum, frame):
         logger.info("signal: SIG_IGN, close Taskmaster...")
-        self.__del__()
+        with self.command_lock:
+            self.__del__()
         sys.exit(0)
 
-    def reboot(self):
+    def reboot(self, dry_run: bool = False):
+        self.waitLaunched()
         self.new_config = self._get_config()
+        if dry_run:
+            return self.planReload()
+        start = time.monotonic()
         self.configCmp()
-        for program in self.programs.values():
-            if program["start_at_launch"]:
-                program.rebootProcess()
         self.config = self.new_config
+        self._openEventLog()
+        self._openStateFile()
+        RELOAD_SECONDS.observe(time.monotonic() - start)
+
+    def detach(self):
+        """
+        Let the supervisor exit without stopping the programs, for a new one
+        started with --adopt to take them over. Output captured through
+        pipes is lost with this process: programs that write to it get
+        EPIPE, those logging to files are not affected.
+        """
+        if STATE_SNAPSHOT.path is None:
+            raise ValueError("Detaching needs a state_file to hand the processes over")
+        self._cancelLaunch()
+        with REAPER.lock:
+            STATE_SNAPSHOT.write()
+            STATE_SNAPSHOT.close(provider=self.snapshotState)
+            for program in self.programs.values():
+                program.detach()
+        self._detached = True
+        self.stopMetrics()
+        EVENT_LOG.flush()
+        logger.info(f"Detached from {len(self.programs)} programs")
+
+    def reexec(self):
+        """
+        Replace the supervisor by a fresh copy of itself (e.g. after an
+        upgrade) without touching the programs: the state snapshot is written
+        with the output pipes made inheritable, then the same command line is
+        exec'd with --adopt, so the children and their pipes stay ours. The
+        listeners of "sockets" are inherited too, nothing is bound again. The
+        exec runs from a reaper timer, the caller gets its reply first.
+        """
+        if not self._launched.is_set():
+            raise ValueError("The programs are still being launched")
+        if STATE_SNAPSHOT.path is None:
+            raise ValueError(
+                "Re-executing needs a state_file to hand the processes over"
+            )
+        REAPER.schedule(REEXEC_DELAY, self._reexec)
+
+    def _reexec(self):
+        argv = list(sys.orig_argv)
+        if "--adopt" not in argv:
+            argv.append("--adopt")
+        STATE_SNAPSHOT.write(inherit=True)
+        LISTENERS.inheritForExec()
+        EVENT_LOG.flush()
+        logger.info(f"Re-executing the supervisor: {' '.join(argv)}")
+        if LOG_PIPELINE is not None:
+            LOG_PIPELINE.flush()
+        os.execv(sys.executable, argv)
 
     def startProcess(self, process_name: str):
         if process_name not in self.programs:
@@ -193,15 +716,82 @@ class TaskMaster(BaseUtils):
         logger.info(f"Stopping process '{process_name}'")
         self.programs[process_name].stopProcess(index, flag=True)
 
+    def stopPid(self, pid: int):
+        process_name, index = self.findPid(pid)
+        logger.info(f"Stopping process '{process_name}' (PID: {pid})")
+        self.programs[process_name].stopProcess(index, flag=True)
+
     def restartProcess(self, process_name: str = None, cmd_terminal=False):
         if process_name and process_name not in self.programs:
             raise ValueError(f"The process {process_name} does not exist")
         logger.info(f"Restarting process '{process_name}'")
         self.programs[process_name].restartProcess(flag=True, cmd_terminal=cmd_terminal)
 
-    def reloadConfig(self):
+    def tailProcess(self, process_name: str, index: int = None) -> str:
+        if process_name not in self.programs:
+            raise ValueError(f"The process {process_name} does not exist")
+        return self.programs[process_name].tail(index)
+
+    def reloadConfig(self, dry_run: bool = False):
         logger.info("Reloading configuration.")
-        self.reboot()
+        return self.reboot(dry_run=dry_run)
+
+    # Coroutine versions of the stopping commands, for the asyncio core: the
+    # stop batches are awaited, so the loop keeps reaping and serving meanwhile
+
+    async def stopProcessAsync(self, process_name: str, index: int = None):
+        if process_name not in self.programs:
+            raise ValueError(f"The process {process_name} does not exist")
+        logger.info(f"Stopping process '{process_name}'")
+        targets = self.programs[process_name].sendStop(index, flag=True)
+        await Program.waitStoppedAsync(targets)
+
+    async def stopPidAsync(self, pid: int):
+        process_name, index = self.findPid(pid)
+        await self.stopProcessAsync(process_name, index)
+
+    async def restartProcessAsync(self, process_name: str):
+        if process_name not in self.programs:
+            raise ValueError(f"The process {process_name} does not exist")
+        logger.info(f"Restarting process '{process_name}'")
+        program = self.programs[process_name]
+        if program.get("restart_mode") == "rolling":
+            # Already driven by the reaper callbacks
+            program.restartProcess(flag=True, cmd_terminal=True)
+            return
+        await Program.waitStoppedAsync(program.sendStop(flag=True))
+        program.rebootProcess()
+
+    async def reloadConfigAsync(self, dry_run: bool = False):
+        logger.info("Reloading configuration.")
+        await asyncio.to_thread(self.waitLaunched)
+        self.new_config = self._get_config()
+        if dry_run:
+            return self.planReload()
+        start = time.monotonic()
+        if self.new_config is None:
+            logger.warning("new config is None")
+            await self.shutdownAsync()
+            self._config_hashes = {}
+        else:
+            with TRACER.span("reload.apply"):
+                plan = self.planReload()
+                targets, rolling = self._sendPlanStops(plan)
+                await Program.waitStoppedAsync(targets)
+                await Program.waitStoppedAsync(self._finishPlan(plan, rolling))
+        self.config = self.new_config
+        self._openEventLog()
+        self._openStateFile()
+        RELOAD_SECONDS.observe(time.monotonic() - start)
+
+    async def shutdownAsync(self):
+        await asyncio.to_thread(self._cancelLaunch)
+        STATE_SNAPSHOT.close(remove=True, provider=self.snapshotState)
+        logger.info("Stopping all programs")
+        await Program.waitStoppedAsync(self._sendStopAll(self.programs.values()))
+        for program in self.programs.values():
+            program.close()
+        self.programs = {}
 
     def __repr__(self):
         return (
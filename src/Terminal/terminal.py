@@ -1,6 +1,8 @@
 import select
 import sys
 
+from Constants import CONTROL_SOCKET
+from ControlServer import ControlServer
 from Logger import LOGGER as logger
 from TaskMaster import TaskMaster as TM
 
@@ -11,6 +13,9 @@ class InteractiveTerminal:
             raise ValueError("Configuration must be provided")
         self.config = config
         self.tm = TM(self.config)
+        self.control = ControlServer(
+            self.tm, self.config.get("control_socket", CONTROL_SOCKET)
+        )
         self.running = True
         self.commands = {
             "status": self._cmd_status,
@@ -18,17 +23,25 @@ class InteractiveTerminal:
             "stop": self._cmd_stop,
             "restart": self._cmd_restart,
             "reload": self._cmd_reload,
+            "tail": self._cmd_tail,
+            "profile": self._cmd_profile,
+            "history": self._cmd_history,
+            "reexec": self._cmd_reexec,
             "quit": self._cmd_quit,
             "exit": self._cmd_quit,
             "help": self._cmd_help,
         }
         self.commands_help = {
-            "status": "status <program_name> [process_id]\n    Show the status of a specific program (optionally for a given process ID).",
+            "status": "status [program_name] [process_id] | status <pid>\n    Show the status of all programs, one program (optionally for a given process ID) or one PID.",
             "start": "start <program_name>\n    Start a specific program.",
-            "stop": "stop <program_name> [index]\n    Stop a specific program (optionally one process by index).",
+            "stop": "stop <program_name> [index] | stop <pid>\n    Stop a specific program (optionally one process by index), or one PID.",
             "restart": "restart [program_name]\n    Restart a specific program, or all programs if none is specified.",
-            "reload": "reload\n    Reload the configuration file.",
-            "quit/exit": "quit | exit\n    Exit the terminal interface.",
+            "reload": "reload [--plan]\n    Reload the configuration file (--plan only shows what would change).",
+            "tail": "tail <program_name> [index]\n    Show the last captured output of a program (optionally one process by index).",
+            "profile": "profile [on|off|clear] | profile cpu <seconds>\n    Show the latency percentiles of the supervisor's traced spans, switch tracing, or run cProfile for some seconds.",
+            "history": "history <program_name> [since]\n    Show the lifecycle events of a program, optionally only the recent ones (e.g. 30m, 12h, 2d).",
+            "reexec": "reexec\n    Replace the supervisor by a fresh copy of itself, keeping the programs running.",
+            "quit/exit": "quit | exit [--keep]\n    Exit the terminal interface (--keep leaves the programs running for a supervisor started with --adopt).",
             "help": "help\n    Show this help message.",
         }
 
@@ -38,6 +51,10 @@ class InteractiveTerminal:
         logger.info("Interactive terminal initialized.")
 
     def run(self):
+        try:
+            self.control.start()
+        except ValueError as e:
+            logger.error(e)
         self.commands["help"]()
         first_prompt = True
 
@@ -69,7 +86,8 @@ class InteractiveTerminal:
             return
         try:
             if self.cmd in self.commands:
-                self.commands[self.cmd]()
+                with self.tm.command_lock:
+                    self.commands[self.cmd]()
             else:
                 print(f"Unknown command: {self.cmd}")
         except Exception as e:
@@ -93,14 +111,21 @@ class InteractiveTerminal:
             print(f"No help available for '{self.cmd_options[0]}'")
 
     def _cmd_status(self):
+        if len(self.cmd_options) == 1 and self.tm.parsePid(self.cmd_options[0]):
+            self.tm.getStatus(None, self.tm.parsePid(self.cmd_options[0]))
+            return
         process_name = self.cmd_options[0] if self.cmd_options else None
-        self.tm.getStatus(process_name)
+        process_id = int(self.cmd_options[1]) if len(self.cmd_options) > 1 else None
+        self.tm.getStatus(process_name, process_id)
 
     def _cmd_start(self):
         process_name = self.cmd_options[0] if self.cmd_options else None
         self.tm.startProcess(process_name)
 
     def _cmd_stop(self):
+        if len(self.cmd_options) == 1 and self.tm.parsePid(self.cmd_options[0]):
+            self.tm.stopPid(self.tm.parsePid(self.cmd_options[0]))
+            return
         process_name = self.cmd_options[0] if self.cmd_options else None
         index = int(self.cmd_options[1]) if len(self.cmd_options) > 1 else None
         self.tm.stopProcess(process_name, index)
@@ -109,10 +134,35 @@ class InteractiveTerminal:
         process_name = self.cmd_options[0] if self.cmd_options else None
         self.tm.restartProcess(process_name, cmd_terminal=True)
 
+    def _cmd_tail(self):
+        process_name = self.cmd_options[0] if self.cmd_options else None
+        index = int(self.cmd_options[1]) if len(self.cmd_options) > 1 else None
+        print(self.tm.tailProcess(process_name, index))
+
+    def _cmd_history(self):
+        if not self.cmd_options:
+            print("Usage: history <program_name> [since]")
+            return
+        since = self.cmd_options[1] if len(self.cmd_options) > 1 else None
+        print("\n".join(self.tm.historyLines(self.cmd_options[0], since)))
+
+    def _cmd_profile(self):
+        print("\n".join(self.tm.profile(self.cmd_options)))
+
     def _cmd_reload(self):
+        if "--plan" in self.cmd_options:
+            print(self.tm.reloadConfig(dry_run=True).summary())
+            return
         self.tm.reloadConfig()
 
+    def _cmd_reexec(self):
+        self.tm.reexec()
+        print("[Reexec] Replacing the supervisor, programs keep running.")
+
     def _cmd_quit(self):
+        if "--keep" in self.cmd_options:
+            self.tm.detach()
         print("[Quit] Exiting program.")
         self.running = False
+        self.control.stop()
         self.tm.__del__()
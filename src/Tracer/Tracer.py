@@ -0,0 +1,127 @@
+import collections
+import functools
+import time
+
+from Constants import TRACE_RING_SIZE
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_start")
+
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._tracer.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _percentile(durations, fraction):
+    # Nearest rank on an already sorted list
+    return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+
+class Tracer:
+    """
+    Opt-in latency tracer of the supervisor's own hot paths.
+
+    Spans (name, wall time, duration) go to a bounded ring, so tracing can
+    stay on for days without growing. While disabled, a traced function
+    costs one attribute check and span() returns a shared no-op object.
+
+    Methods:
+        enable() / disable(): Switch recording on or off.
+        clear(): Drop the recorded spans.
+        span(name): Context manager timing a block.
+        traced(name): Decorator timing every call of a function.
+        record(name, duration): Add a span measured elsewhere.
+        summary(): Count, percentiles and max per span name, in ms.
+        summaryLines(): summary() as a text table.
+    """
+
+    def __init__(self, size=TRACE_RING_SIZE):
+        self.enabled = False
+        self._spans = collections.deque(maxlen=size)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._spans.clear()
+
+    def record(self, name, duration):
+        # deque.append is atomic, spans come from several threads
+        self._spans.append((name, time.time(), duration))
+
+    def span(self, name):
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def traced(self, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self) -> dict:
+        durations = collections.defaultdict(list)
+        for name, _, duration in list(self._spans):
+            durations[name].append(duration * 1000.0)
+        summary = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "p50": round(_percentile(values, 0.50), 3),
+                "p90": round(_percentile(values, 0.90), 3),
+                "p99": round(_percentile(values, 0.99), 3),
+                "max": round(values[-1], 3),
+                "total": round(sum(values), 3),
+            }
+        return summary
+
+    def summaryLines(self) -> list:
+        lines = [
+            f"tracing {'on' if self.enabled else 'off'}, "
+            f"{len(self._spans)}/{self._spans.maxlen} spans (ms)",
+            f"{'span':<20} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'total':>10}",
+        ]
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name:<20} {stats['count']:>7} {stats['p50']:>9.3f} {stats['p90']:>9.3f} "
+                f"{stats['p99']:>9.3f} {stats['max']:>9.3f} {stats['total']:>10.3f}"
+            )
+        return lines
+
+
+TRACER = Tracer()
@@ -0,0 +1,3 @@
+from .Tracer import TRACER, Tracer
+
+__all__ = ["Tracer", "TRACER"]
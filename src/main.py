@@ -2,8 +2,7 @@ import argparse
 import os
 import sys
 
-import yaml
-
+from ConfigLoader import CONFIG_LOADER
 from Constants import CONFIG_PATH
 from Logger import LOGGER as logger
 from Terminal import Terminal
@@ -20,6 +19,29 @@ def get_args():
         required=True,
         help="Path to the configuration file",
     )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the asyncio core without the interactive terminal",
+    )
+    parser.add_argument(
+        "--fast-start",
+        dest="fast_start",
+        action="store_true",
+        help="Serve commands right away and launch the programs in the background",
+    )
+    parser.add_argument(
+        "--config-cache",
+        dest="config_cache",
+        action="store_true",
+        help="Keep the parsed configuration next to the file to skip parsing it",
+    )
+    parser.add_argument(
+        "--adopt",
+        action="store_true",
+        help="Take over the still running processes of the state snapshot",
+    )
     return parser.parse_args()
 
 
@@ -30,7 +52,7 @@ def get_config(file: str) -> dict:
     :param file: File name or absolute path. If relative, uses CONFIG_PATH.
     :return: Contents of the YAML file as a dictionary.
     """
-    logger.debug(f"Loading YAML file: {file}")
+    logger.debug("Loading YAML file: %s", file)
 
     if not os.path.isabs(file):
         if not (file.endswith(".yaml") or file.endswith(".yml")):
@@ -40,10 +62,9 @@ def get_config(file: str) -> dict:
                 file += ".yml"
         file = os.path.join(CONFIG_PATH, file)
 
-    with open(file, "r") as f:
-        config = yaml.safe_load(f)
-        logger.info("YAML file loaded successfully")
-        return config, file
+    config = CONFIG_LOADER.load(file)
+    logger.info("YAML file loaded successfully")
+    return config, file
 
 
 def main():
@@ -51,10 +72,20 @@ def main():
     logger.info("Starting TaskMaster...")
     try:
         args = get_args()
+        CONFIG_LOADER.persist = args.config_cache
         config, file = get_config(args.config_file)
         config["file_path"] = file
-        terminal = Terminal(config)
-        terminal.run()
+        if args.fast_start:
+            config["fast_start"] = True
+        if args.adopt:
+            config["adopt"] = True
+        if args.use_async:
+            from AsyncSupervisor import AsyncSupervisor
+
+            AsyncSupervisor(config).run()
+        else:
+            terminal = Terminal(config)
+            terminal.run()
     except BaseException as e:
         logger.error(e, exc_info=True)
         res = 1
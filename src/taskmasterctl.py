@@ -0,0 +1,87 @@
+"""
+Thin client of the TaskMaster control socket.
+
+    taskmasterctl status [--json] [program_name] [pid]
+    taskmasterctl summary [program_name]
+    taskmasterctl metrics
+    taskmasterctl profile [on|off|clear|cpu <seconds>]
+    taskmasterctl history [--json] <program_name> [since]
+    taskmasterctl stop <program_name> [index]
+    taskmasterctl reload [--plan]
+    taskmasterctl reexec
+
+Only the standard library is imported so a command costs a few
+milliseconds, the supervisor does all the work.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Same default as Constants.CONTROL_SOCKET, which would pull in logging
+DEFAULT_SOCKET = os.getenv("TASKMASTER_SOCKET", "/tmp/taskmaster.sock")
+
+
+def get_args():
+    parser = argparse.ArgumentParser(prog="taskmasterctl")
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=str,
+        default=DEFAULT_SOCKET,
+        help="Path to the TaskMaster control socket",
+    )
+    parser.add_argument(
+        "cmd",
+        choices=[
+            "status",
+            "summary",
+            "metrics",
+            "profile",
+            "history",
+            "start",
+            "stop",
+            "restart",
+            "reload",
+            "reexec",
+            "tail",
+        ],
+    )
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    return parser.parse_args()
+
+
+def request(path: str, cmd: str, args: list) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps({"cmd": cmd, "args": args}).encode() + b"\n")
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("connection closed by the supervisor")
+    return json.loads(line)
+
+
+def main():
+    args = get_args()
+    try:
+        response = request(args.socket, args.cmd, args.args)
+    except (OSError, ValueError) as e:
+        print(f"taskmasterctl: {args.socket}: {e}", file=sys.stderr)
+        return 2
+    if not response.get("ok"):
+        print(f"taskmasterctl: {response.get('error')}", file=sys.stderr)
+        return 1
+    result = response.get("result")
+    if isinstance(result, str):
+        if result:
+            print(result)
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Backoff import Backoff
+
+
+class TestBackoff(unittest.TestCase):
+    def test_delay_grows_until_cap(self):
+        backoff = Backoff(initial=1, maximum=10, factor=2, jitter=0)
+        delays = [backoff.delay(attempt) for attempt in range(6)]
+        self.assertEqual(delays, [1, 2, 4, 8, 10, 10])
+        self.assertEqual(backoff.delay(10_000), 10)
+
+    def test_jitter_stays_in_bounds(self):
+        low = Backoff(initial=4, maximum=100, jitter=0.25, rand=lambda: 0.0)
+        high = Backoff(initial=4, maximum=100, jitter=0.25, rand=lambda: 1.0)
+        self.assertEqual(low.delay(0), 3)
+        self.assertEqual(high.delay(0), 5)
+        capped = Backoff(initial=4, maximum=4, jitter=0.25, rand=lambda: 1.0)
+        self.assertEqual(capped.delay(3), 4)
+
+    def test_stable_run_resets_attempts(self):
+        backoff = Backoff(reset=30)
+        self.assertEqual(backoff.nextAttempt(5, uptime=2), 5)
+        self.assertEqual(backoff.nextAttempt(5, uptime=30), 0)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            Backoff(factor=0.5)
+        with self.assertRaises(ValueError):
+            Backoff(jitter=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from ConfigDiff import ConfigDiff, configHash
+from Program import Program
+
+
+def make_programs_config():
+    return {
+        "web": {"name": "web", "cmd": "/bin/sleep 10", "processes": 2},
+        "worker": {"name": "worker", "cmd": "/bin/sleep 20"},
+        "cron": {"name": "cron", "cmd": "/bin/sleep 30"},
+    }
+
+
+class TestConfigDiff(unittest.TestCase):
+    def setUp(self):
+        self.config = make_programs_config()
+        self.programs = {name: Program(dict(v)) for name, v in self.config.items()}
+        self.hashes = {name: configHash(v) for name, v in self.config.items()}
+
+    def test_hash_ignores_key_order(self):
+        a = {"name": "x", "cmd": "ls", "processes": 1}
+        b = {"processes": 1, "cmd": "ls", "name": "x"}
+        self.assertEqual(configHash(a), configHash(b))
+
+    def test_same_config_is_a_noop(self):
+        plan = ConfigDiff.plan(self.programs, self.hashes, make_programs_config())
+        self.assertTrue(plan.isEmpty())
+        self.assertEqual(sorted(plan.unchanged), ["cron", "web", "worker"])
+
+    def test_plan_classifies_changes(self):
+        new_config = make_programs_config()
+        new_config["web"]["processes"] = 4
+        new_config["worker"]["cmd"] = "/bin/sleep 25"
+        del new_config["cron"]
+        new_config["api"] = {"cmd": "/bin/sleep 40"}
+        plan = ConfigDiff.plan(self.programs, self.hashes, new_config)
+        self.assertEqual(list(plan.add), ["api"])
+        self.assertEqual(plan.remove, ["cron"])
+        self.assertEqual(list(plan.restart), ["worker"])
+        self.assertEqual(plan.update["web"][1], ["processes"])
+        self.assertNotIn("cron", plan.hashes)
+
+    def test_invalid_program_keeps_running_version(self):
+        new_config = make_programs_config()
+        del new_config["worker"]["cmd"]
+        plan = ConfigDiff.plan(self.programs, self.hashes, new_config)
+        self.assertIn("worker", plan.invalid)
+        self.assertNotIn("worker", plan.remove)
+        self.assertEqual(plan.hashes["worker"], self.hashes["worker"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from ConfigLoader import ConfigLoader
+
+
+class TestConfigLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "config.yaml")
+        self.write("programs:\n  web:\n    cmd: /bin/true\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, text, age=10):
+        with open(self.path, "w") as f:
+            f.write(text)
+        # Old enough to be outside the racy window
+        mtime = os.stat(self.path).st_mtime - age
+        os.utime(self.path, (mtime, mtime))
+
+    def test_unchanged_file_is_not_parsed_again(self):
+        loader = ConfigLoader()
+        first = loader.load(self.path)
+        with mock.patch.object(ConfigLoader, "_parse") as parse:
+            second = loader.load(self.path)
+        parse.assert_not_called()
+        self.assertEqual(first, second)
+        # Callers get their own copy
+        second["programs"]["web"]["name"] = "web"
+        self.assertNotIn("name", loader.load(self.path)["programs"]["web"])
+
+    def test_changed_file_is_parsed(self):
+        loader = ConfigLoader()
+        loader.load(self.path)
+        self.write("programs:\n  db:\n    cmd: /bin/true\n", age=5)
+        self.assertEqual(list(loader.load(self.path)["programs"]), ["db"])
+
+    def test_same_content_new_stat_skips_parse(self):
+        loader = ConfigLoader()
+        loader.load(self.path)
+        self.write("programs:\n  web:\n    cmd: /bin/true\n", age=5)
+        with mock.patch.object(ConfigLoader, "_parse") as parse:
+            self.assertEqual(list(loader.load(self.path)["programs"]), ["web"])
+        parse.assert_not_called()
+
+    def test_recent_file_is_read_again(self):
+        loader = ConfigLoader()
+        self.write("programs:\n  web:\n    cmd: /bin/true\n", age=0)
+        loader.load(self.path)
+        # Same size and possibly the same mtime tick: only the content tells
+        with open(self.path, "r+") as f:
+            f.write("programs:\n  www:\n")
+        self.assertEqual(list(loader.load(self.path)["programs"]), ["www"])
+
+    def test_persisted_cache(self):
+        ConfigLoader(persist=True).load(self.path)
+        cache_path = ConfigLoader.cachePath(self.path)
+        self.assertTrue(os.path.exists(cache_path))
+        self.assertEqual(os.stat(cache_path).st_mode & 0o777, 0o600)
+        with mock.patch.object(ConfigLoader, "_parse") as parse:
+            config = ConfigLoader(persist=True).load(self.path)
+        parse.assert_not_called()
+        self.assertEqual(list(config["programs"]), ["web"])
+
+    def test_unsafe_persisted_cache_is_ignored(self):
+        ConfigLoader(persist=True).load(self.path)
+        os.chmod(ConfigLoader.cachePath(self.path), 0o666)
+        with mock.patch.object(
+            ConfigLoader, "_parse", return_value={"programs": {}}
+        ) as parse:
+            ConfigLoader(persist=True).load(self.path)
+        parse.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
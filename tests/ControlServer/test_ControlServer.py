@@ -0,0 +1,110 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from ControlServer import ControlServer
+
+
+class FakeTaskMaster:
+    def __init__(self):
+        self.stopped = []
+        self.command_lock = threading.RLock()
+
+    def statusLines(self, program_name=None, process_id=None):
+        if program_name not in (None, "web"):
+            raise ValueError(f"The process {program_name} does not exist")
+        return [f"Program:web PID: {process_id}"]
+
+    def parsePid(self, arg):
+        return int(arg) if str(arg).isdigit() else None
+
+    def stopProcess(self, program_name, index=None):
+        self.stopped.append((program_name, index))
+
+    def stopPid(self, pid):
+        self.stopped.append(pid)
+
+
+class TestControlServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ctl.sock")
+        self.tm = FakeTaskMaster()
+        self.server = ControlServer(self.tm, self.path)
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def test_handle(self):
+        self.assertEqual(
+            self.server.handle({"cmd": "stop", "args": ["web", "2"]}),
+            {"ok": True, "result": "web: stopped"},
+        )
+        self.assertEqual(self.tm.stopped, [("web", 2)])
+        self.server.handle({"cmd": "stop", "args": ["4242"]})
+        self.assertEqual(self.tm.stopped, [("web", 2), 4242])
+        self.assertFalse(self.server.handle({"cmd": "status", "args": ["db"]})["ok"])
+        self.assertFalse(self.server.handle({"cmd": "rm", "args": []})["ok"])
+        self.assertFalse(self.server.handle({"cmd": "stop", "args": []})["ok"])
+
+    def test_commands_wait_for_the_command_lock(self):
+        # Held by e.g. the terminal: a socket command runs once it is done
+        responses = []
+        with self.tm.command_lock:
+            worker = threading.Thread(
+                target=lambda: responses.append(
+                    self.server.handle({"cmd": "stop", "args": ["web"]})
+                )
+            )
+            worker.start()
+            worker.join(0.2)
+            self.assertTrue(worker.is_alive())
+            self.assertEqual(self.tm.stopped, [])
+        worker.join(2)
+        self.assertEqual(responses, [{"ok": True, "result": "web: stopped"}])
+
+    def test_socket_roundtrip(self):
+        self.server.start()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.path)
+            stream = sock.makefile("rwb")
+            for pid in (1, 2):
+                stream.write(
+                    json.dumps({"cmd": "status", "args": ["web", pid]}).encode() + b"\n"
+                )
+                stream.flush()
+                response = json.loads(stream.readline())
+                self.assertEqual(response["result"], f"Program:web PID: {pid}")
+            stream.write(b"not json\n")
+            stream.flush()
+            self.assertFalse(json.loads(stream.readline())["ok"])
+            stream.close()
+
+    def test_socket_is_private_without_touching_the_umask(self):
+        umask = os.umask(0o022)
+        try:
+            self.server.start()
+            self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+            self.assertEqual(os.umask(0o022), 0o022)
+        finally:
+            os.umask(umask)
+
+    def test_stale_socket_is_replaced(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        self.server.start()
+        self.assertEqual(self.server.handle({"cmd": "status"})["ok"], True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from EventLog import EventLog, parseDuration
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "events.ndjson")
+        self.log = EventLog()
+        self.log.open(self.path)
+
+    def tearDown(self):
+        self.log.close()
+        self.tmpdir.cleanup()
+
+    def test_record_and_query(self):
+        self.log.record("spawned", "web", 1, 100, restarts=0)
+        self.log.record("spawned", "db", 1, 101, restarts=0)
+        self.log.record("exited", "web", 1, 100, exit_code=1, uptime=0.5)
+        events = self.log.query("web")
+        self.assertEqual([e["event"] for e in events], ["spawned", "exited"])
+        self.assertEqual(events[1]["exit_code"], 1)
+        with open(self.path) as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 3)
+
+    @mock.patch("EventLog.EventLog.EVENT_BUFFER_BYTES", 1)
+    def test_query_skips_blocks_of_other_programs_and_older(self):
+        self.log.record("spawned", "db", 1, 101)
+        self.log.flush()
+        self.log.record("spawned", "web", 1, 100)
+        self.log.flush()
+        since = time.time()
+        self.log.record("exited", "web", 1, 100, exit_code=0)
+        self.log.flush()
+        with open(EventLog.indexPath(self.path)) as f:
+            blocks = [json.loads(line) for line in f]
+        self.assertEqual([b["programs"] for b in blocks], [["db"], ["web"], ["web"]])
+        self.assertEqual([e["event"] for e in self.log.query("web", since)], ["exited"])
+
+    def test_flushes_are_merged_into_one_block(self):
+        for pid in range(20):
+            self.log.record("spawned", "web" if pid % 2 else "db", pid, pid)
+            self.log.flush()
+        with open(EventLog.indexPath(self.path)) as f:
+            blocks = [json.loads(line) for line in f]
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(blocks[0]["programs"], ["db", "web"])
+        self.assertEqual(blocks[0]["length"], os.path.getsize(self.path))
+        self.log.record("exited", "web", 19, 19)
+        self.log.close()
+        self.log.open(self.path)
+        self.assertEqual(len(self.log.query("web")), 11)
+
+    @mock.patch("EventLog.EventLog.EVENT_BUFFER_BYTES", 1)
+    def test_index_of_small_blocks_is_compacted_on_open(self):
+        for pid in range(5):
+            self.log.record("spawned", "web", pid, pid)
+            self.log.flush()
+        self.log.close()
+        with mock.patch("EventLog.EventLog.EVENT_BUFFER_BYTES", 65536):
+            self.log.open(self.path)
+        with open(EventLog.indexPath(self.path)) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(len(self.log.query("web")), 5)
+
+    def test_query_keeps_the_last_events(self):
+        for pid in range(10):
+            self.log.record("spawned", "web", pid, pid)
+        events = self.log.query("web", limit=3)
+        self.assertEqual([e["pid"] for e in events], [7, 8, 9])
+
+    def test_missing_index_is_rebuilt(self):
+        for pid in range(10):
+            self.log.record("spawned", "web", pid, pid)
+        self.log.close()
+        os.unlink(EventLog.indexPath(self.path))
+        self.log.open(self.path)
+        self.assertEqual(len(self.log.query("web")), 10)
+        self.assertTrue(os.path.getsize(EventLog.indexPath(self.path)))
+
+    def test_torn_line_after_crash(self):
+        self.log.record("spawned", "web", 1, 100)
+        self.log.close()
+        with open(self.path, "ab") as f:
+            f.write(b'{"ts": 1, "event": "exi')
+        self.log.open(self.path)
+        self.log.record("exited", "web", 1, 100)
+        self.assertEqual(
+            [e["event"] for e in self.log.query("web")], ["spawned", "exited"]
+        )
+
+    def test_parse_duration(self):
+        self.assertEqual(parseDuration("90"), 90)
+        self.assertEqual(parseDuration("30m"), 1800)
+        self.assertEqual(parseDuration("12h"), 43200)
+        self.assertEqual(parseDuration("2d"), 172800)
+        with self.assertRaises(ValueError):
+            parseDuration("soon")
+
+
+if __name__ == "__main__":
+    unittest.main()
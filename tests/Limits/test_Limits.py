@@ -0,0 +1,104 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Limits import Cgroup, Limits, parseSize
+
+
+class TestLimits(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parseSize(4096), 4096)
+        self.assertEqual(parseSize("512M"), 512 << 20)
+        self.assertEqual(parseSize("1.5GiB"), 3 << 29)
+        for value in ("lots", "-1K", 0, True):
+            with self.assertRaises(ValueError):
+                parseSize(value)
+
+    def test_validation(self):
+        self.assertFalse(Limits())
+        self.assertTrue(Limits(nice=0))
+        with self.assertRaises(ValueError):
+            Limits(rlimits={"stack": 1})
+        with self.assertRaises(ValueError):
+            Limits(rlimits={"nofile": [256, 128]})
+        with self.assertRaises(ValueError):
+            Limits(nice=40)
+        with self.assertRaises(ValueError):
+            Limits(cpu_affinity=[])
+
+    def test_limits_are_set_before_exec(self):
+        cpu = min(os.sched_getaffinity(0))
+        limits = Limits(
+            rlimits={"nofile": [64, 128], "as": "unlimited"},
+            nice=7,
+            cpu_affinity=[cpu],
+        )
+        script = (
+            "import os, resource; "
+            "print(*resource.getrlimit(resource.RLIMIT_NOFILE), "
+            "os.getpriority(os.PRIO_PROCESS, 0), *os.sched_getaffinity(0))"
+        )
+        with tempfile.NamedTemporaryFile("r") as procs:
+            argv = [sys.executable, "-c", script]
+            command = limits.launcherCommand(sys.executable, argv, procs.name)
+            proc = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+            self.assertEqual(proc.stdout.split(), ["64", "128", "7", str(cpu)])
+            # The launcher joined the cgroup under the program's own PID
+            self.assertTrue(procs.read().isdigit())
+
+    def test_launcher_reports_failures(self):
+        # No such CPU: the program is not run without its limits
+        command = Limits(cpu_affinity=[4096]).launcherCommand("/bin/true", ["true"])
+        proc = subprocess.run(command, stderr=subprocess.PIPE)
+        self.assertEqual(proc.returncode, 126)
+        command = Limits(nice=1).launcherCommand("/nonexistent", ["nonexistent"])
+        proc = subprocess.run(command, stderr=subprocess.PIPE)
+        self.assertEqual(proc.returncode, 127)
+
+
+class TestCgroup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.mount = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, *path):
+        with open(os.path.join(self.mount, *path)) as control:
+            return control.read()
+
+    def test_setup_writes_limits(self):
+        with open(os.path.join(self.mount, "cgroup.controllers"), "w") as f:
+            f.write("cpuset cpu io memory pids\n")
+        cgroup = Cgroup("web", mount=self.mount)
+        self.assertTrue(cgroup.setup(memory_limit=256 << 20, cpu_limit=1.5))
+        self.assertEqual(self.read("taskmaster", "web", "memory.max"), str(256 << 20))
+        self.assertEqual(self.read("taskmaster", "web", "cpu.max"), "150000 100000")
+        self.assertEqual(
+            self.read("taskmaster", "cgroup.subtree_control"), "+cpu +memory"
+        )
+        cgroup.attach(1234)
+        self.assertEqual(self.read("taskmaster", "web", "cgroup.procs"), "1234")
+        # Dropping a limit resets it instead of leaving the old value
+        self.assertTrue(cgroup.setup(memory_limit=None, cpu_limit=1.5))
+        self.assertEqual(self.read("taskmaster", "web", "memory.max"), "max")
+
+    def test_missing_controller_is_skipped(self):
+        with open(os.path.join(self.mount, "cgroup.controllers"), "w") as f:
+            f.write("pids\n")
+        cgroup = Cgroup("web", mount=self.mount)
+        self.assertFalse(cgroup.setup(memory_limit=1 << 20))
+        self.assertFalse(cgroup.active)
+        self.assertFalse(os.path.exists(os.path.join(self.mount, "taskmaster")))
+
+
+if __name__ == "__main__":
+    unittest.main()
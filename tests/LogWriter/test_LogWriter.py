@@ -0,0 +1,64 @@
+import glob
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from LogWriter import LogWriter, LogWriterPool
+
+
+class TestLogWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out.log")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pool_shares_one_writer_per_path(self):
+        pool = LogWriterPool()
+        first = pool.acquire(self.path)
+        second = pool.acquire(self.path)
+        self.assertIs(first, second)
+        self.assertEqual(len(pool), 1)
+        pool.release(self.path)
+        self.assertEqual(len(pool), 1)
+        pool.release(self.path)
+        self.assertEqual(len(pool), 0)
+        self.assertIsNone(first.fileno())
+
+    def test_size_rotation_keeps_backups(self):
+        writer = LogWriter(self.path, max_bytes=10, backups=2)
+        for _ in range(5):
+            writer.write(b"0123456789")
+        writer.close()
+        self.assertEqual(len(glob.glob(self.path + ".*")), 2)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"0123456789")
+
+    def test_prune_keeps_unrelated_files(self):
+        siblings = [self.path + ".lock", self.path + ".old", self.path + ".1"]
+        for sibling in siblings:
+            open(sibling, "w").close()
+        writer = LogWriter(self.path, max_bytes=10, backups=1)
+        for _ in range(4):
+            writer.write(b"0123456789")
+        writer.close()
+        for sibling in siblings:
+            self.assertTrue(os.path.exists(sibling))
+        self.assertEqual(len(glob.glob(self.path + ".*")), len(siblings) + 1)
+
+    def test_no_rotation_without_policy(self):
+        writer = LogWriter(self.path)
+        self.assertFalse(writer.rotates)
+        writer.write(b"a" * 100)
+        writer.close()
+        self.assertEqual(glob.glob(self.path + ".*"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
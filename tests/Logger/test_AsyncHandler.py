@@ -0,0 +1,118 @@
+import io
+import logging
+import logging.handlers
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Logger import AsyncHandler
+
+
+class _BlockingHandler(logging.Handler):
+    """Non-stream target that waits for a gate, like a stuck syslog socket."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.gate.wait()
+        self.messages.append(record.getMessage())
+
+
+class TestAsyncHandler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(f"test.async.{self.id()}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def test_batches_reach_stream_targets(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        pipeline = AsyncHandler()
+        pipeline.addTarget(target)
+        self.logger.addHandler(pipeline)
+        for i in range(100):
+            self.logger.info("line %d", i)
+        self.logger.debug("filtered %s", object())
+        pipeline.flush()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertEqual(lines[0], "INFO line 0")
+        self.assertEqual(lines[-1], "INFO line 99")
+
+    def test_handler_subclasses_emit_each_record(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "taskmaster.log")
+            target = logging.handlers.RotatingFileHandler(
+                path, maxBytes=100, backupCount=20
+            )
+            pipeline = AsyncHandler()
+            pipeline.addTarget(target)
+            self.logger.addHandler(pipeline)
+            for i in range(50):
+                self.logger.info("line %02d", i)
+            pipeline.flush()
+            target.close()
+            # Rotated per record: no file grew past maxBytes in one batch
+            names = sorted(os.listdir(tmp))
+            self.assertGreater(len(names), 1)
+            for name in names:
+                self.assertLessEqual(os.path.getsize(os.path.join(tmp, name)), 100)
+
+    def test_message_is_merged_when_queued(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        blocker = _BlockingHandler()
+        pipeline = AsyncHandler()
+        pipeline.addTarget(blocker)
+        pipeline.addTarget(target)
+        self.logger.addHandler(pipeline)
+        config = {"a": 1}
+        self.logger.info("config %s", config)
+        config["b"] = 2
+        blocker.gate.set()
+        pipeline.flush()
+        self.assertEqual(blocker.messages, ["config {'a': 1}"])
+        self.assertEqual(stream.getvalue(), "config {'a': 1}\n")
+
+    def test_full_queue_drops_and_counts(self):
+        blocker = _BlockingHandler()
+        pipeline = AsyncHandler(size=10, batch_size=1)
+        pipeline.addTarget(blocker)
+        self.logger.addHandler(pipeline)
+        for i in range(50):
+            self.logger.info("record %d", i)
+        self.assertGreaterEqual(pipeline.dropped, 39)
+        self.assertEqual(pipeline.overflows, 1)
+        blocker.gate.set()
+        pipeline.flush()
+        self.assertEqual(len(blocker.messages), 50 - pipeline.dropped + 1)
+        self.assertIn("records dropped", blocker.messages[-1])
+
+    def test_records_after_close_are_written_inline(self):
+        stream = io.StringIO()
+        pipeline = AsyncHandler()
+        pipeline.addTarget(logging.StreamHandler(stream))
+        self.logger.addHandler(pipeline)
+        self.logger.info("before")
+        pipeline.close()
+        self.logger.info("after")
+        self.assertEqual(stream.getvalue(), "before\nafter\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Metrics import Gauge, MetricsRegistry, MetricsServer
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render(self):
+        counter = self.registry.counter("t_total", "Things.", ("program", "code"))
+        counter.inc("web", "0")
+        counter.inc("web", "0")
+        counter.inc("db", "-9", amount=3)
+        histogram = self.registry.histogram(
+            "t_seconds", "Time.", ("program",), (0.1, 1)
+        )
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, "web")
+        self.registry.addCollector(lambda: [self._gauge()])
+        lines = self.registry.render().splitlines()
+        self.assertIn("# TYPE t_total counter", lines)
+        self.assertIn('t_total{program="web",code="0"} 2', lines)
+        self.assertIn('t_total{program="db",code="-9"} 3', lines)
+        self.assertIn('t_seconds_bucket{program="web",le="0.1"} 2', lines)
+        self.assertIn('t_seconds_bucket{program="web",le="1"} 3', lines)
+        self.assertIn('t_seconds_bucket{program="web",le="+Inf"} 4', lines)
+        self.assertIn('t_seconds_sum{program="web"} 2.65', lines)
+        self.assertIn('t_seconds_count{program="web"} 4', lines)
+        self.assertIn('g{name="a\\"b"} 1.5', lines)
+
+    @staticmethod
+    def _gauge():
+        gauge = Gauge("g", "Gauge.", ("name",))
+        gauge.set(1.5, 'a"b')
+        return gauge
+
+    def test_server(self):
+        self.registry.counter("up_total", "Up.").inc()
+        server = MetricsServer("127.0.0.1:0", registry=self.registry)
+        server.start()
+        try:
+            url = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(url + "/metrics") as response:
+                self.assertIn(b"up_total 1", response.read())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + "/other")
+        finally:
+            server.stop()
+
+    def test_parse_address(self):
+        self.assertEqual(MetricsServer.parseAddress(9101), ("127.0.0.1", 9101))
+        self.assertEqual(MetricsServer.parseAddress("0.0.0.0:80"), ("0.0.0.0", 80))
+        with self.assertRaises(ValueError):
+            MetricsServer.parseAddress("localhost:http")
+
+
+if __name__ == "__main__":
+    unittest.main()
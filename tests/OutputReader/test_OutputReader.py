@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from OutputReader import OutputReader, RingBuffer
+
+
+class TestOutputReader(unittest.TestCase):
+    def setUp(self):
+        self.reader = OutputReader()
+
+    def tearDown(self):
+        self.reader.stop()
+
+    def test_drains_more_than_a_pipe_buffer(self):
+        # 256 KiB is four times the default pipe capacity: the child would
+        # block in write() forever if the pipe were not drained meanwhile
+        script = (
+            "import sys; "
+            "sys.stdout.buffer.write(bytes(range(256)) * 1024); "
+            "sys.stdout.buffer.write(b'END')"
+        )
+        proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE)
+        ring = RingBuffer(4096)
+        received = []
+        self.reader.register(proc.stdout, ring, [received.append])
+        self.assertEqual(proc.wait(timeout=5), 0)
+        deadline = time.monotonic() + 5
+        while sum(map(len, received)) < 256 * 1024 + 3:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(ring.read(), (bytes(range(256)) * 16)[3:] + b"END")
+        self.assertEqual(b"".join(received)[-3:], b"END")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from OutputReader import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_keeps_everything_below_capacity(self):
+        ring = RingBuffer(16)
+        ring.write(b"hello ")
+        ring.write(b"world")
+        self.assertEqual(ring.read(), b"hello world")
+        self.assertEqual(len(ring), 11)
+
+    def test_keeps_last_bytes_when_wrapping(self):
+        ring = RingBuffer(8)
+        ring.write(b"abcdef")
+        ring.write(b"ghij")
+        self.assertEqual(ring.read(), b"cdefghij")
+        self.assertEqual(len(ring), 8)
+
+    def test_write_bigger_than_capacity(self):
+        ring = RingBuffer(4)
+        ring.write(b"ab")
+        ring.write(b"0123456789")
+        self.assertEqual(ring.read(), b"6789")
+
+    def test_invalid_capacity_raises(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Program.ProcessRecord import PID_INDEX, ProcessRecord, ProcessState, ProcessTable
+
+
+class TestProcessTable(unittest.TestCase):
+    def record(self, index, pid):
+        return ProcessRecord(index, SimpleNamespace(pid=pid), start_time=0.0)
+
+    def test_index_and_pid_lookup(self):
+        table = ProcessTable()
+        table.set(3, self.record(3, 300))
+        table.set(1, self.record(1, 100))
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.indexes(), [1, 3])
+        self.assertNotIn(2, table)
+        self.assertIsNone(table.get(7))
+        self.assertEqual(table.byPid(300).index, 3)
+
+    def test_replacing_drops_old_pid(self):
+        table = ProcessTable()
+        table.set(1, self.record(1, 100))
+        table.set(1, self.record(1, 101))
+        self.assertEqual(len(table), 1)
+        self.assertIsNone(table.byPid(100))
+        self.assertEqual(table.byPid(101).pid, 101)
+
+    def test_supervisor_pid_index(self):
+        web, db = ProcessTable("web"), ProcessTable("db")
+        web.set(2, self.record(2, 900))
+        db.set(1, self.record(1, 901))
+        self.assertEqual(PID_INDEX.get(900), ("web", 2))
+        self.assertEqual(PID_INDEX.get(901), ("db", 1))
+        # The pid is reused by another program before web is cleared
+        db.set(1, self.record(1, 900))
+        web.clear()
+        self.assertEqual(PID_INDEX.get(900), ("db", 1))
+        self.assertIsNone(PID_INDEX.get(901))
+        db.clear()
+        self.assertIsNone(PID_INDEX.get(900))
+
+    def test_record_is_slotted(self):
+        record = self.record(1, 100)
+        self.assertEqual(record.state, ProcessState.STARTING)
+        self.assertEqual(str(record.state), "starting")
+        with self.assertRaises(AttributeError):
+            record.unknown = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Reaper import Reaper
+
+
+class TestReaper(unittest.TestCase):
+    def setUp(self):
+        self.reaper = Reaper()
+        self.reaper.start()
+
+    def tearDown(self):
+        self.reaper.stop()
+
+    def test_exit_is_reported(self):
+        done = threading.Event()
+        result = {}
+
+        def on_exit(exit_code):
+            result["exit_code"] = exit_code
+            done.set()
+
+        process = subprocess.Popen(["/bin/sh", "-c", "exit 3"])
+        self.reaper.register(process.pid, process, on_exit)
+        self.assertTrue(done.wait(2))
+        self.assertEqual(result["exit_code"], 3)
+        self.assertEqual(process.returncode, 3)
+
+    def test_unregistered_child_does_not_delay_the_others(self):
+        # Left as a zombie for the grace period given to unregistered Popens
+        stranger = os.posix_spawn("/bin/true", ["true"], os.environ)
+        try:
+            time.sleep(0.05)
+            done = threading.Event()
+            process = subprocess.Popen(["sleep", "0.1"])
+            start = time.monotonic()
+            self.reaper.register(process.pid, process, lambda exit_code: done.set())
+            self.assertTrue(done.wait(2))
+            self.assertLess(time.monotonic() - start, 0.5)
+        finally:
+            try:
+                os.waitpid(stranger, 0)
+            except ChildProcessError:
+                pass
+
+    def test_subreaper_collects_orphans(self):
+        self.reaper.setSubreaper()
+        try:
+            # The background sleep is orphaned as soon as sh exits
+            pid = int(
+                subprocess.check_output(
+                    ["sh", "-c", "sleep 0.2 >/dev/null 2>&1 & echo $!"]
+                )
+            )
+            with open(f"/proc/{pid}/stat", "rb") as stat:
+                ppid = int(stat.read().rsplit(b")", 1)[1].split()[1])
+            self.assertEqual(ppid, os.getpid())
+            deadline = time.monotonic() + 3
+            while os.path.exists(f"/proc/{pid}"):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.02)
+        finally:
+            self.reaper.setSubreaper(False)
+
+    def test_timers_run_in_deadline_order(self):
+        done = threading.Event()
+        fired = []
+        self.reaper.schedule(0.05, fired.append, "second")
+        self.reaper.schedule(0.01, fired.append, "first")
+        self.reaper.schedule(0.1, done.set)
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired, ["first", "second"])
+
+    def test_cancelled_timer_does_not_run(self):
+        done = threading.Event()
+        fired = []
+        timer_id = self.reaper.schedule(0.01, fired.append, "cancelled")
+        self.reaper.cancel(timer_id)
+        self.reaper.schedule(0.05, done.set)
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired, [])
+
+    def test_cancelling_fired_timers_keeps_nothing(self):
+        done = threading.Event()
+        timer_ids = [self.reaper.schedule(0, int) for _ in range(1000)]
+        self.reaper.schedule(0.01, done.set)
+        self.assertTrue(done.wait(2))
+        for timer_id in timer_ids:
+            self.reaper.cancel(timer_id)
+        self.assertEqual(self.reaper._pending, set())
+        self.assertEqual(self.reaper._timers, [])
+
+
+class TestReaperEventLoop(unittest.TestCase):
+    def test_exit_and_timer_on_loop(self):
+        async def scenario():
+            reaper = Reaper()
+            reaper.attach(asyncio.get_running_loop())
+            exited = asyncio.Event()
+            fired = []
+            process = subprocess.Popen(["/bin/sh", "-c", "exit 4"])
+            reaper.register(process.pid, process, lambda code: exited.set())
+            reaper.schedule(0.01, fired.append, "timer")
+            try:
+                await asyncio.wait_for(exited.wait(), 2)
+                await asyncio.sleep(0.05)
+            finally:
+                reaper.stop()
+            return process.returncode, fired
+
+        returncode, fired = asyncio.run(scenario())
+        self.assertEqual(returncode, 4)
+        self.assertEqual(fired, ["timer"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import resource
+import subprocess
+import sys
+import time
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from ResourceSampler import ResourceSampler
+from ResourceSampler.ResourceSampler import (
+    CLK_TCK,
+    PAGE_SIZE,
+    parseIo,
+    parseSchedstat,
+    parseStartTime,
+    parseStat,
+    parseStatm,
+)
+
+
+class FakePidIndex:
+    def __init__(self, pids):
+        self.pids = pids
+
+    def snapshot(self):
+        return dict(self.pids)
+
+
+class TestParsers(unittest.TestCase):
+    def test_stat_with_odd_comm(self):
+        data = b"42 (a) b (c)) S 1 42 42 0 -1 4194560 100 0 0 0 30 12 0 0 20 0 1\n"
+        self.assertEqual(parseStat(data), 42 / CLK_TCK)
+
+    def test_start_time(self):
+        data = (
+            b"42 (a) b (c)) S 1 42 42 0 -1 4194560 100 0 0 0 30 12 0 0 20 0 1 0 "
+            b"987654 1000 50\n"
+        )
+        self.assertEqual(parseStartTime(data), 987654)
+
+    def test_schedstat_statm_io(self):
+        self.assertEqual(parseSchedstat(b"1500000000 2000 7\n"), 1.5)
+        self.assertEqual(parseStatm(b"2000 300 100 1 0 200 0\n"), 300 * PAGE_SIZE)
+        io = (
+            b"rchar: 10\nwchar: 20\nsyscr: 1\nsyscw: 2\n"
+            b"read_bytes: 4096\nwrite_bytes: 8192\ncancelled_write_bytes: 0\n"
+        )
+        self.assertEqual(parseIo(io), (4096, 8192))
+        self.assertEqual(parseIo(b"rchar: 10\n"), (0, 0))
+
+
+class TestResourceSampler(unittest.TestCase):
+    def setUp(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-c", "while True: pass"], stdout=subprocess.DEVNULL
+        )
+        self.sampler = ResourceSampler()
+        self.index = FakePidIndex({self.proc.pid: ("burn", 1)})
+        self.sampler._pid_index = self.index
+
+    def tearDown(self):
+        self.proc.kill()
+        self.proc.wait()
+        self.sampler.stop()
+
+    def test_sample_pass(self):
+        self.sampler.sample()
+        time.sleep(0.3)
+        self.sampler.sample()
+        sample = self.sampler.get(self.proc.pid)
+        self.assertGreater(sample["cpu_percent"], 10)
+        self.assertGreater(sample["rss"], 0)
+        totals = self.sampler.programTotals("burn")
+        self.assertEqual(totals["processes"], 1)
+        self.assertEqual(totals["rss"], sample["rss"])
+        # Processes that went away are dropped with their cached fds
+        self.index.pids = {}
+        self.sampler.sample()
+        self.assertIsNone(self.sampler.get(self.proc.pid))
+        self.assertEqual(self.sampler._fds, {})
+
+    def test_cached_fds_stay_within_budget(self):
+        self.sampler._max_cached = 0
+        limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        self.sampler.sample()
+        self.assertEqual(self.sampler._fds, {})
+        self.assertIsNotNone(self.sampler.get(self.proc.pid))
+        # Read uncached, and without raising the limit the programs inherit
+        self.assertEqual(resource.getrlimit(resource.RLIMIT_NOFILE), limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Sockets import ListenerPool, launcherCommand, parseSocket
+
+
+class TestParseSocket(unittest.TestCase):
+    def test_address_forms(self):
+        self.assertEqual(
+            parseSocket("tcp://127.0.0.1:8080"),
+            {
+                "address": "tcp://127.0.0.1:8080",
+                "name": None,
+                "backlog": 1024,
+                "mode": None,
+            },
+        )
+        spec = parseSocket(
+            {
+                "address": "unix:///tmp/app.sock",
+                "name": "admin",
+                "backlog": 16,
+                "mode": "0660",
+            }
+        )
+        self.assertEqual(spec["mode"], 0o660)
+        self.assertEqual(spec["backlog"], 16)
+        parseSocket("tcp://[::1]:80")
+
+    def test_invalid(self):
+        for spec in (
+            "127.0.0.1:80",
+            "udp://127.0.0.1:80",
+            "tcp://127.0.0.1",
+            "tcp://127.0.0.1:99999",
+            "unix://",
+            {"address": "tcp://:80", "name": "a:b"},
+            {"address": "tcp://:80", "backlog": 0},
+            {"address": "tcp://:80", "port": 80},
+        ):
+            with self.assertRaises(ValueError, msg=spec):
+                parseSocket(spec)
+
+
+class TestListenerPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ListenerPool()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pool_shares_one_listener_per_address(self):
+        spec = parseSocket(f"unix://{self.tmp.name}/app.sock")
+        first = self.pool.acquire(spec)
+        second = self.pool.acquire(spec)
+        self.assertIs(first, second)
+        self.assertEqual(len(self.pool), 1)
+        self.pool.release(spec["address"])
+        self.assertTrue(os.path.exists(f"{self.tmp.name}/app.sock"))
+        self.pool.release(spec["address"])
+        self.assertEqual(len(self.pool), 0)
+        self.assertFalse(os.path.exists(f"{self.tmp.name}/app.sock"))
+
+    def test_stale_unix_socket_is_replaced(self):
+        path = f"{self.tmp.name}/app.sock"
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        spec = parseSocket({"address": f"unix://{path}", "mode": 0o600})
+        self.pool.acquire(spec)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        self.pool.release(spec["address"])
+
+    def test_address_in_use(self):
+        busy = socket.socket()
+        busy.bind(("127.0.0.1", 0))
+        busy.listen()
+        try:
+            port = busy.getsockname()[1]
+            with self.assertRaises(ValueError):
+                self.pool.acquire(parseSocket(f"tcp://127.0.0.1:{port}"))
+        finally:
+            busy.close()
+
+    def test_launcher_moves_the_fds_in_place(self):
+        first = self.pool.acquire(parseSocket("tcp://127.0.0.1:0"))
+        second = self.pool.acquire(parseSocket(f"unix://{self.tmp.name}/app.sock"))
+        fds = [second.fileno(), first.fileno()]
+        check = (
+            "import os, socket; "
+            "print(os.environ['LISTEN_PID'] == str(os.getpid()), "
+            "socket.socket(fileno=3).family.name, socket.socket(fileno=4).family.name)"
+        )
+        argv = [sys.executable, "-c", check]
+        output = subprocess.check_output(
+            launcherCommand(fds, sys.executable, argv), pass_fds=fds
+        )
+        self.assertEqual(output.split(), [b"True", b"AF_UNIX", b"AF_INET"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Program.ProcessRecord import UNKNOWN_EXIT_CODE, AdoptedProcess
+from Reaper import REAPER
+from StateSnapshot import StateSnapshot
+from TaskMaster import TaskMaster
+
+
+class TestStateSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "state", "state.json")
+        self.snapshot = StateSnapshot()
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.tmpdir.cleanup()
+
+    def provider(self, inherit=False):
+        return {"web": {"restarts": 3, "processes": [], "inherit": inherit}}
+
+    def test_write_and_load(self):
+        self.snapshot.open(self.path, self.provider)
+        self.snapshot.write()
+        state = StateSnapshot.load(self.path)
+        self.assertEqual(state["pid"], os.getpid())
+        self.assertFalse(state["inherit"])
+        self.assertEqual(state["programs"]["web"]["restarts"], 3)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        # Written through a renamed temporary file, none is left behind
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["state.json"])
+
+    def test_changes_are_batched(self):
+        REAPER.start()
+        self.snapshot.open(self.path, self.provider)
+        for _ in range(100):
+            self.snapshot.changed()
+        deadline = time.monotonic() + 5
+        while self.snapshot.writes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.3)
+        self.assertEqual(self.snapshot.writes, 1)
+
+    def test_load_ignores_bad_snapshots(self):
+        self.assertIsNone(StateSnapshot.load(self.path))
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(StateSnapshot.load(self.path))
+        with open(self.path, "w") as f:
+            f.write('{"version": 99, "programs": {}}')
+        self.assertIsNone(StateSnapshot.load(self.path))
+
+    def test_close_only_removes_its_own_snapshot(self):
+        self.snapshot.open(self.path, self.provider)
+        self.snapshot.write()
+        self.snapshot.close(remove=True, provider=lambda inherit=False: {})
+        self.assertTrue(os.path.exists(self.path))
+        self.snapshot.close(remove=True, provider=self.provider)
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestAdoptedProcess(unittest.TestCase):
+    def test_own_child_keeps_its_exit_code(self):
+        child = subprocess.Popen(["sleep", "30"])
+        process = AdoptedProcess(child.pid)
+        self.assertIsNone(process.pidfd)
+        self.assertIsNone(process.poll())
+        os.kill(child.pid, signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while process.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(process.returncode, -signal.SIGKILL)
+
+    def test_other_process_is_watched_through_a_pidfd(self):
+        # The background sleep is reparented away from us once sh exits
+        pid = int(
+            subprocess.check_output(["sh", "-c", "sleep 30 >/dev/null 2>&1 & echo $!"])
+        )
+        process = AdoptedProcess(pid)
+        self.assertIsNotNone(process.pidfd)
+        self.assertIsNone(process.poll())
+        os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while process.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(process.returncode, UNKNOWN_EXIT_CODE)
+        os.close(process.pidfd)
+
+    def test_gone_process(self):
+        child = subprocess.Popen(["true"])
+        child.wait()
+        with self.assertRaises(ProcessLookupError):
+            AdoptedProcess(child.pid)
+
+
+class TestAdoption(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = {
+            "file_path": os.path.join(self.tmpdir.name, "taskmaster.yaml"),
+            "state_file": os.path.join(self.tmpdir.name, "state.json"),
+            "event_log": False,
+            "sample_interval": 0,
+            "programs": {
+                "sleeper": {
+                    "cmd": "sleep 1000",
+                    "processes": 2,
+                    "start_at_launch": True,
+                    "success_timeout": 0,
+                    "restart_policy": "always",
+                    "backoff_initial": 0,
+                    "backoff_jitter": 0,
+                    "stop_timeout": 2,
+                    "discard_output": True,
+                }
+            },
+        }
+        self.tms = []
+
+    def tearDown(self):
+        for tm in self.tms:
+            tm.__del__()
+        self.tmpdir.cleanup()
+
+    def supervisor(self, **options):
+        tm = TaskMaster({**self.config, **options})
+        self.tms.append(tm)
+        return tm
+
+    @staticmethod
+    def pids(tm):
+        return [record["pid"] for record in tm.statusRecords("sleeper")]
+
+    def test_detached_processes_are_adopted(self):
+        first = self.supervisor()
+        pids = self.pids(first)
+        first.detach()
+        second = self.supervisor(adopt=True)
+        self.assertEqual(self.pids(second), pids)
+        # The exit of an adopted process still drives the restart policy
+        os.kill(pids[0], signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while self.pids(second)[0] == pids[0] and time.monotonic() < deadline:
+            REAPER.waitExit(0.05)
+        self.assertNotEqual(self.pids(second)[0], pids[0])
+        self.assertEqual(second.summary("sleeper")["restarts"], 1)
+
+    def test_changed_program_is_not_adopted(self):
+        first = self.supervisor()
+        pids = self.pids(first)
+        first.detach()
+        programs = {
+            "sleeper": {**self.config["programs"]["sleeper"], "cmd": "sleep 999"}
+        }
+        second = self.supervisor(adopt=True, programs=programs)
+        self.assertTrue(set(pids).isdisjoint(self.pids(second)))
+        deadline = time.monotonic() + 5
+        while any(os.path.exists(f"/proc/{pid}") for pid in pids):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_clean_stop_leaves_nothing_to_adopt(self):
+        first = self.supervisor()
+        pids = self.pids(first)
+        first.__del__()
+        self.assertFalse(os.path.exists(self.config["state_file"]))
+        second = self.supervisor(adopt=True)
+        self.assertTrue(set(pids).isdisjoint(self.pids(second)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Status import StatusSummary
+
+
+class TestStatusSummary(unittest.TestCase):
+    def test_transitions_keep_counts(self):
+        summary = StatusSummary("web")
+        for _ in range(3):
+            summary.add("starting")
+        summary.transition("starting", "running")
+        summary.transition("starting", "running")
+        summary.transition("starting", "exited")
+        self.assertEqual(summary.asDict()["states"], {"running": 2, "exited": 1})
+        self.assertEqual(summary.asDict()["processes"], 3)
+
+    def test_replacing_a_process(self):
+        summary = StatusSummary("web")
+        summary.add("backoff")
+        summary.remove("backoff")
+        summary.add("starting")
+        summary.restarts += 1
+        self.assertEqual(summary.asDict()["states"], {"starting": 1})
+        self.assertEqual(summary.restarts, 1)
+
+    def test_exits(self):
+        summary = StatusSummary("web")
+        summary.recordExit(1, 0)
+        summary.recordExit(2, 1)
+        summary.recordExit(1, -15)
+        result = summary.asDict()
+        self.assertEqual(result["exits"], 3)
+        self.assertEqual(result["last_exit_codes"], {1: -15, 2: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
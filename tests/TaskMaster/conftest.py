@@ -0,0 +1,35 @@
+import pytest
+
+
+def program_config(
+    cmd, name="test", file_path="/tmp/test_config.yaml", **options
+) -> dict:
+    """
+    A supervisor config holding one program: started at launch, never
+    restarted, output discarded, and without the event log, the state file
+    or the sampler. Keyword arguments override the program's options.
+    """
+    program = {
+        "cmd": cmd,
+        "shell": True,
+        "processes": 1,
+        "start_at_launch": True,
+        "success_timeout": 0,
+        "restart_policy": "never",
+        "stop_timeout": 2,
+        "discard_output": True,
+    }
+    program.update(options)
+    return {
+        "file_path": file_path,
+        "event_log": False,
+        "state_file": False,
+        "sample_interval": 0,
+        "programs": {name: program},
+    }
+
+
+@pytest.fixture
+def make_config():
+    """program_config(); a test module overrides it with its own defaults."""
+    return program_config
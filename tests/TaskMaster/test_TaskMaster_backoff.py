@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+
+from TaskMaster import TaskMaster
+
+
+def write_script(path, body):
+    # Renamed into place: never exec'd while being written
+    with open(path + ".tmp", "w") as f:
+        f.write(f"#!/bin/sh\n{body}\n")
+    os.chmod(path + ".tmp", 0o755)
+    os.rename(path + ".tmp", path)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_failed_restart_is_retried(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "worker")
+        write_script(script, "exit 1")
+        tm = TaskMaster(
+            make_config(
+                script,
+                name="worker",
+                shell=False,
+                restart_policy="always",
+                max_restarts=1000,
+                backoff_initial=0.05,
+                backoff_factor=1,
+                backoff_jitter=0,
+            )
+        )
+        try:
+            (record,) = tm.statusRecords("worker")
+            first = record["pid"]
+            os.unlink(script)
+            restarts = tm.statusRecords("worker")[0]["restarts"]
+            # The restarts now fail in Popen: the record must stay scheduled
+            wait_until(
+                lambda: tm.statusRecords("worker")[0]["restarts"] >= restarts + 3
+            )
+            assert tm.statusRecords("worker")[0]["status"] == "backoff"
+            write_script(script, "exec sleep 1000")
+            wait_until(lambda: tm.statusRecords("worker")[0]["status"] == "running")
+            assert tm.statusRecords("worker")[0]["pid"] != first
+        finally:
+            tm.__del__()
@@ -0,0 +1,67 @@
+import functools
+import os
+import time
+
+import pytest
+
+from TaskMaster import TaskMaster
+
+
+@pytest.fixture
+def make_config(make_config):
+    return functools.partial(make_config, name="tree")
+
+
+def group_members(pgid):
+    members = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as stat:
+                fields = stat.read().rsplit(b")", 1)[1].split()
+        except OSError:
+            continue
+        # Zombies are already dead, only their parent has to collect them
+        if int(fields[2]) == pgid and fields[0] != b"Z":
+            members.append(int(entry))
+    return members
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_stop_reaches_the_whole_tree(make_config):
+    tm = TaskMaster(make_config("sleep 1000 & sleep 1000; wait"))
+    try:
+        pid = tm.statusRecords("tree")[0]["pid"]
+        wait_until(lambda: len(group_members(pid)) == 3)
+        tm.stopProcess("tree")
+        wait_until(lambda: not group_members(pid))
+    finally:
+        tm.__del__()
+
+
+def test_leftovers_of_an_exited_process_are_killed(make_config):
+    tm = TaskMaster(make_config("sleep 1000 & sleep 0.3; exit 3"))
+    try:
+        pid = tm.statusRecords("tree")[0]["pid"]
+        wait_until(lambda: tm.statusRecords("tree")[0]["exit_code"] == 3)
+        wait_until(lambda: not group_members(pid))
+    finally:
+        tm.__del__()
+
+
+def test_without_process_group_only_the_process_is_signalled(make_config):
+    tm = TaskMaster(make_config("sleep 1000", shell=False, process_group=False))
+    try:
+        pid = tm.statusRecords("tree")[0]["pid"]
+        assert os.getpgid(pid) == os.getpgid(0)
+        tm.stopProcess("tree")
+        assert tm.statusRecords("tree")[0]["status"] == "stopped"
+    finally:
+        tm.__del__()
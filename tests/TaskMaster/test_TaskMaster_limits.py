@@ -0,0 +1,128 @@
+import functools
+import gc
+import os
+import socket
+import sys
+import tempfile
+import time
+import weakref
+
+import pytest
+import yaml
+
+from LogWriter import LOG_WRITERS
+from Program.ProgramProcess import ProgramProcess
+from TaskMaster import TaskMaster
+
+
+@pytest.fixture
+def make_config(make_config):
+    return functools.partial(make_config, name="limited")
+
+
+def read_when_written(path, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path) or not os.path.getsize(path):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    with open(path) as f:
+        return f.read().strip()
+
+
+def test_program_starts_with_its_limits(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "nofile")
+        tm = TaskMaster(
+            make_config(
+                f"ulimit -n > {out}.tmp; mv {out}.tmp {out}; exec sleep 1000",
+                rlimits={"nofile": [64, 128]},
+            )
+        )
+        try:
+            # Read by the shell itself: set before exec, not once it runs
+            assert read_when_written(out) == "64"
+        finally:
+            tm.__del__()
+
+
+def test_limits_and_listeners_together(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "fd3")
+        address = os.path.join(tmp, "web.sock")
+        tm = TaskMaster(
+            make_config(
+                f"echo $(ulimit -n) $(readlink /proc/$$/fd/3) > {out}.tmp; "
+                f"mv {out}.tmp {out}; exec sleep 1000",
+                rlimits={"nofile": 64},
+                sockets=[f"unix://{address}"],
+            )
+        )
+        try:
+            nofile, fd3 = read_when_written(out).split()
+            assert nofile == "64"
+            assert fd3.startswith("socket:")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(address)
+        finally:
+            tm.__del__()
+
+
+def test_watchdog_recycles_despite_the_restart_policy(monkeypatch, make_config):
+    monkeypatch.setattr(
+        sys.modules[ProgramProcess.__module__], "WATCHDOG_INTERVAL", 0.05
+    )
+    # Grows over max_memory right away and is stopped by SIGTERM: the
+    # restart policy alone would leave it down after the first recycle
+    with tempfile.TemporaryDirectory() as tmp:
+        hog = os.path.join(tmp, "hog.py")
+        with open(hog, "w") as f:
+            f.write("import time\nx = bytearray(64 << 20)\ntime.sleep(1000)\n")
+        config = make_config(
+            f"{sys.executable} {hog}", shell=False, max_memory="16M", max_restarts=0
+        )
+        tm = TaskMaster(config)
+        try:
+            seen = set()
+            deadline = time.monotonic() + 10
+            while len(seen) < 3:
+                assert time.monotonic() < deadline
+                (record,) = tm.statusRecords("limited")
+                assert record["status"] not in ("exited", "closed", "backoff")
+                seen.add(record["pid"])
+                time.sleep(0.02)
+            assert tm.summary("limited")["restarts"] == 0
+        finally:
+            tm.__del__()
+
+
+def test_removed_program_is_released(monkeypatch, make_config):
+    monkeypatch.setattr(
+        sys.modules[ProgramProcess.__module__], "WATCHDOG_INTERVAL", 0.05
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(
+            "sleep 1000",
+            file_path=os.path.join(tmp, "taskmaster.yaml"),
+            max_memory="1G",
+        )
+        log = os.path.join(tmp, "watched.log")
+        config["programs"]["limited"].update(stdout=log, discard_output=False)
+        config["programs"]["other"] = {**config["programs"]["limited"]}
+        del config["programs"]["other"]["max_memory"]
+        del config["programs"]["other"]["stdout"]
+        config["programs"]["other"]["discard_output"] = True
+        tm = TaskMaster(config)
+        try:
+            removed = weakref.ref(tm.programs["limited"]._process)
+            assert log in LOG_WRITERS._writers
+            del config["programs"]["limited"]
+            with open(config["file_path"], "w") as f:
+                yaml.safe_dump(config, f)
+            tm.reloadConfig()
+            time.sleep(0.2)
+            gc.collect()
+            # Neither the watchdog timer nor anything else keeps it alive
+            assert removed() is None
+            assert log not in LOG_WRITERS._writers
+        finally:
+            tm.__del__()
@@ -6,6 +6,8 @@ from TaskMaster import TaskMaster
 def make_config():
     return {
         "file_path": "/tmp/test_config.yaml",
+        "event_log": False,
+        "state_file": False,
         "programs": {
             "nginx": {
                 "cmd": "/usr/local/bin/nginx -c /etc/nginx/test.conf",
@@ -54,7 +56,27 @@ def test_init_assigns_program_names():
 
 def test_raises_if_no_programs():
     with pytest.raises(ValueError):
-        TaskMaster({"file_path": "/tmp/test_config.yaml", "programs": {}})
+        TaskMaster({**make_config(), "programs": {}})
 
     with pytest.raises(ValueError):
-        TaskMaster({"file_path": "/tmp/test_config.yaml", "programs": {}})
+        TaskMaster({**make_config(), "programs": {}})
+
+
+def test_fast_start_launches_in_background():
+    config = make_config()
+    config["fast_start"] = True
+    tm = TaskMaster(config)
+    assert tm.waitLaunched(timeout=10)
+    names = [p for p in tm.programs]
+    assert names == ["nginx", "vogsphere"]
+    assert set(tm._config_hashes) == {"nginx", "vogsphere"}
+    tm.__del__()
+
+
+def test_fast_start_raises_if_no_programs(monkeypatch):
+    started = []
+    monkeypatch.setattr(TaskMaster, "monitorProcesses", started.append)
+    with pytest.raises(ValueError):
+        TaskMaster({**make_config(), "programs": {}, "fast_start": True})
+    # Nothing is left running behind the error
+    assert started == []
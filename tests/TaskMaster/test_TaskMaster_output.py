@@ -0,0 +1,36 @@
+import time
+
+from TaskMaster import TaskMaster
+
+
+def test_tail_keeps_the_last_bytes_of_a_chatty_process():
+    # Far more than a pipe holds, nobody reading but the supervisor
+    chatty = "head -c 300000 /dev/zero | tr '\\0' x; echo; echo END; exec sleep 1000"
+    tm = TaskMaster(
+        {
+            "file_path": "/tmp/test_config.yaml",
+            "event_log": False,
+            "state_file": False,
+            "sample_interval": 0,
+            "programs": {
+                "chatty": {
+                    "cmd": chatty,
+                    "shell": True,
+                    "processes": 1,
+                    "start_at_launch": True,
+                    "success_timeout": 0,
+                    "output_buffer": 4,
+                }
+            },
+        }
+    )
+    try:
+        deadline = time.monotonic() + 5
+        while not tm.tailProcess("chatty", 1).endswith("END\n"):
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        tail = tm.tailProcess("chatty", 1)
+        assert len(tail) == 4096
+        assert tail == "x" * (4096 - 5) + "\nEND\n"
+    finally:
+        tm.__del__()
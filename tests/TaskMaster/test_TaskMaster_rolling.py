@@ -0,0 +1,125 @@
+import functools
+import tempfile
+import time
+
+import pytest
+import yaml
+
+from TaskMaster import TaskMaster
+
+
+@pytest.fixture
+def make_config(make_config, tmp_path):
+    return functools.partial(
+        make_config,
+        name="web",
+        file_path=str(tmp_path / "taskmaster.yaml"),
+        processes=4,
+        success_timeout=1,
+        restart_mode="rolling",
+        stop_timeout=5,
+    )
+
+
+def reload(tm, config, **options):
+    config["programs"]["web"].update(options)
+    with open(config["file_path"], "w") as f:
+        yaml.safe_dump(config, f)
+    tm.reloadConfig()
+
+
+def states(tm):
+    return {r["index"]: (r["pid"], r["status"]) for r in tm.statusRecords("web")}
+
+
+def wait_until(predicate, timeout=10.0, step=0.01):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(step)
+
+
+def test_batches_respect_max_unavailable(make_config):
+    config = make_config("sleep 1000", batch_size=2, max_unavailable=2)
+    tm = TaskMaster(config)
+    try:
+        wait_until(lambda: all(s == "running" for _, s in states(tm).values()))
+        old = {pid for pid, _ in states(tm).values()}
+        reload(tm, config, cmd="sleep 999")
+        down = []
+
+        def replaced():
+            current = states(tm)
+            down.append(sum(s != "running" for _, s in current.values()))
+            return all(
+                pid not in old and status == "running"
+                for pid, status in current.values()
+            )
+
+        wait_until(replaced)
+        # Two at a time: never more than max_unavailable down, and some
+        # old processes were still serving while the first batch started
+        assert max(down) == 2
+        assert tm.summary("web")["restarts"] == 0
+    finally:
+        tm.__del__()
+
+
+def test_batch_size_is_capped_by_max_unavailable(make_config):
+    config = make_config("sleep 1000", batch_size=3, max_unavailable=1)
+    tm = TaskMaster(config)
+    try:
+        wait_until(lambda: all(s == "running" for _, s in states(tm).values()))
+        old = {pid for pid, _ in states(tm).values()}
+        reload(tm, config, cmd="sleep 999")
+        down = []
+
+        def replaced():
+            current = states(tm)
+            down.append(sum(s != "running" for _, s in current.values()))
+            return all(pid not in old and s == "running" for pid, s in current.values())
+
+        wait_until(replaced, timeout=15)
+        assert max(down) == 1
+    finally:
+        tm.__del__()
+
+
+def test_aborted_roll_still_replaces_the_stopping_batch(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        # On SIGTERM one old process exits at once, the other one takes a
+        # second: its replacement must still come after the roll is aborted
+        slow_stop = (
+            f"trap 'mkdir {tmp}/first 2>/dev/null && exit 0; sleep 1; exit 0' TERM; "
+            "while :; do sleep 0.05; done"
+        )
+        config = make_config(slow_stop, processes=2, batch_size=2, max_unavailable=2)
+        tm = TaskMaster(config)
+        try:
+            wait_until(lambda: all(s == "running" for _, s in states(tm).values()))
+            old = {pid for pid, _ in states(tm).values()}
+            # The new command fails its health gate, which aborts the roll
+            reload(tm, config, cmd="exit 1")
+            wait_until(lambda: tm.programs["web"]._process._rolling is None)
+            wait_until(
+                lambda: all(pid not in old for pid, _ in states(tm).values()),
+                timeout=5,
+            )
+            assert "stopped" not in [s for _, s in states(tm).values()]
+        finally:
+            tm.__del__()
+
+
+def test_stop_during_a_roll_replaces_nothing(make_config):
+    slow_stop = "trap 'sleep 0.5; exit 0' TERM; while :; do sleep 0.05; done"
+    config = make_config(slow_stop, processes=2, batch_size=1)
+    tm = TaskMaster(config)
+    try:
+        wait_until(lambda: all(s == "running" for _, s in states(tm).values()))
+        reload(tm, config, cmd="sleep 999")
+        wait_until(lambda: "stopping" in [s for _, s in states(tm).values()])
+        tm.stopProcess("web")
+        time.sleep(0.3)
+        assert [s for _, s in states(tm).values()] == ["stopped", "stopped"]
+    finally:
+        tm.__del__()
@@ -0,0 +1,73 @@
+import os
+import socket
+import sys
+import tempfile
+
+import pytest
+
+from TaskMaster import TaskMaster
+
+WORKER = """\
+import os, socket
+listener = socket.socket(fileno=3)
+while True:
+    conn, _ = listener.accept()
+    env = os.environ
+    conn.sendall(f"{env['LISTEN_FDS']} {env['LISTEN_FDNAMES']} {os.getpid()}".encode())
+    conn.close()
+"""
+
+
+def free_port():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+@pytest.fixture
+def make_config(make_config):
+    def make(script, port, **options):
+        return make_config(
+            f"{sys.executable} {script}",
+            name="web",
+            shell=False,
+            processes=2,
+            sockets=[{"address": f"tcp://127.0.0.1:{port}", "name": "http"}],
+            **options,
+        )
+
+    return make
+
+
+def request(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as conn:
+        return conn.recv(100).decode().split()
+
+
+def test_instances_share_the_listener_across_restarts(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "worker.py")
+        with open(script, "w") as f:
+            f.write(WORKER)
+        port = free_port()
+        tm = TaskMaster(make_config(script, port))
+        try:
+            pids = {record["pid"] for record in tm.statusRecords("web")}
+            seen = set()
+            for _ in range(20):
+                fds, names, pid = request(port)
+                assert (fds, names) == ("1", "http")
+                seen.add(int(pid))
+            assert seen <= pids
+            # Nobody accepts while the program is stopped, but the supervisor
+            # keeps the socket: the connection waits in the accept queue
+            tm.stopProcess("web")
+            waiting = socket.create_connection(("127.0.0.1", port), timeout=5)
+            tm.startProcess("web")
+            new_pids = {record["pid"] for record in tm.statusRecords("web")}
+            assert int(waiting.recv(100).split()[2]) in new_pids
+            waiting.close()
+        finally:
+            tm.__del__()
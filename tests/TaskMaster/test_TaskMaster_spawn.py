@@ -0,0 +1,59 @@
+import functools
+import os
+import stat
+import tempfile
+import time
+
+import pytest
+
+from TaskMaster import TaskMaster
+
+
+@pytest.fixture
+def make_config(make_config):
+    return functools.partial(make_config, name="spawned", shell=False)
+
+
+def read_when_written(path, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    with open(path) as f:
+        return f.read()
+
+
+def test_umask_is_applied(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "created")
+        tm = TaskMaster(
+            make_config(f"touch {out}.tmp; mv {out}.tmp {out}", shell=True, umask="027")
+        )
+        try:
+            read_when_written(out)
+            assert stat.S_IMODE(os.stat(out).st_mode) == 0o640
+        finally:
+            tm.__del__()
+
+
+def test_bare_command_is_resolved_with_the_program_path(make_config):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "ran")
+        script = os.path.join(tmp, "tm-hello")
+        with open(script, "w") as f:
+            f.write(f"#!/bin/sh\necho \"$0\" > {out}.tmp; mv {out}.tmp {out}\n")
+        os.chmod(script, 0o755)
+        tm = TaskMaster(
+            make_config("tm-hello", env={"PATH": f"{tmp}:{os.environ['PATH']}"})
+        )
+        try:
+            # Resolved once by the supervisor, not by each child
+            assert tm.programs["spawned"]._process._executable == script
+            assert read_when_written(out).strip() == script
+        finally:
+            tm.__del__()
+
+
+def test_unknown_command_raises(make_config):
+    with pytest.raises(ValueError, match="command not found"):
+        TaskMaster(make_config("tm-no-such-command --flag"))
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import os
+import signal
+import tempfile
+import time
+
+import pytest
+import yaml
+
+from TaskMaster import TaskMaster
+
+
+@pytest.fixture
+def make_config(make_config):
+    return functools.partial(make_config, name="batch", processes=4, stop_timeout=5)
+
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat:
+            return stat.read().rsplit(b")", 1)[1].split()[0] != b"Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_processes_are_stopped_together(make_config):
+    # Each process takes 0.5s to stop: one batch costs that once, not 4 times
+    tm = TaskMaster(
+        make_config("trap 'sleep 0.5; exit 0' TERM; while :; do sleep 0.05; done")
+    )
+    try:
+        time.sleep(0.3)
+        start = time.monotonic()
+        tm.stopProcess("batch")
+        elapsed = time.monotonic() - start
+        records = tm.statusRecords("batch")
+        assert [r["status"] for r in records] == ["stopped"] * 4
+        assert [r["exit_code"] for r in records] == [0] * 4
+        assert 0.4 < elapsed < 1.5
+    finally:
+        tm.__del__()
+
+
+def test_sigkill_after_stop_timeout(make_config):
+    tm = TaskMaster(
+        make_config(
+            "trap '' TERM; while :; do sleep 0.05; done", processes=2, stop_timeout=1
+        )
+    )
+    try:
+        time.sleep(0.3)
+        start = time.monotonic()
+        tm.stopProcess("batch")
+        elapsed = time.monotonic() - start
+        records = tm.statusRecords("batch")
+        assert [r["status"] for r in records] == ["stopped"] * 2
+        assert [r["exit_code"] for r in records] == [-signal.SIGKILL] * 2
+        assert 0.9 < elapsed < 2.5
+    finally:
+        tm.__del__()
+
+
+def test_stop_does_not_race_backoff_restarts(make_config):
+    # Crash looping processes: the stop must not let a restart slip through
+    config = make_config(
+        "exit 1",
+        restart_policy="always",
+        max_restarts=100000,
+        backoff_initial=0.001,
+        backoff_jitter=0,
+        backoff_reset=1000,
+    )
+    tm = TaskMaster(config)
+    try:
+        for _ in range(20):
+            time.sleep(0.02)
+            tm.stopProcess("batch")
+            pids = [r["pid"] for r in tm.statusRecords("batch")]
+            time.sleep(0.05)
+            records = tm.statusRecords("batch")
+            assert [r["pid"] for r in records] == pids
+            assert {r["status"] for r in records} == {"stopped"}
+            assert not any(alive(pid) for pid in pids)
+            tm.startProcess("batch")
+    finally:
+        tm.__del__()
+
+
+def test_async_reload_keeps_the_loop_running(make_config):
+    # Scaling down stops 3 processes that take 0.5s each: the loop must keep
+    # serving while the reload waits for them
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config(
+            "trap 'sleep 0.5; exit 0' TERM; while :; do sleep 0.05; done",
+            file_path=os.path.join(tmp, "taskmaster.yaml"),
+        )
+        tm = TaskMaster(config)
+        try:
+            time.sleep(0.3)
+            config["programs"]["batch"]["processes"] = 1
+            with open(config["file_path"], "w") as f:
+                yaml.safe_dump(config, f)
+
+            async def scenario():
+                reload = asyncio.ensure_future(tm.reloadConfigAsync())
+                ticks = [time.monotonic()]
+                while not reload.done():
+                    await asyncio.sleep(0.02)
+                    ticks.append(time.monotonic())
+                await reload
+                return max(b - a for a, b in zip(ticks, ticks[1:]))
+
+            start = time.monotonic()
+            longest_gap = asyncio.run(scenario())
+            assert time.monotonic() - start > 0.4
+            assert longest_gap < 0.25
+            assert len(tm.statusRecords("batch")) == 1
+        finally:
+            tm.__del__()
@@ -0,0 +1,35 @@
+import time
+
+from TaskMaster import TaskMaster
+from Tracer import TRACER
+
+
+def test_startup_deadline_is_traced():
+    TRACER.clear()
+    tm = TaskMaster(
+        {
+            "file_path": "/tmp/test_config.yaml",
+            "event_log": False,
+            "state_file": False,
+            "sample_interval": 0,
+            "trace": True,
+            "programs": {
+                "sleeper": {
+                    "cmd": "sleep 1000",
+                    "processes": 2,
+                    "start_at_launch": True,
+                    "success_timeout": 0,
+                    "discard_output": True,
+                }
+            },
+        }
+    )
+    try:
+        deadline = time.monotonic() + 5
+        while TRACER.summary().get("startup.check", {}).get("count", 0) < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        assert TRACER.summary()["spawn"]["count"] == 2
+    finally:
+        tm.__del__()
+        TRACER.disable()
@@ -11,6 +11,8 @@ class TestCommand_dispatch(unittest.TestCase):
         # minimal config to initialize the terminal
         self.config = {
             "file_path": "/tmp/test_config.yaml",
+            "event_log": False,
+            "state_file": False,
             "programs": {
                 "nginx": {
                     "cmd": "/usr/local/bin/nginx -c /etc/nginx/test.conf",
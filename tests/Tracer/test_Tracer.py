@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../src"))
+)
+
+from Tracer import Tracer
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer(size=100)
+
+        @self.tracer.traced("work")
+        def work(value):
+            return value * 2
+
+        self.work = work
+
+    def test_disabled_records_nothing(self):
+        self.assertEqual(self.work(2), 4)
+        with self.tracer.span("block"):
+            pass
+        self.assertEqual(self.tracer.summary(), {})
+
+    def test_spans_and_percentiles(self):
+        self.tracer.enable()
+        self.work(1)
+        with self.tracer.span("block"):
+            pass
+        for duration in range(1, 101):
+            self.tracer.record("fixed", duration / 1000.0)
+        summary = self.tracer.summary()
+        # The ring only keeps the last 100 spans
+        self.assertEqual(set(summary), {"fixed"})
+        self.assertEqual(summary["fixed"]["count"], 100)
+        self.assertEqual(summary["fixed"]["p50"], 51.0)
+        self.assertEqual(summary["fixed"]["p99"], 100.0)
+        self.assertEqual(summary["fixed"]["max"], 100.0)
+        self.assertIn("fixed", "\n".join(self.tracer.summaryLines()))
+
+    def test_exceptions_are_still_recorded(self):
+        self.tracer.enable()
+
+        @self.tracer.traced("fail")
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(self.tracer.summary()["fail"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()